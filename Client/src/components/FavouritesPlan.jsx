@@ -7,10 +7,13 @@ import { PreferencesContext } from '../contexts/PreferencesContext';
 import { useSearchParams } from "react-router-dom";
 
 const FavouritesPlan = () => {
-  const { favorites } = useContext(PreferencesContext);
+  const { favorites, fetchFavoritePlan } = useContext(PreferencesContext);
   const [searchParams] = useSearchParams();
   const [selectedPlanIndex, setSelectedPlanIndex] = useState(0);
   const [activeSection, setActiveSection] = useState(null);
+  // Plans complets déjà chargés, par favorite_id
+  const [fullPlans, setFullPlans] = useState({});
+  const [loadError, setLoadError] = useState(null);
 
   const MAD_RATE = 1;
 
@@ -19,6 +22,26 @@ const FavouritesPlan = () => {
     setSelectedPlanIndex(Math.min(urlIndex, (favorites?.length || 1) - 1));
   }, [favorites, searchParams]);
 
+  const selectedFavorite = favorites?.[selectedPlanIndex];
+  const selectedId = selectedFavorite?.favorite_id;
+
+  useEffect(() => {
+    if (!selectedId || fullPlans[selectedId]) return;
+    let cancelled = false;
+    setLoadError(null);
+    fetchFavoritePlan(selectedId)
+      .then((plan) => {
+        if (!cancelled) setFullPlans((prev) => ({ ...prev, [selectedId]: plan }));
+      })
+      .catch((error) => {
+        console.error("Error fetching favorite plan:", error);
+        if (!cancelled) setLoadError("Échec du chargement du plan");
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedId]);
+
   if (!favorites || favorites.length === 0) {
     return (
       <motion.div 
@@ -31,7 +54,21 @@ const FavouritesPlan = () => {
     );
   }
 
-  const currentPlan = favorites[selectedPlanIndex].favorite_data;
+  // Sans favorite_id (ancienne copie locale), favorite_data est déjà le plan complet
+  const currentPlan = selectedId ? fullPlans[selectedId] : selectedFavorite?.favorite_data;
+
+  if (!currentPlan) {
+    return (
+      <motion.div 
+        initial={{ opacity: 0 }}
+        animate={{ opacity: 1 }}
+        className="flex h-screen items-center justify-center"
+      >
+        <p className="text-gray-600 text-lg animate-pulse">{loadError || "Chargement du plan..."}</p>
+      </motion.div>
+    );
+  }
+
   const breakdown = currentPlan.breakdown;
   const planItems = currentPlan.plan;
 
@@ -47,12 +47,23 @@ export const PreferencesProvider = ({ children }) => {
       setError(null);
 
       try {
-        const response = await axios.get(`${API_URL}/preferencesFavorites/`, {
-          headers: { Authorization: `Bearer ${token}` },
-        });
-
-        // Correction ici ↓
-        const apiData = response.data.data || []; // Structure API: {message, data: [...]}
+        // L'API renvoie les favoris par pages : {message, next_cursor, data: [...]}
+        let apiData = [];
+        let cursor = null;
+        do {
+          const response = await axios.get(`${API_URL}/preferencesFavorites/`, {
+            headers: { Authorization: `Bearer ${token}` },
+            // 200 : la taille de page maximale acceptée par l'API
+            params: cursor === null ? { limit: 200 } : { limit: 200, cursor },
+          });
+          const page = response.data?.data || []; // [] quand il n'y a aucun favori
+          if (!Array.isArray(page)) {
+            apiData = page;
+            break;
+          }
+          apiData = apiData.concat(page);
+          cursor = response.data?.next_cursor ?? null;
+        } while (cursor !== null);
 
         if (Array.isArray(apiData)) {
           setFavorites(apiData);
@@ -189,7 +200,15 @@ export const PreferencesProvider = ({ children }) => {
       );
 
       if (response.data.message === "Favorite ajouté avec succès") {
-        setFavorites((prev) => [...prev, response.data.data]);
+        // Même forme que les éléments de GET /preferencesFavorites/
+        setFavorites((prev) => [
+          ...prev,
+          {
+            favorite_id: response.data.favorite_id,
+            plan_id: preferenceId,
+            favorite_data: response.data.data,
+          },
+        ]);
         toast.success("Plan ajouté aux favoris avec succès!");
         return true;
       }
@@ -254,6 +273,17 @@ export const PreferencesProvider = ({ children }) => {
     }
   };
 
+  // La liste ne contient que le résumé des plans : le plan complet est chargé à la demande
+  const fetchFavoritePlan = async (favoriteId) => {
+    const response = await axios.get(
+      `${API_URL}/preferencesFavorites/${favoriteId}/`,
+      {
+        headers: { Authorization: `Bearer ${token}` },
+      }
+    );
+    return response.data.favorite_data;
+  };
+
   return (
     <PreferencesContext.Provider
       value={{
@@ -265,6 +295,7 @@ export const PreferencesProvider = ({ children }) => {
         removeFromFavorites,
         favorites,
         addToFavorites,
+        fetchFavoritePlan,
       }}
     >
       {children}
@@ -0,0 +1,59 @@
+from logging.config import fileConfig
+from sqlalchemy import engine_from_config, pool
+from alembic import context
+from dotenv import load_dotenv
+import os
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Import your models
+from app.db.database import Base
+from app.db.models import Plans, Preferences, User, Villes, Activities, Itineraires, Hotels, VilleItineraire, LieuxToVisit, Favorite, PlanBlob
+
+# This will be used for autogeneration
+target_metadata = Base.metadata
+
+# Get alembic config
+config = context.config
+
+# Set up logging
+fileConfig(config.config_file_name)
+
+# Set the sqlalchemy.url value from environment variable
+config.set_main_option('sqlalchemy.url', os.getenv('DATABASE_URL'))
+
+def run_migrations_offline():
+    """Run migrations in 'offline' mode."""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    """Run migrations in 'online' mode."""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""add hot path indexes
+
+Indexes for the lookups made on every request: users by email (sign-in,
+signup, Google auth), plans by user, preferences by user, favorites by plan
+and villes by name.
+
+The email index is unique on lower(email) and fails to build if two
+accounts differ only by case; merge those before upgrading.
+
+Revision ID: 3f9c1d2e7a41
+Revises: 
+Create Date: 2026-10-19 10:12:03.418522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d2e7a41'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tables are created by create_all at startup, which also creates these
+    # indexes on new databases; skip the ones that are already there
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True, if_not_exists=True)
+    op.create_index(op.f('ix_plans_idUser'), 'plans', ['idUser'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_preferences_userId'), 'preferences', ['userId'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_favorites_plan_id'), 'favorites', ['plan_id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_villes_nom'), 'villes', ['nom'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_villes_nom'), table_name='villes', if_exists=True)
+    op.drop_index(op.f('ix_favorites_plan_id'), table_name='favorites', if_exists=True)
+    op.drop_index(op.f('ix_preferences_userId'), table_name='preferences', if_exists=True)
+    op.drop_index(op.f('ix_plans_idUser'), table_name='plans', if_exists=True)
+    op.drop_index('ix_users_email_lower', table_name='users', if_exists=True)
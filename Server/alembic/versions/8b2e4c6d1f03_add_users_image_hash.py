@@ -0,0 +1,33 @@
+"""add users.image_hash
+
+Profile pictures move to the content-addressed blob store; the row keeps
+only the sha256 of the file. Existing in-row pictures are moved on first
+read, so the image column stays until they have all been migrated.
+
+Revision ID: 8b2e4c6d1f03
+Revises: 3f9c1d2e7a41
+Create Date: 2026-10-19 14:37:51.209184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4c6d1f03'
+down_revision: Union[str, None] = '3f9c1d2e7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_all already adds the column on new databases
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'image_hash' not in columns:
+        op.add_column('users', sa.Column('image_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'image_hash')
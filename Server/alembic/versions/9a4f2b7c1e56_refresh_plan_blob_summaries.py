@@ -0,0 +1,80 @@
+"""refresh plan_blobs summaries
+
+Summaries now carry the cost breakdown and each stop's days, which the
+favorites list renders. Summaries stored before are recomputed from the
+blobs in batches.
+
+Revision ID: 9a4f2b7c1e56
+Revises: f8c3d6a2e471
+Create Date: 2026-10-20 09:12:44.208315
+
+"""
+from typing import Sequence, Union
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f2b7c1e56'
+down_revision: Union[str, None] = 'f8c3d6a2e471'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+plan_blobs = sa.table(
+    'plan_blobs',
+    sa.column('hash', sa.String),
+    sa.column('data', sa.LargeBinary),
+    sa.column('summary', sa.JSON),
+)
+
+
+# Frozen copies of planBlobService as of this revision
+
+
+def _scalars(data: dict) -> dict:
+    return {key: value for key, value in data.items() if not isinstance(value, (dict, list))}
+
+
+def _summary(data: dict) -> dict:
+    summary = _scalars(data)
+    if isinstance(data.get("breakdown"), dict):
+        summary["breakdown"] = data["breakdown"]
+    stops = data.get("plan")
+    if isinstance(stops, list):
+        summary["plan"] = [_scalars(stop) for stop in stops if isinstance(stop, dict)]
+    return summary
+
+
+def _decode(data: bytes) -> dict:
+    return json.loads(zlib.decompress(data))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    last_hash = ""
+    while True:
+        rows = bind.execute(
+            sa.select(plan_blobs.c.hash, plan_blobs.c.data)
+            .where(plan_blobs.c.hash > last_hash)
+            .order_by(plan_blobs.c.hash)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_hash = rows[-1].hash
+        bind.execute(
+            sa.update(plan_blobs)
+            .where(plan_blobs.c.hash == sa.bindparam('blob_hash'))
+            .values(summary=sa.bindparam('new_summary')),
+            [{"blob_hash": row.hash, "new_summary": _summary(_decode(row.data))} for row in rows]
+        )
+
+
+def downgrade() -> None:
+    # The richer summaries are a superset the older code simply ignores
+    pass
@@ -0,0 +1,37 @@
+"""add data_generations
+
+One counter per dataset, bumped in the transaction that changes it (the
+tourism ingestion), so processes caching the data notice the change.
+
+Revision ID: b3d7e9f12a84
+Revises: 9a4f2b7c1e56
+Create Date: 2026-10-20 09:48:05.731962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d7e9f12a84'
+down_revision: Union[str, None] = '9a4f2b7c1e56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_all already builds the table on new databases
+    if sa.inspect(op.get_bind()).has_table('data_generations'):
+        return
+    op.create_table(
+        'data_generations',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('data_generations')
@@ -0,0 +1,149 @@
+"""add plan_blobs
+
+Favorite plan bodies move out of favorites.favorite_data into plan_blobs,
+keyed by the sha256 of their canonical JSON and stored zlib-compressed, so
+a plan favorited many times is stored once. Existing favorites are moved
+over in batches; favorite_data is kept (emptied) for rollback.
+
+Revision ID: c47d9a1e5b28
+Revises: 8b2e4c6d1f03
+Create Date: 2026-10-19 17:05:22.643190
+
+"""
+from typing import Sequence, Union
+import hashlib
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47d9a1e5b28'
+down_revision: Union[str, None] = '8b2e4c6d1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+favorites = sa.table(
+    'favorites',
+    sa.column('id', sa.Integer),
+    sa.column('favorite_data', sa.JSON(none_as_null=True)),
+    sa.column('blob_hash', sa.String),
+)
+plan_blobs = sa.table(
+    'plan_blobs',
+    sa.column('hash', sa.String),
+    sa.column('data', sa.LargeBinary),
+    sa.column('size', sa.Integer),
+    sa.column('summary', sa.JSON),
+)
+
+
+# Frozen copies of planBlobService as of this revision: the migration must
+# keep writing what it wrote when it was created
+
+
+def _canonical(data: dict) -> bytes:
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _summary(data: dict) -> dict:
+    summary = {key: value for key, value in data.items() if not isinstance(value, (dict, list))}
+    stops = data.get("plan")
+    if isinstance(stops, list):
+        summary["cities"] = [stop.get("city") for stop in stops if isinstance(stop, dict)]
+    return summary
+
+
+def _encode(data: dict) -> dict:
+    canonical = _canonical(data)
+    return {
+        "hash": hashlib.sha256(canonical).hexdigest(),
+        "data": zlib.compress(canonical, 6),
+        "size": len(canonical),
+        "summary": _summary(data),
+    }
+
+
+def _decode(data: bytes) -> dict:
+    return json.loads(zlib.decompress(data))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # create_all already builds the new table and column on new databases
+    if not inspector.has_table('plan_blobs'):
+        op.create_table(
+            'plan_blobs',
+            sa.Column('hash', sa.String(length=64), nullable=False),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+            sa.Column('size', sa.Integer(), nullable=False),
+            sa.Column('summary', sa.JSON(), nullable=True),
+            sa.PrimaryKeyConstraint('hash')
+        )
+    if 'blob_hash' not in {column['name'] for column in inspector.get_columns('favorites')}:
+        with op.batch_alter_table('favorites') as batch_op:
+            batch_op.add_column(sa.Column('blob_hash', sa.String(length=64), nullable=True))
+            batch_op.create_foreign_key('fk_favorites_blob_hash', 'plan_blobs', ['blob_hash'], ['hash'])
+    op.create_index(op.f('ix_favorites_blob_hash'), 'favorites', ['blob_hash'], unique=False, if_not_exists=True)
+
+    stored = set(bind.scalars(sa.select(plan_blobs.c.hash)))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(favorites.c.id, favorites.c.favorite_data)
+            .where(favorites.c.id > last_id, favorites.c.blob_hash.is_(None), favorites.c.favorite_data.is_not(None))
+            .order_by(favorites.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        new_blobs, links = {}, []
+        for row in rows:
+            blob = _encode(row.favorite_data)
+            if blob["hash"] not in stored:
+                new_blobs[blob["hash"]] = blob
+            links.append({"favorite_id": row.id, "hash": blob["hash"]})
+        if new_blobs:
+            bind.execute(sa.insert(plan_blobs), list(new_blobs.values()))
+            stored.update(new_blobs)
+        bind.execute(
+            sa.update(favorites)
+            .where(favorites.c.id == sa.bindparam('favorite_id'))
+            .values(blob_hash=sa.bindparam('hash'), favorite_data=None),
+            links
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(favorites.c.id, plan_blobs.c.data)
+            .join(plan_blobs, favorites.c.blob_hash == plan_blobs.c.hash)
+            .where(favorites.c.id > last_id)
+            .order_by(favorites.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        bind.execute(
+            sa.update(favorites)
+            .where(favorites.c.id == sa.bindparam('favorite_id'))
+            .values(favorite_data=sa.bindparam('plan')),
+            [{"favorite_id": row.id, "plan": _decode(row.data)} for row in rows]
+        )
+
+    op.drop_index(op.f('ix_favorites_blob_hash'), table_name='favorites', if_exists=True)
+    with op.batch_alter_table('favorites') as batch_op:
+        batch_op.drop_constraint('fk_favorites_blob_hash', type_='foreignkey')
+        batch_op.drop_column('blob_hash')
+    op.drop_table('plan_blobs')
@@ -0,0 +1,45 @@
+"""add revoked_tokens
+
+Logged-out tokens are shared between workers through this table instead of
+living in each process. Rows hold a 16-byte digest of the token, never the
+token itself, and are deleted once the token would have expired.
+
+Revision ID: d5e81b3a9c60
+Revises: c47d9a1e5b28
+Create Date: 2026-10-19 19:12:40.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e81b3a9c60'
+down_revision: Union[str, None] = 'c47d9a1e5b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_all already builds the table on new databases
+    if sa.inspect(op.get_bind()).has_table('revoked_tokens'):
+        return
+    op.create_table(
+        'revoked_tokens',
+        sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('token_id', sa.LargeBinary(length=16), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('expires_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('seq'),
+        sa.UniqueConstraint('token_id')
+    )
+    op.create_index(op.f('ix_revoked_tokens_user_id'), 'revoked_tokens', ['user_id'], unique=False)
+    op.create_index(op.f('ix_revoked_tokens_expires_at'), 'revoked_tokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revoked_tokens_expires_at'), table_name='revoked_tokens')
+    op.drop_index(op.f('ix_revoked_tokens_user_id'), table_name='revoked_tokens')
+    op.drop_table('revoked_tokens')
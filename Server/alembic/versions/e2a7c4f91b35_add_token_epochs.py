@@ -0,0 +1,38 @@
+"""add users.token_epoch and revoked_tokens.epoch
+
+Access tokens carry the user's token_epoch; logout-all bumps it and records
+a marker row in revoked_tokens so every worker rejects older tokens without
+keeping a list of them.
+
+Revision ID: e2a7c4f91b35
+Revises: d5e81b3a9c60
+Create Date: 2026-10-19 20:03:18.554207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a7c4f91b35'
+down_revision: Union[str, None] = 'd5e81b3a9c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_all already adds the columns on new databases
+    inspector = sa.inspect(op.get_bind())
+    if 'token_epoch' not in {column['name'] for column in inspector.get_columns('users')}:
+        op.add_column('users', sa.Column('token_epoch', sa.Integer(), server_default='0', nullable=False))
+    if 'epoch' not in {column['name'] for column in inspector.get_columns('revoked_tokens')}:
+        op.add_column('revoked_tokens', sa.Column('epoch', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('revoked_tokens') as batch_op:
+        batch_op.drop_column('epoch')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_epoch')
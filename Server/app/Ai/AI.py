@@ -3,25 +3,17 @@ import re
 from datetime import datetime, timedelta
 from typing import List, Optional
 
+import numpy as np
 import openai
-import pandas as pd
 import requests
 from openai import OpenAI
 from pydantic import BaseModel, Field
 
 
 import re
-import os
 
 from app.core.config import settings
-
-# Get the current directory where AI.py is located
-current_dir = os.path.dirname(os.path.abspath(__file__))
-# Define the paths relative to the current directory
-tourism_data_file = os.path.join(current_dir, "Comprehensive_Max_Tourism_Dataset.xlsx")
-transport_data_file = os.path.join(current_dir, "Comprehensive_Max_Transport_Dataset.xlsx")
-tourism_df = pd.read_excel(tourism_data_file)
-transport_df = pd.read_excel(transport_data_file)
+from app.Ai.datasets import DatasetSnapshot, dataset_registry
 
 client = OpenAI(api_key=settings.AI_API_KEY)
 class PlanRequest(BaseModel):
@@ -123,17 +115,15 @@ def adjust_activities_to_budget(activities: List[dict], remaining_budget: float)
     return selected_activities
 
 
-def adjust_hotel_to_budget(city: str, budget: float, budget_tier: str) -> dict:
+def adjust_hotel_to_budget(city: str, budget: float, budget_tier: str, snapshot: DatasetSnapshot = None, catalog=None) -> dict:
     """Sélectionne un hôtel existant selon la gamme de prix"""
-    hotel_df = tourism_df[(tourism_df['Ville'] == city) & 
-                        (tourism_df['Type de donnée'] == 'Hôtel')].copy()
+    # Hôtels de la ville, déjà triés par prix (base de données ou snapshot)
+    source = catalog or snapshot or dataset_registry.current
+    costs, hotel_name_at = source.hotels_for(city)
     
-    if hotel_df.empty:
+    if len(costs) == 0:
         raise ValueError(f"Aucun hôtel trouvé pour {city}")
 
-    # Trier par prix
-    hotel_df.sort_values('Coût (MAD)', inplace=True)
-    
     # Définir les plages de prix
     price_ranges = {
         "Economy": (0, 200),
@@ -143,41 +133,40 @@ def adjust_hotel_to_budget(city: str, budget: float, budget_tier: str) -> dict:
     
     min_price, max_price = price_ranges[budget_tier]
     
-    # Filtrer les hôtels dans la plage
+    # Filtrer les hôtels dans la plage (les prix sont triés)
     if budget_tier == "Economy":
-        filtered = hotel_df[hotel_df['Coût (MAD)'] < max_price]
+        low, high = 0, np.searchsorted(costs, max_price, side='left')
     elif budget_tier == "Standard":
-        filtered = hotel_df[(hotel_df['Coût (MAD)'] >= min_price) & 
-                          (hotel_df['Coût (MAD)'] < max_price)]
+        low = np.searchsorted(costs, min_price, side='left')
+        high = np.searchsorted(costs, max_price, side='left')
     else:  # Premium
-        filtered = hotel_df[hotel_df['Coût (MAD)'] >= min_price]
+        low, high = np.searchsorted(costs, min_price, side='left'), len(costs)
 
     # Si aucun hôtel dans la plage, adapter la sélection
-    if filtered.empty:
+    if low >= high:
         if budget_tier == "Economy":
-            selected = hotel_df.iloc[0]  # Hôtel le moins cher
+            selected = 0  # Hôtel le moins cher
         elif budget_tier == "Premium":
-            selected = hotel_df.iloc[-1]  # Hôtel le plus cher
+            selected = len(costs) - 1  # Hôtel le plus cher
         else:  # Standard
-            mid_index = len(hotel_df) // 2
-            selected = hotel_df.iloc[mid_index]
+            selected = len(costs) // 2
     else:
-        selected = filtered.sample(1).iloc[0]
+        selected = random.randrange(low, high)
 
     return {
-        "Nom de l'élément": selected['Nom de l\'élément'],
-        "Coût (MAD)": float(selected['Coût (MAD)']),
+        "Nom de l'élément": hotel_name_at(selected),
+        "Coût (MAD)": float(costs[selected]),
         "Type de donnée": "Hôtel",
         "Ville": city,
-        "Note": float(selected.get('Note', 3.0))
+        "Note": 3.0
     }
 
-def adjust_transport_to_budget(departure_city: str, arrival_city: str, budget: float) -> float:
+def adjust_transport_to_budget(departure_city: str, arrival_city: str, budget: float, snapshot: DatasetSnapshot = None) -> float:
     """Adjust transport cost based on the budget."""
-    transport = transport_df[(transport_df['Ville de départ'] == departure_city) &
-                             (transport_df['Ville d\'arrivée'] == arrival_city)]
-    if not transport.empty:
-        base_cost = float(transport.iloc[0]['Distance (km)']) * 2
+    snapshot = snapshot or dataset_registry.current
+    distance = snapshot.distance(departure_city, arrival_city)
+    if distance is not None:
+        base_cost = distance * 2
         if budget < 1000:  # Low budget
             return base_cost * 0.8  # 20% discount
         elif budget > 5000:  # High budget
@@ -185,30 +174,20 @@ def adjust_transport_to_budget(departure_city: str, arrival_city: str, budget: f
         else:  # Medium budget
             return base_cost
     else:
+        # Only same-city legs and cities outside the transport graph end up here
         return random.uniform(40, 60)
 
 
 
-def get_nearest_city(current_city: str, remaining_cities: List[str], transport_df: pd.DataFrame) -> str:
+def get_nearest_city(current_city: str, remaining_cities: List[str], snapshot: DatasetSnapshot) -> str:
     distances = []
     for city in remaining_cities:
-        try:
-            # Check both directions for transport data
-            forward_distance = transport_df[
-                (transport_df['Ville de départ'] == current_city) &
-                (transport_df['Ville d\'arrivée'] == city)
-            ]['Distance (km)'].values
-
-            reverse_distance = transport_df[
-                (transport_df['Ville de départ'] == city) &
-                (transport_df['Ville d\'arrivée'] == current_city)
-            ]['Distance (km)'].values
-
-            distance = forward_distance[0] if forward_distance.size > 0 else reverse_distance[0]
-            distances.append((city, float(distance)))
-        except:
-            # Default to large distance if no data exists
-            distances.append((city, float('inf')))
+        # Shortest route (direct or multi-hop), checking both directions
+        distance = snapshot.distance(current_city, city)
+        if distance is None:
+            distance = snapshot.distance(city, current_city)
+        # Default to large distance if no data exists
+        distances.append((city, distance if distance is not None else float('inf')))
 
     if not distances:
         return random.choice(remaining_cities) if remaining_cities else None
@@ -216,7 +195,7 @@ def get_nearest_city(current_city: str, remaining_cities: List[str], transport_d
     return min(distances, key=lambda x: x[1])[0]
 
 
-def optimize_city_order(departure_city: str, cities: List[str], transport_df: pd.DataFrame, start_city: str = None) -> List[str]:
+def optimize_city_order(departure_city: str, cities: List[str], snapshot: DatasetSnapshot, start_city: str = None) -> List[str]:
     # Ensure the departure city is included in the list of cities to visit
     all_cities = [departure_city] + [city for city in cities if city != departure_city]
 
@@ -234,7 +213,7 @@ def optimize_city_order(departure_city: str, cities: List[str], transport_df: pd
         current_city = start_city
     else:
         # Start with the nearest city to departure
-        next_city = get_nearest_city(current_city, remaining_cities, transport_df)
+        next_city = get_nearest_city(current_city, remaining_cities, snapshot)
         if next_city:
             optimized_route.append(next_city)
             remaining_cities.remove(next_city)
@@ -245,7 +224,7 @@ def optimize_city_order(departure_city: str, cities: List[str], transport_df: pd
 
     # Build the rest of the route
     while remaining_cities:
-        next_city = get_nearest_city(current_city, remaining_cities, transport_df)
+        next_city = get_nearest_city(current_city, remaining_cities, snapshot)
         if next_city:
             optimized_route.append(next_city)
             remaining_cities.remove(next_city)
@@ -256,10 +235,11 @@ def optimize_city_order(departure_city: str, cities: List[str], transport_df: pd
 
     return optimized_route
 
-def calculate_plan(plan_request: PlanRequest, total_days: int, used_activities: set, budget_tier: str = "Premium"):
+def calculate_plan(plan_request: PlanRequest, total_days: int, used_activities: set, budget_tier: str = "Premium", snapshot: DatasetSnapshot = None, catalog=None):
     # ... existing code ...
+    snapshot = snapshot or dataset_registry.current
     departure_city = plan_request.lieuDepart
-    cities = optimize_city_order(departure_city, plan_request.cities, transport_df)
+    cities = optimize_city_order(departure_city, plan_request.cities, snapshot)
 
     # Ensure departure city is explicitly included if missing
     if departure_city not in cities:
@@ -273,15 +253,12 @@ def calculate_plan(plan_request: PlanRequest, total_days: int, used_activities:
 
     for i in range(len(cities)):
         from_city = departure_city if i == 0 else cities[i - 1]
-        try:
-            distance = transport_df[
-                (transport_df['Ville de départ'] == from_city) &
-                (transport_df['Ville d\'arrivée'] == cities[i])
-            ]['Distance (km)'].iloc[0]
-            distances.append(float(distance))
-            total_distance += float(distance)
-        except IndexError:
-            # Default to 100km if no data exists
+        distance = snapshot.distance(from_city, cities[i])
+        if distance is not None:
+            distances.append(distance)
+            total_distance += distance
+        else:
+            # Default to 100km for same-city legs and cities with no transport data
             distances.append(100.0)
             total_distance += 100.0
             print(f"Warning: Missing distance between {from_city} and {cities[i]}")
@@ -306,11 +283,11 @@ def calculate_plan(plan_request: PlanRequest, total_days: int, used_activities:
 
     for idx, city in enumerate(cities):
         days_spent = days_distribution[idx]
-        transport_cost = adjust_transport_to_budget(departure_city, city, budget)
+        transport_cost = adjust_transport_to_budget(departure_city, city, budget, snapshot)
         transport_total += transport_cost
         total_cost += transport_cost
 
-        hotel = adjust_hotel_to_budget(city, budget, budget_tier)
+        hotel = adjust_hotel_to_budget(city, budget, budget_tier, snapshot, catalog)
         hotel_cost = float(hotel['Coût (MAD)'])
         hotel_name = hotel['Nom de l\'élément']
         total_hotel_cost = hotel_cost * days_spent
@@ -345,7 +322,9 @@ def calculate_plan(plan_request: PlanRequest, total_days: int, used_activities:
 
             except Exception as e:
                 print(f"Error generating activities with Llama: {e}")
-                selected_activities = [{"name": "Free City Walk", "price": 0}]
+                # Fall back to the activities stored in the database, if any
+                selected_activities = catalog.activities_for(city, remaining_budget) if catalog else []
+                selected_activities = selected_activities[:num_activities] or [{"name": "Free City Walk", "price": 0}]
 
             selected_activities = adjust_activities_to_budget(selected_activities, remaining_budget)
 
@@ -374,7 +353,7 @@ def calculate_plan(plan_request: PlanRequest, total_days: int, used_activities:
         departure_city = city
 
     return itinerary, total_cost, transport_total
-def generate_plans(plan_request: PlanRequest):
+def generate_plans(plan_request: PlanRequest, catalog=None):
     total_days = plan_request.calculate_total_days()
 
     if len(plan_request.cities) > total_days:
@@ -382,6 +361,9 @@ def generate_plans(plan_request: PlanRequest):
             "Not enough days to visit all cities. Please reduce the number of cities or extend your trip."
         )
 
+    # Pin the datasets for the whole request so a reload can't mix versions
+    snapshot = dataset_registry.current
+
     # Calculate minimum required budget for Economy tier (30% of original budget)
     economy_budget = plan_request.budget * 0.3
     used_activities = set()
@@ -396,7 +378,7 @@ def generate_plans(plan_request: PlanRequest):
             budget=economy_budget,
             userId=plan_request.userId
         )
-        _, test_total_cost_economy, _ = calculate_plan(test_request_economy, total_days, used_activities.copy(), budget_tier="Economy")
+        _, test_total_cost_economy, _ = calculate_plan(test_request_economy, total_days, used_activities.copy(), budget_tier="Economy", snapshot=snapshot, catalog=catalog)
         if test_total_cost_economy > plan_request.budget:
             raise ValueError(
                 f"Not enough budget. Your budget of {plan_request.budget} MAD is insufficient. Please increase your budget or reduce the number of cities."
@@ -417,7 +399,7 @@ def generate_plans(plan_request: PlanRequest):
             budget=premium_budget,
             userId=plan_request.userId
         )
-        _, test_total_cost_premium, _ = calculate_plan(test_request_premium, total_days, used_activities.copy(), budget_tier="Premium")
+        _, test_total_cost_premium, _ = calculate_plan(test_request_premium, total_days, used_activities.copy(), budget_tier="Premium", snapshot=snapshot, catalog=catalog)
         if test_total_cost_premium <= plan_request.budget:
             can_accommodate_premium = True
     except:
@@ -435,7 +417,7 @@ def generate_plans(plan_request: PlanRequest):
             budget=standard_budget,
             userId=plan_request.userId
         )
-        _, test_total_cost_standard, _ = calculate_plan(test_request_standard, total_days, used_activities.copy(), budget_tier="Standard")
+        _, test_total_cost_standard, _ = calculate_plan(test_request_standard, total_days, used_activities.copy(), budget_tier="Standard", snapshot=snapshot, catalog=catalog)
         if test_total_cost_standard <= plan_request.budget:
             can_accommodate_standard = True
     except:
@@ -484,7 +466,9 @@ def generate_plans(plan_request: PlanRequest):
             modified_request, 
             total_days, 
             used_activities,
-            budget_tier=tier["name"]
+            budget_tier=tier["name"],
+            snapshot=snapshot,
+            catalog=catalog
         )
 
         hotels_total = sum(city['hotel']['totalPrice'] for city in itinerary)
@@ -497,6 +481,9 @@ def generate_plans(plan_request: PlanRequest):
             "total_days_spent": total_days,
             "budget_tier": tier["name"],
             "budget_percentage": int(tier["percentage"] * 100),
+            "dataset_version": snapshot.version,
+            # Hotels and activities come from the database then; transport still from the dataset
+            "catalog_generation": catalog.generation if catalog is not None else None,
             "breakdown": {
                 "hotels_total": hotels_total,
                 "activities_total": activities_total,
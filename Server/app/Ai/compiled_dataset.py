@@ -0,0 +1,147 @@
+# app/Ai/compiled_dataset.py
+import logging
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes so stale directories are ignored
+FORMAT_VERSION = 3
+COMPLETE_MARKER = "COMPLETE"
+
+
+class StringTable:
+    """Interned strings stored as one UTF-8 blob plus an offsets array.
+
+    Columns reference strings by their int32 code, so the only Python string
+    objects a worker holds are the ones it actually decodes.
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+        self._codes: Dict[str, int] = {self[i]: i for i in range(len(self))}
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, code: int) -> str:
+        start, end = self._offsets[code], self._offsets[code + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def code(self, value: str) -> int:
+        """Code of ``value``, or -1 when the string is not interned"""
+        return self._codes.get(value, -1)
+
+    @staticmethod
+    def build(values: Iterable[str]) -> "tuple[np.ndarray, np.ndarray, Dict[str, int]]":
+        codes: Dict[str, int] = {}
+        encoded: List[bytes] = []
+        for value in values:
+            if value not in codes:
+                codes[value] = len(encoded)
+                encoded.append(value.encode("utf-8"))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return blob, offsets, codes
+
+
+def shortest_paths(distance: np.ndarray) -> np.ndarray:
+    """Floyd–Warshall over a dense distance matrix (NaN = no direct link).
+
+    Returns the all-pairs shortest route distances, NaN where a city can't
+    be reached. The diagonal stays NaN: staying in a city is not a trip.
+    """
+    routes = np.where(np.isnan(distance), np.inf, distance)
+    np.fill_diagonal(routes, 0.0)
+    for k in range(len(routes)):
+        np.minimum(routes, routes[:, k, None] + routes[None, k, :], out=routes)
+    routes[np.isinf(routes)] = np.nan
+    np.fill_diagonal(routes, np.nan)
+    return routes
+
+
+def compiled_path(cache_dir: str, version: str) -> str:
+    return os.path.join(cache_dir, f"v{FORMAT_VERSION}-{version}")
+
+
+def _compile(tourism_df: pd.DataFrame, transport_df: pd.DataFrame, out_dir: str) -> None:
+    hotels = tourism_df[tourism_df['Type de donnée'] == 'Hôtel']
+    # Hotels without a price can't be placed in a tier
+    hotels = hotels.dropna(subset=['Coût (MAD)'])
+    hotels = hotels.sort_values(['Ville', 'Coût (MAD)'], kind='stable')
+    hotel_cities = hotels['Ville'].astype(str).tolist()
+    hotel_names = hotels['Nom de l\'élément'].astype(str).tolist()
+
+    departures = transport_df['Ville de départ'].astype(str).tolist()
+    arrivals = transport_df['Ville d\'arrivée'].astype(str).tolist()
+    transport_cities = list(dict.fromkeys(departures + arrivals))
+
+    blob, offsets, codes = StringTable.build(hotel_cities + hotel_names + transport_cities)
+
+    # Hotels sorted by (city, price); per-city slices are [bounds[i], bounds[i + 1])
+    city_codes = np.array([codes[c] for c in hotel_cities], dtype=np.int32)
+    city_list = list(dict.fromkeys(hotel_cities))
+    bounds = np.searchsorted(city_codes, [codes[c] for c in city_list] + [np.iinfo(np.int32).max])
+    arrays = {
+        "strings": blob,
+        "string_offsets": offsets,
+        "hotel_name": np.array([codes[n] for n in hotel_names], dtype=np.int32),
+        "hotel_cost": hotels['Coût (MAD)'].to_numpy(dtype=np.float64),
+        "hotel_cities": np.array([codes[c] for c in city_list], dtype=np.int32),
+        "hotel_bounds": bounds.astype(np.int64),
+    }
+
+    # Transport graph as a dense matrix of direct links, then every pair's
+    # shortest route so pairs without a direct link get a multi-hop distance
+    node = {city: i for i, city in enumerate(transport_cities)}
+    distance = np.full((len(transport_cities), len(transport_cities)), np.nan)
+    distance[[node[d] for d in departures], [node[a] for a in arrivals]] = \
+        transport_df['Distance (km)'].to_numpy(dtype=np.float64)
+    arrays["transport_cities"] = np.array([codes[c] for c in transport_cities], dtype=np.int32)
+    arrays["distance"] = shortest_paths(distance)
+
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    open(os.path.join(out_dir, COMPLETE_MARKER), "w").close()
+
+
+def ensure_compiled(tourism_path: str, transport_path: str, cache_dir: str, version: str) -> str:
+    """Compile the Excel datasets for ``version`` unless a worker already did.
+
+    The build happens in a private temporary directory that is renamed into
+    place, so concurrent workers never observe a half-written dataset.
+    """
+    target = compiled_path(cache_dir, version)
+    if os.path.exists(os.path.join(target, COMPLETE_MARKER)):
+        return target
+
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".build-", dir=cache_dir)
+    try:
+        _compile(pd.read_excel(tourism_path), pd.read_excel(transport_path), staging)
+        try:
+            os.rename(staging, target)
+            logger.info(f"Compiled planner datasets {version} into {target}")
+        except OSError:
+            # Another worker published the same version first
+            if not os.path.exists(os.path.join(target, COMPLETE_MARKER)):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+def load_compiled(path: str) -> Dict[str, np.ndarray]:
+    """Memory-map every array of a compiled dataset (read-only, shared page cache)"""
+    return {
+        name[:-len(".npy")]: np.load(os.path.join(path, name), mmap_mode="r")
+        for name in os.listdir(path)
+        if name.endswith(".npy")
+    }
@@ -0,0 +1,174 @@
+# app/Ai/datasets.py
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.Ai.compiled_dataset import StringTable, ensure_compiled, load_compiled
+
+logger = logging.getLogger(__name__)
+
+# Get the current directory where datasets.py is located
+current_dir = os.path.dirname(os.path.abspath(__file__))
+TOURISM_DATA_FILE = os.path.join(current_dir, "Comprehensive_Max_Tourism_Dataset.xlsx")
+TRANSPORT_DATA_FILE = os.path.join(current_dir, "Comprehensive_Max_Transport_Dataset.xlsx")
+# The tourism dataset and the transport dataset spell some cities differently
+CITY_ALIASES = {
+    "Fes": "Fès",
+    "Tangier": "Tanger",
+}
+# Shared by every worker on the host so they map the same files
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "tourism-planner-datasets")
+
+
+def _fingerprint(*paths: str) -> str:
+    """Content hash of the dataset files, used as the dataset version"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class DatasetSnapshot:
+    """Immutable view of the compiled planner datasets.
+
+    Every column is a read-only memory-mapped array, so all workers on a host
+    share one page-cache copy. Strings are int32 codes into ``strings``.
+    A reload builds a new snapshot and swaps it in, so a plan that pinned a
+    snapshot keeps a consistent view.
+    """
+
+    def __init__(self, version: str, arrays: Dict[str, np.ndarray]):
+        self.version = version
+        self.strings = StringTable(arrays["strings"], arrays["string_offsets"])
+
+        # Hotels sorted by (city, price)
+        self.hotel_name = arrays["hotel_name"]
+        self.hotel_cost = arrays["hotel_cost"]
+        bounds = arrays["hotel_bounds"]
+        self._hotel_bounds: Dict[str, Tuple[int, int]] = {
+            self.strings[code]: (int(bounds[i]), int(bounds[i + 1]))
+            for i, code in enumerate(arrays["hotel_cities"])
+        }
+
+        # (départ, arrivée) shortest route distance in km, NaN where unreachable
+        self.distance_matrix = arrays["distance"]
+        self.city_index: Dict[str, int] = {
+            self.strings[code]: i for i, code in enumerate(arrays["transport_cities"])
+        }
+        for alias, city in CITY_ALIASES.items():
+            if city in self.city_index:
+                self.city_index.setdefault(alias, self.city_index[city])
+
+    def hotel_bounds(self, city: str) -> Tuple[int, int]:
+        """[start, end) of the city's hotels in the hotel arrays (empty if unknown)"""
+        return self._hotel_bounds.get(city, (0, 0))
+
+    def hotel_costs(self, city: str) -> np.ndarray:
+        """Prices of the city's hotels, ascending"""
+        start, end = self.hotel_bounds(city)
+        return self.hotel_cost[start:end]
+
+    def hotel_name_at(self, index: int) -> str:
+        return self.strings[self.hotel_name[index]]
+
+    def hotels_for(self, city: str) -> Tuple[np.ndarray, Callable[[int], str]]:
+        """Prices of the city's hotels (ascending) and a name lookup by position"""
+        start, end = self.hotel_bounds(city)
+        return self.hotel_cost[start:end], lambda i: self.hotel_name_at(start + i)
+
+    def distance(self, departure_city: str, arrival_city: str) -> Optional[float]:
+        """Shortest route distance between two cities, direct or multi-hop (O(1))"""
+        i = self.city_index.get(departure_city)
+        j = self.city_index.get(arrival_city)
+        if i is None or j is None:
+            return None
+        distance = self.distance_matrix[i, j]
+        return None if np.isnan(distance) else float(distance)
+
+
+class DatasetRegistry:
+    """Holds the current DatasetSnapshot and rebuilds it when the files change.
+
+    Readers only dereference ``current`` (a single attribute read), so they
+    never wait on a reload in progress.
+    """
+
+    def __init__(self, tourism_path: str, transport_path: str, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.tourism_path = tourism_path
+        self.transport_path = transport_path
+        self.cache_dir = cache_dir
+        self._build_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dataset-reload")
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self._mtimes = self._stat()
+        self._snapshot = self._build()
+
+    @property
+    def current(self) -> DatasetSnapshot:
+        return self._snapshot
+
+    def _stat(self) -> Tuple[float, float]:
+        return (os.path.getmtime(self.tourism_path), os.path.getmtime(self.transport_path))
+
+    def _build(self) -> DatasetSnapshot:
+        version = _fingerprint(self.tourism_path, self.transport_path)
+        path = ensure_compiled(self.tourism_path, self.transport_path, self.cache_dir, version)
+        return DatasetSnapshot(version, load_compiled(path))
+
+    def reload(self) -> DatasetSnapshot:
+        """Rebuild the snapshot and swap it in if the data changed"""
+        with self._build_lock:
+            mtimes = self._stat()
+            snapshot = self._build()
+            self._mtimes = mtimes
+            if snapshot.version != self._snapshot.version:
+                previous = self._snapshot.version
+                self._snapshot = snapshot
+                logger.info(f"Planner datasets reloaded: {previous} -> {snapshot.version}")
+            return self._snapshot
+
+    def reload_in_background(self) -> Future:
+        """Schedule a reload without blocking the caller"""
+        return self._executor.submit(self.reload)
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_watching.wait(interval):
+            try:
+                if self._stat() != self._mtimes:
+                    self.reload()
+            except Exception as e:
+                logger.error(f"Error reloading planner datasets: {e}")
+
+    def start_watcher(self, interval: float) -> None:
+        """Poll the dataset files every ``interval`` seconds and reload on change"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="dataset-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop_watching.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+# Create a singleton instance
+dataset_registry = DatasetRegistry(
+    TOURISM_DATA_FILE,
+    TRANSPORT_DATA_FILE,
+    settings.DATASET_CACHE_DIR or DEFAULT_CACHE_DIR
+)
@@ -1,14 +1,36 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
 from app.Ai.AI import PlanRequest, generate_plans
+from app.Ai.datasets import dataset_registry
+from app.core.admin_auth import require_admin_token
+from app.core.rate_limit import plans_concurrency, plans_rate_limit
+from app.db.database import get_db
+from app.services.plannerDataService import getPlannerCatalog
 
 # Initialize APIRouter for the plan-related endpoints
 plans_router = APIRouter()
 
-@plans_router.post("/preferences/")
-async def generate_plans_endpoint(plan_request: PlanRequest):
+@plans_router.post("/preferences/", dependencies=[Depends(plans_rate_limit), Depends(plans_concurrency)])
+async def generate_plans_endpoint(plan_request: PlanRequest, db: Session = Depends(get_db)):
     try:
-        return generate_plans(plan_request)
+        return generate_plans(plan_request, catalog=getPlannerCatalog(db))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+
+@plans_router.get("/datasets/version")
+async def dataset_version():
+    return {"dataset_version": dataset_registry.current.version}
+
+
+@plans_router.post("/datasets/reload", status_code=status.HTTP_202_ACCEPTED,
+                   dependencies=[Depends(require_admin_token)])
+async def reload_datasets():
+    """Rebuild the planner datasets in the background and swap them in when ready"""
+    dataset_registry.reload_in_background()
+    return {
+        "message": "Dataset reload scheduled",
+        "dataset_version": dataset_registry.current.version
+    }
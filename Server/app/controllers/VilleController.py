@@ -1,28 +1,36 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.http_cache import etag_matches
 from app.db.database import get_db
-from app.services.VilleService import getVillesService,getVilleIdByName
+from app.services.villeCatalogService import ville_catalog
 
 
 router = APIRouter()
 
+
+def cached_json(request: Request, content: bytes, etag: str, status_code: int = 200) -> Response:
+    """Pre-serialized JSON body with validators, or 304 when the client's copy is current"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.VILLES_CACHE_MAX_AGE}"
+    }
+    if status_code == 200 and etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, status_code=status_code, media_type="application/json", headers=headers)
+
+
 #GetAll()
 @router.get("/villes/")
-def get_villes(db: Session = Depends(get_db)):
-    villes = getVillesService(db)
-    return {
-        "villes": [
-            {"idVille": ville.id, "name": ville.nom, "budget": ville.budget}
-            for ville in villes
-        ]
-    }
+def get_villes(request: Request, db: Session = Depends(get_db)):
+    content, etag = ville_catalog.payload(db)
+    return cached_json(request, content, etag)
 
 #GetByName()
 @router.get("/villes/{name}/id")
-def get_ville_id(name: str, db: Session = Depends(get_db)):
-    idVille = getVilleIdByName(db, name)
-    if idVille:
-        return {"idVille": idVille}
+def get_ville_id(name: str, request: Request, db: Session = Depends(get_db)):
+    content, etag = ville_catalog.id_payload(db, name)
+    if content:
+        return cached_json(request, content, etag)
     else:
-        return {"error": "Ville not found"}, 404
-
+        return cached_json(request, b'{"error":"Ville not found"}', etag, status_code=404)
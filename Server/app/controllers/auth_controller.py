@@ -1,13 +1,16 @@
-from fastapi import Depends, status
+from fastapi import Depends, Request, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.db.models import User
 from app.schemas.user import UserCreate, UserLogin
-from app.core.security import hash_password, verify_password, create_access_token, verify_token
+from app.core.security import create_access_token
+from app.core.password_hasher import password_hasher
+from app.core.auth_context import request_claims, user_snapshots
 from app.db.database import get_db
 from datetime import timedelta
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.error_handler import error_handler
-from app.services.email_service import email_service
+from app.services.email_outbox import email_outbox, enqueue_email
 import logging
 from starlette.responses import JSONResponse
 
@@ -30,7 +33,7 @@ async def signup(user: UserCreate, db: Session):
             )
 
         # Check if user exists
-        existing_user = db.query(User).filter(User.email == user.email).first()
+        existing_user = db.query(User).filter(func.lower(User.email) == user.email.lower()).first()
         if existing_user:
             return JSONResponse(
                 status_code=status.HTTP_409_CONFLICT,
@@ -43,8 +46,8 @@ async def signup(user: UserCreate, db: Session):
                 }
             )
 
-        # Hash password
-        hashed_password = hash_password(user.password)
+        # Hash password, off the event loop
+        hashed_password = await password_hasher.hash_async(user.password)
 
         # Create user
         new_user = User(
@@ -56,19 +59,11 @@ async def signup(user: UserCreate, db: Session):
 
         try:
             db.add(new_user)
+            # Welcome email, queued in the same transaction: sent in the background once committed
+            enqueue_email(db, "welcome", new_user.email, {"name": f"{new_user.prenom} {new_user.nom}"})
             db.commit()
             db.refresh(new_user)
-
-            # Send welcome email
-            try:
-                await email_service.send_welcome_email(
-                    email=new_user.email,
-                    name=f"{new_user.prenom} {new_user.nom}"
-                )
-                logger.info(f"Welcome email sent to {new_user.email}")
-            except Exception as email_error:
-                logger.error(f"Failed to send welcome email: {str(email_error)}")
-                # Continue with registration even if email fails
+            email_outbox.notify()
 
             return {"message": "User created successfully"}
 
@@ -102,7 +97,7 @@ async def signup(user: UserCreate, db: Session):
 def signin(user: UserLogin, db: Session):
     try:
         # Check user exists
-        db_user = db.query(User).filter(User.email == user.email).first()
+        db_user = db.query(User).filter(func.lower(User.email) == user.email.lower()).first()
         if not db_user:
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -116,7 +111,8 @@ def signin(user: UserLogin, db: Session):
             )
 
         # Verify password
-        if not verify_password(user.password, db_user.password):
+        valid, new_hash = password_hasher.verify_and_update(user.password, db_user.password)
+        if not valid:
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={
@@ -128,11 +124,17 @@ def signin(user: UserLogin, db: Session):
                 }
             )
 
-        # Create token
+        # Stored with an outdated work factor: upgrade it now that we have the password
+        if new_hash:
+            db_user.password = new_hash
+            db.commit()
+
+        # Create token; sub is the stored (lowercase) email get_current_user compares against
         access_token = create_access_token(
             data={
-                "sub": user.email,
-                "id": db_user.id
+                "sub": db_user.email,
+                "id": db_user.id,
+                "epoch": db_user.token_epoch
             },
             expires_delta=timedelta(minutes=30)
         )
@@ -153,12 +155,14 @@ def signin(user: UserLogin, db: Session):
         )
 
 def get_current_user(
+        request: Request,
         credentials: HTTPAuthorizationCredentials = Depends(security),
         db: Session = Depends(get_db)
 ):
     try:
         token = credentials.credentials
-        payload = verify_token(token)
+        # Usually already verified by the validate_token middleware
+        payload = request_claims(request, token)
 
         email = payload.get("sub")
         user_id = payload.get("id")
@@ -175,12 +179,9 @@ def get_current_user(
                 }
             )
 
-        user = db.query(User).filter(
-            User.id == user_id,
-            User.email == email
-        ).first()
+        user = user_snapshots.get(db, user_id)
 
-        if not user:
+        if not user or user.email != email:
             return JSONResponse(
                 status_code=status.HTTP_404_NOT_FOUND,
                 content={
@@ -5,6 +5,7 @@ from typing import Dict
 from pydantic import BaseModel
 from app.services.chatbot_service import ChatbotService
 from app.db.database import get_db
+from app.core.rate_limit import chat_concurrency, chat_rate_limit
 from fastapi.responses import JSONResponse
 import uuid
 import logging
@@ -17,7 +18,7 @@ class ChatMessage(BaseModel):
 router = APIRouter()
 chatbot_service = ChatbotService()
 
-@router.post("")
+@router.post("", dependencies=[Depends(chat_rate_limit), Depends(chat_concurrency)])
 async def chat(
         chat_message: ChatMessage,
         db: Session = Depends(get_db)
@@ -1,15 +1,15 @@
 # app/controllers/google_auth_controller.py
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
 from app.db.models import User
 from app.core.security import create_access_token
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from app.core.google_certs import google_certs
 from app.core.config import settings
 from datetime import timedelta
 from pydantic import BaseModel
-from app.services.email_service import email_service
+from app.services.email_outbox import email_outbox, enqueue_email
 import logging
 
 # Set up logging
@@ -22,12 +22,11 @@ class GoogleAuthRequest(BaseModel):
 
 # first user connect to google acc -> google returns the token auth_request.token   the foront end send the token to ther server
 @router.post("/auth/google")
-async def google_auth(auth_request: GoogleAuthRequest, db: Session = Depends(get_db)):
+async def google_auth(auth_request: GoogleAuthRequest, db: AsyncSession = Depends(get_async_db)):
     try:
-        #Step 1: Token Verification || verify_oauth2_token() function contacts Google and says "Hey, is this token valid for my application?"
-        idinfo = id_token.verify_oauth2_token(
+        #Step 1: Token Verification || checked against Google's cached signing certs, off the event loop
+        idinfo = await google_certs.verify_async(
             auth_request.token,  # The token from Google
-            requests.Request(),  # Request object for verification
             settings.GOOGLE_CLIENT_ID   # My app's client ID
         )
 
@@ -50,7 +49,7 @@ async def google_auth(auth_request: GoogleAuthRequest, db: Session = Depends(get
         logger.info(f"Processing Google authentication for email: {email}")
 
         # Check if user exists
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(func.lower(User.email) == email.lower()))
         is_new_user = False
 
         if not user:
@@ -65,24 +64,16 @@ async def google_auth(auth_request: GoogleAuthRequest, db: Session = Depends(get
                     password=""
                 )
                 db.add(user)
-                db.commit()
-                db.refresh(user)
+                # Welcome email for new Google users, sent in the background once committed
+                enqueue_email(db, "google_welcome", user.email, {"name": f"{user.prenom} {user.nom}"})
+                await db.commit()
+                await db.refresh(user)
+                email_outbox.notify()
                 is_new_user = True
                 logger.info(f"New user created with Google authentication: {email}")
 
-                # Send welcome email for new Google users
-                try:
-                    await email_service.send_google_welcome_email(
-                        email=user.email,
-                        name=f"{user.prenom} {user.nom}"
-                    )
-                    logger.info(f"Welcome email sent successfully to: {email}")
-                except Exception as email_error:
-                    logger.error(f"Failed to send welcome email to {email}: {str(email_error)}")
-                    # Continue with registration even if email fails
-
             except Exception as db_error:
-                db.rollback()
+                await db.rollback()
                 logger.error(f"Database error during user creation: {str(db_error)}")
                 return {
                     "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -97,8 +88,9 @@ async def google_auth(auth_request: GoogleAuthRequest, db: Session = Depends(get
         try:
             access_token = create_access_token(
                 data={
-                    "sub": email,
-                    "id": user.id
+                    "sub": user.email,
+                    "id": user.id,
+                    "epoch": user.token_epoch
                 },
                 expires_delta=timedelta(minutes=30)
             )
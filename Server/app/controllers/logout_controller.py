@@ -1,11 +1,14 @@
 # app/controllers/logout_controller.py
 from fastapi import APIRouter, Depends, Response, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from app.db.database import get_db
 from app.controllers.auth_controller import get_current_user
 from app.db.models import User
+from app.db.database import get_db
+from app.services.user_service import bump_token_epoch
+from sqlalchemy.orm import Session
 from app.core.token_management import token_manager
+from app.core.auth_context import request_claims
 from app.core.error_handler import error_handler
 from typing import Dict, Optional
 from datetime import datetime,UTC
@@ -18,14 +21,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 security = HTTPBearer()
 
-async def cleanup_expired_tokens():
-    """Background task to clean up expired tokens from the blacklist"""
-    try:
-        logger.info("Running token cleanup task")
-        token_manager.clear_invalid_tokens()
-    except Exception as e:
-        logger.error(f"Error in token cleanup task: {str(e)}")
-
 def log_logout_event(user_id: int, success: bool, error: Optional[str] = None):
     """Log logout events for audit purposes"""
     try:
@@ -46,8 +41,7 @@ async def logout(
     request: Request,
     response: Response,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     try:
         # Extract token
@@ -60,8 +54,9 @@ async def logout(
 
         token = auth_header.split(' ')[1]
 
-        # Invalidate the token
-        token_manager.invalidate_token(token, current_user.id)
+        # Invalidate the token (a write to the shared revocation table)
+        claims = request_claims(request, token)
+        await run_in_threadpool(token_manager.invalidate_token, token, current_user.id, claims.get("exp"))
 
         # Clear cookies with secure flags
         response.delete_cookie(
@@ -111,18 +106,18 @@ async def logout_all_devices(
     Args:
         background_tasks: FastAPI BackgroundTasks for async operations
         current_user: Currently authenticated user
-        db: Database session
+        db: Database session, to bump the user's token epoch
 
     Returns:
         Dict with success message
     """
     try:
-        # Add current user's tokens to blacklist
-        token_manager.invalidate_all_user_tokens(current_user.id)
+        # Bump the user's token epoch: every token issued before is revoked
+        epoch = await run_in_threadpool(bump_token_epoch, db, current_user.id)
+        await run_in_threadpool(token_manager.invalidate_all_user_tokens, current_user.id, epoch)
 
         # Schedule background tasks
         background_tasks.add_task(log_logout_event, current_user.id, True, "All devices logout")
-        background_tasks.add_task(cleanup_expired_tokens)
 
         logger.info(f"User {current_user.id} logged out from all devices at {datetime.utcnow()}")
 
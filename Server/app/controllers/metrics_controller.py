@@ -0,0 +1,17 @@
+# app/controllers/metrics_controller.py
+from fastapi import APIRouter, Depends
+from app.core.admin_auth import require_admin_token
+from app.db.pool_metrics import pool_metrics
+from app.db.query_metrics import query_metrics
+
+router = APIRouter()
+
+
+# Pool internals and statement texts: operators only
+@router.get("/metrics/db", dependencies=[Depends(require_admin_token)])
+def get_db_metrics():
+    """Connection pool telemetry (checkout waits, in-use and overflow connections) and query timings"""
+    return {
+        "pools": {name: metrics.snapshot() for name, metrics in pool_metrics.items()},
+        "queries": query_metrics.snapshot()
+    }
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException,Request
+from fastapi import APIRouter, Depends, HTTPException,Request, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, root_validator, Field
 from datetime import datetime
 from typing import Optional, List
 
-from app.db.database import get_db
+from app.db.database import get_db, get_async_db, AsyncSessionLocal
+from app.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset, keyset_page
+from app.core.json_stream import stream_json_array
+from app.core.rate_limit import plans_concurrency, plans_rate_limit
 from app.controllers.auth_controller import get_current_user
 from app.services.PlansService import createPlansService
 from app.services.preferencesService import (
@@ -16,7 +22,10 @@ from app.services.UserPlanService import createUserPlanService
 from app.services.activiteService import addActivite
 from app.services.hotelService import createHotelService
 from app.services.VilleItineraireService import createVilleItineraireService
-from app.db.models import User,Villes,Activities,Hotels,Itineraires,VilleItineraire,UserPlan,Favorite,Plans
+from app.services.plannerDataService import getPlannerCatalog
+from app.services.PlanPersistenceService import persistGeneratedPlans
+from app.services.planBlobService import storePlanBlob, decodePlan, deleteOrphanPlanBlob
+from app.db.models import User,Villes,Activities,Hotels,Itineraires,VilleItineraire,UserPlan,Favorite,Plans,PlanBlob
 from app.Ai.AI import generate_plans ,PlanRequest
  
 
@@ -75,7 +84,7 @@ class PreferencesUpdate(BaseModel):
         return values
 
 
-@router.post("/preferences/")
+@router.post("/preferences/", dependencies=[Depends(plans_rate_limit), Depends(plans_concurrency)])
 def createPreference(
         preference: PreferencesCreate,
         db: Session = Depends(get_db),
@@ -112,7 +121,7 @@ def createPreference(
             userId=user_id,
         )
 
-        generated_plans = generate_plans(plan_request) 
+        generated_plans = generate_plans(plan_request, catalog=getPlannerCatalog(db))
 
 
     except ValueError as e:
@@ -121,6 +130,7 @@ def createPreference(
         print(f"Error generating plans: {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred while generating plans: {str(e)}")
 
+    persistGeneratedPlans(db=db, idPlan=newPlan.id, generated_plans=generated_plans)
     
     return {
         "message": "Preference created successfully",
@@ -135,10 +145,16 @@ def createPreference(
     }
 
 @router.get("/preferences/")
-def getAll(db: Session = Depends(get_db)):
-    preferences = getPreferencesService(db)
+def getAll(
+        cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    preferences, next_cursor = getPreferencesService(db, current_user.id, cursor, limit)
     return {
         "message": "Preferences retrieved successfully",
+        "next_cursor": next_cursor,
         "preferences": [
             {
                 "id": pref.id,
@@ -230,7 +246,7 @@ def updatePreference(id: int,preference: PreferencesUpdate,db: Session = Depends
 @router.post("/preferencesFavorites/")
 async def addTofavori(
     request: Request,  
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     
@@ -239,63 +255,129 @@ async def addTofavori(
         raise HTTPException(status_code=400, detail="Aucune donnée reçue")
 
     
-    newfav = Favorite(
-        plan_id=plan_data.get("idPlan"),  
-        favorite_data=plan_data  
-    )
-
     try:
+        # The plan body is stored once, compressed, and shared by identical favorites
+        newfav = Favorite(
+            plan_id=plan_data.get("idPlan"),  
+            blob_hash=await storePlanBlob(db, plan_data)
+        )
         db.add(newfav)
-        db.commit()
-        db.refresh(newfav)
-        return {"message": "Favorite ajouté avec succès", "data": plan_data}
+        await db.commit()
+        await db.refresh(newfav)
+        return {"message": "Favorite ajouté avec succès", "favorite_id": newfav.id, "data": plan_data}
     except Exception as e:
-        db.rollback()  
+        await db.rollback()  
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout en Favorites: {str(e)}")
 
 
+def favoriteData(row) -> dict:
+    """Plan body of a favorite row, from its blob or the legacy inline copy"""
+    return decodePlan(row.data) if row.data is not None else row.favorite_data
+
+
+def user_favorites(userId: int, *columns):
+    return (
+        select(Favorite.id, Favorite.plan_id, *columns)
+        .join(Plans)
+        .outerjoin(PlanBlob, Favorite.blob_hash == PlanBlob.hash)
+        .where(Plans.idUser == userId)
+    )
+
+
 @router.get("/preferencesFavorites/")
 async def get_favorites(
-    db: Session = Depends(get_db),
+    cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
         
-        favorites = db.query(Favorite).join(Plans).filter(Plans.idUser == current_user.id).all()
+        # Summaries only: plan bodies are neither read nor decompressed
+        result = await db.execute(keyset(user_favorites(current_user.id, PlanBlob.summary), Favorite.id, cursor, limit))
+        favorites, next_cursor = keyset_page(result.all(), limit, key=lambda fav: fav.id)
 
         
         if not favorites:
           return []
 
 
-        favorites_data = [{"favorite_id": fav.id, "plan_id": fav.plan_id, "favorite_data": fav.favorite_data} for fav in favorites]
+        # Under favorite_data, the key the list view reads; /preferencesFavorites/{id}/ has the full plan
+        favorites_data = [{"favorite_id": fav.id, "plan_id": fav.plan_id, "favorite_data": fav.summary} for fav in favorites]
 
-        return {"message": "Favoris récupérés avec succès", "data": favorites_data}
+        return {"message": "Favoris récupérés avec succès", "next_cursor": next_cursor, "data": favorites_data}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des favoris: {str(e)}")
 
 
+@router.get("/preferencesFavorites/export")
+async def export_favorites(
+    current_user: User = Depends(get_current_user)
+):
+    """Every favorite of the user, streamed: fetched and encoded one page at a time"""
+    userId = current_user.id
+
+    async def favorites():
+        # Own session: dependency sessions are closed before a streamed body is sent
+        async with AsyncSessionLocal() as db:
+            cursor = None
+            while True:
+                statement = user_favorites(userId, PlanBlob.data, Favorite.favorite_data)
+                result = await db.execute(keyset(statement, Favorite.id, cursor, MAX_PAGE_SIZE))
+                page, cursor = keyset_page(result.all(), MAX_PAGE_SIZE, key=lambda fav: fav.id)
+                for fav in page:
+                    yield {"favorite_id": fav.id, "plan_id": fav.plan_id, "favorite_data": favoriteData(fav)}
+                if cursor is None:
+                    break
+
+    return StreamingResponse(
+        stream_json_array(favorites(), {"message": "Favoris récupérés avec succès"}),
+        media_type="application/json"
+    )
+
+
+@router.get("/preferencesFavorites/{favorite_id}/")
+async def get_favorite(
+    favorite_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Full plan of one favorite"""
+    result = await db.execute(
+        user_favorites(current_user.id, PlanBlob.data, Favorite.favorite_data).where(Favorite.id == favorite_id)
+    )
+    favorite = result.first()
+    if not favorite:
+        raise HTTPException(status_code=404, detail="Favori non trouvé")
+
+    return {"favorite_id": favorite.id, "plan_id": favorite.plan_id, "favorite_data": favoriteData(favorite)}
+
+
 @router.delete("/preferencesFavorites/{favorite_id}/")
 async def delete_favorite(
     favorite_id: int,  
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
         
-        favorite = db.query(Favorite).join(Plans).filter(Favorite.id == favorite_id, Plans.idUser == current_user.id).first()
+        favorite = await db.scalar(
+            select(Favorite).join(Plans).where(Favorite.id == favorite_id, Plans.idUser == current_user.id)
+        )
 
        
         if not favorite:
             raise HTTPException(status_code=404, detail="Favori non trouvé")
 
        
-        db.delete(favorite)
-        db.commit()
+        await db.delete(favorite)
+        await db.flush()
+        await deleteOrphanPlanBlob(db, favorite.blob_hash)
+        await db.commit()
 
         return {"message": "Favori supprimé avec succès"}
 
     except Exception as e:
-        db.rollback()  
+        await db.rollback()  
         raise HTTPException(status_code=500, detail=f"Erreur lors de la suppression du favori: {str(e)}")
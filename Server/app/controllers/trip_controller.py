@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import List
 from app.services.trip_planner import TripPlannerService
+from app.core.rate_limit import plans_rate_limit, trip_concurrency
 
 router = APIRouter()
 
@@ -31,7 +32,8 @@ class TravelPlan(BaseModel):
 trip_planner_service = TripPlannerService()
 
 # Endpoint to generate trip plans
-@router.post("/generate_trip_plan", response_model=List[TravelPlan])
+@router.post("/generate_trip_plan", response_model=List[TravelPlan],
+             dependencies=[Depends(plans_rate_limit), Depends(trip_concurrency)])
 async def generate_trip_plans(request: TripPlanRequest):
     try:
         # Convert the incoming request to a dictionary and send it to the service
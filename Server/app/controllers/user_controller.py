@@ -1,14 +1,18 @@
 # app/controllers/user_controller.py
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Request
+from fastapi.responses import Response, FileResponse
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.http_cache import etag_matches
 from app.db.database import get_db
 from app.schemas.user import PasswordUpdate
 from app.schemas.user import UserUpdate, UserOut
-from app.services.user_service import update_user_profile, update_user_image, update_user_password
+from app.services.user_service import update_user_profile, update_user_image, update_user_password, get_user_image, move_user_image_to_store
+from app.services.blob_store import blob_store, BlobTooLargeError
+from app.services.thumbnails import thumbnail_service
 from app.controllers.auth_controller import get_current_user
 from app.db.models import User
-from typing import Dict, Any
+from typing import Dict, Any, Literal, Optional
 
 router = APIRouter()
 
@@ -64,9 +68,10 @@ async def update_profile_image(
                 }
             )
 
-        # Read image content
-        image_data = await image.read()
-        if len(image_data) > 5 * 1024 * 1024:  # 5MB limit
+        # Stream the upload into the blob store, stopping at the size limit
+        try:
+            image_hash = await blob_store.save_stream(image.file, settings.PROFILE_IMAGE_MAX_BYTES)
+        except BlobTooLargeError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -76,8 +81,8 @@ async def update_profile_image(
                 }
             )
 
-        # Update image in database
-        await update_user_image(db, current_user.id, image_data, content_type)
+        # Only the digest is stored in the database
+        await update_user_image(db, current_user.id, image_hash, content_type)
 
         return {
             "message": "Profile picture updated successfully",
@@ -99,24 +104,51 @@ async def update_profile_image(
 
 @router.get("/profile/image")
 async def get_profile_image(
-        current_user: User = Depends(get_current_user)
+        request: Request,
+        size: Optional[Literal["small", "medium", "large"]] = None,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
 ):
     """
-    Retrieve the current user's profile picture
+    Retrieve the current user's profile picture, or a resized variant with ?size=
     """
-    if not current_user.image:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail={
-                "message": "No profile picture found",
-                "code": "NO_PROFILE_IMAGE"
-            }
-        )
+    image_hash = current_user.image_hash
+    if not blob_store.exists(image_hash):
+        # Picture uploaded before the blob store: move it there once
+        image = get_user_image(db, current_user.id)
+        if not image:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "message": "No profile picture found",
+                    "code": "NO_PROFILE_IMAGE"
+                }
+            )
+        image_hash = await move_user_image_to_store(db, current_user.id, image.image)
+
+    path = blob_store.path_for(image_hash)
+    media_type = current_user.image_type
+    # Blobs never change, so the digest is a strong validator; clients revalidate each time
+    etag = f'"{image_hash}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if size:
+        extension = "webp" if "image/webp" in request.headers.get("accept", "") else "jpg"
+        headers["Vary"] = "Accept"
+        variant = thumbnail_service.path_for(image_hash, size, extension)
+        if variant.is_file():
+            path = variant
+            media_type = "image/webp" if extension == "webp" else "image/jpeg"
+            headers["ETag"] = etag = f'"{image_hash}-{size}.{extension}"'
+        else:
+            # Not generated yet: serve the original meanwhile
+            thumbnail_service.schedule(image_hash)
+
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    return Response(
-        content=current_user.image,
-        media_type=current_user.image_type
-    )
+    # Streamed from disk, with Range support
+    return FileResponse(path, media_type=media_type, headers=headers)
 
 
 @router.put("/password")
@@ -129,7 +161,7 @@ async def update_password(
     Update the current user's password.
     """
     try:
-        result = update_user_password(db, current_user.id, password_data)
+        result = await update_user_password(db, current_user.id, password_data)
         return result
     except HTTPException as e:
         raise e
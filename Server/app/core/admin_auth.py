@@ -0,0 +1,23 @@
+# app/core/admin_auth.py
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+
+from app.core.config import settings
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Route dependency for operator endpoints: X-Admin-Token must match DATASET_ADMIN_TOKEN.
+
+    Every admin endpoint is refused while the token is unset.
+    """
+    if not settings.DATASET_ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(
+            x_admin_token, settings.DATASET_ADMIN_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "message": "Admin token required",
+                "code": "PERMISSION_DENIED"
+            }
+        )
@@ -0,0 +1,114 @@
+# app/core/auth_context.py
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+import time
+
+from cachetools import TTLCache
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.security import verify_token
+from app.core.token_management import token_id
+from app.db.models import User
+
+
+class VerifiedTokenCache:
+    """Claims of tokens whose signature has already been checked, by token id.
+
+    Revocation is not cached here: it is checked on every request by the
+    middleware. Expiry is re-checked on every hit.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+
+    def claims(self, token: str) -> dict:
+        """Verified claims of ``token``; raises HTTPException 401 like verify_token"""
+        key = token_id(token)
+        with self._lock:
+            claims = self._cache.get(key)
+        if claims is not None:
+            exp = claims.get("exp")
+            if not exp or exp > time.time():
+                return claims
+            with self._lock:
+                self._cache.pop(key, None)
+        claims = verify_token(token)
+        with self._lock:
+            self._cache[key] = claims
+        return claims
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """The columns endpoints read from ``current_user``, detached from any session"""
+    id: int
+    nom: Optional[str]
+    prenom: Optional[str]
+    email: str
+    image_hash: Optional[str]
+    image_type: Optional[str]
+
+
+class UserSnapshotCache:
+    """Read-through cache of users by id, so authentication skips the users query.
+
+    Writers call ``invalidate`` after changing a user; other workers see the
+    change once their entry expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+
+    def get(self, db: Session, user_id: int) -> Optional[UserSnapshot]:
+        with self._lock:
+            snapshot = self._cache.get(user_id)
+        if snapshot is None:
+            row = db.execute(
+                select(User.id, User.nom, User.prenom, User.email, User.image_hash, User.image_type)
+                .where(User.id == user_id)
+            ).first()
+            if row is None:
+                return None
+            snapshot = UserSnapshot(**row._asdict())
+            with self._lock:
+                self._cache[user_id] = snapshot
+        return snapshot
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def scope_claims(scope: dict, token: str) -> dict:
+    """Verified claims of ``token``, decoded once per request and kept in the ASGI
+    scope's state (what ``request.state`` reads)"""
+    state = scope.setdefault("state", {})
+    if state.get("token") == token and state.get("claims") is not None:
+        return state["claims"]
+    claims = verified_tokens.claims(token)
+    state["token"], state["claims"] = token, claims
+    return claims
+
+
+def request_claims(request: Request, token: str) -> dict:
+    """Verified claims of the request's bearer token, decoded once per request"""
+    return scope_claims(request.scope, token)
+
+
+# Create the singleton instances
+verified_tokens = VerifiedTokenCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+user_snapshots = UserSnapshotCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
@@ -0,0 +1,75 @@
+# app/core/auth_middleware.py
+from typing import Iterable, Optional
+import logging
+
+from fastapi import HTTPException, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.auth_context import scope_claims
+from app.core.token_management import token_manager
+
+logger = logging.getLogger(__name__)
+
+
+def bearer_token(headers) -> Optional[str]:
+    """Token of the Authorization header, read straight from the raw ASGI headers"""
+    for name, value in headers:
+        if name == b"authorization":
+            # Same prefix check as before: "Bearer " exactly
+            if value[:7] == b"Bearer ":
+                return value[7:].decode("latin-1").split(" ")[0]
+            return None
+    return None
+
+
+def unauthorized(message: str, code: str, error: Optional[str] = None) -> JSONResponse:
+    detail = {"message": message, "code": code}
+    if error is not None:
+        detail["error"] = error
+    return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={"detail": detail})
+
+
+class TokenValidationMiddleware:
+    """Rejects revoked bearer tokens before the request reaches the routes.
+
+    A plain ASGI middleware: public paths and requests without a token are
+    passed through without building a Request, and responses are never
+    wrapped, so streaming bodies and background tasks behave as without it.
+    The verified claims are left in the scope state for get_current_user.
+    """
+
+    def __init__(self, app: ASGIApp, public_paths: Iterable[str] = ()):
+        self.app = app
+        self.public_paths = frozenset(public_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.public_paths:
+            await self.app(scope, receive, send)
+            return
+
+        token = bearer_token(scope["headers"])
+        if token is not None:
+            response = self.check(scope, token)
+            if response is not None:
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+    def check(self, scope: Scope, token: str) -> Optional[JSONResponse]:
+        """401 response for a revoked token, None to let the request through"""
+        try:
+            try:
+                claims = scope_claims(scope, token)
+            except HTTPException:
+                # Unverifiable: left to get_current_user on protected routes
+                claims = {}
+
+            if token_manager.is_token_invalid(token, claims):
+                return unauthorized("Token has been invalidated. Please login again.", "INVALID_TOKEN")
+            return None
+
+        except Exception as e:
+            logger.error(f"Error in token validation middleware: {str(e)}")
+            return unauthorized("Authentication failed", "AUTH_ERROR", str(e))
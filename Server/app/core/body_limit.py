@@ -0,0 +1,78 @@
+# app/core/body_limit.py
+from typing import Dict, Optional
+
+from fastapi import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Room for the multipart boundaries and part headers around an uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def content_length(headers) -> Optional[int]:
+    for name, value in headers:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def too_large() -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        content={"detail": {"message": "Request body too large", "code": "FILE_TOO_LARGE"}}
+    )
+
+
+class BodySizeLimitMiddleware:
+    """Refuses request bodies over a per-path limit before they are read.
+
+    A declared Content-Length over the limit is answered with 413 right
+    away; chunked bodies are counted as they arrive and cut off (413, the
+    app sees a disconnect) once they pass it. Without this, multipart
+    uploads are spooled whole before the route can check their size.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = dict(limits)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        length = content_length(scope["headers"])
+        if length is not None and length > limit:
+            await too_large()(scope, receive, send)
+            return
+
+        received = 0
+        started = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit and not started:
+                    rejected = True
+                    await too_large()(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            # The 413 has been sent already: whatever the app answers is dropped
+            if rejected:
+                return
+            started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
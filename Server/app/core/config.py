@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -25,6 +27,83 @@ class Settings(BaseSettings):
     MAIL_PORT: int = 587
     MAIL_SERVER: str
 
+    # Database connection pool (ignored for in-memory SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds after which a connection is replaced, before the server drops it
+    DB_POOL_RECYCLE: int = 1800
+    # Test connections on checkout so stale ones are replaced transparently
+    DB_POOL_PRE_PING: bool = True
+    # Seconds to wait for a free connection before failing
+    DB_POOL_TIMEOUT: int = 30
+
+    # Planner datasets: poll interval in seconds (0 disables the watcher)
+    DATASET_WATCH_INTERVAL: int = 30
+    # Token (X-Admin-Token) for the admin endpoints: dataset reload, /metrics/db (disabled when unset)
+    DATASET_ADMIN_TOKEN: Optional[str] = None
+    # Where compiled (memory-mapped) datasets are written; shared by all workers
+    DATASET_CACHE_DIR: Optional[str] = None
+    # Where the planner reads hotels/activities: "dataset" (compiled files) or "database"
+    PLANNER_DATA_SOURCE: str = "dataset"
+
+    # Seconds the in-process villes catalog (and clients, via Cache-Control) may be reused
+    VILLES_CACHE_MAX_AGE: int = 300
+
+    # Content-addressed store for uploaded files (profile images)
+    BLOB_STORE_DIR: str = "storage/blobs"
+    PROFILE_IMAGE_MAX_BYTES: int = 5 * 1024 * 1024
+    # Worker processes resizing profile pictures
+    THUMBNAIL_WORKERS: int = 2
+
+    # SQL instrumentation: queries slower than this (ms) are logged (0 disables)
+    SLOW_QUERY_MS: float = 200
+    # Log the plan of slow SELECTs too; runs an extra EXPLAIN, for debugging only
+    SQL_EXPLAIN_SLOW_QUERIES: bool = False
+    # Fraction of statements logged with their timing (0 disables tracing)
+    SQL_TRACE_SAMPLE_RATE: float = 0.0
+    # Upper bound, in seconds, on an access token's lifetime; logout-all markers are kept this long
+    ACCESS_TOKEN_MAX_LIFETIME: int = 24 * 3600
+    # Seconds between sweeps of expired revoked tokens
+    TOKEN_SWEEP_INTERVAL: float = 60
+    # Where revocations are shared between workers: "database" or "memory" (single worker)
+    TOKEN_REVOCATION_BACKEND: str = "database"
+    # Seconds between fetches of revocations made by other workers
+    TOKEN_REVOCATION_REFRESH_INTERVAL: float = 1.0
+    # Verified token claims kept per worker, so signatures are checked once per token
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL: int = 300
+    # Users kept per worker for authentication; other workers see profile edits after the TTL
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 30
+    # bcrypt work factor; hashes with another cost are rehashed on login
+    PASSWORD_HASH_ROUNDS: int = 12
+    # Threads hashing passwords concurrently (bcrypt releases the GIL)
+    PASSWORD_HASH_WORKERS: int = 4
+    # Rate limits on the LLM endpoints, per user (or IP when anonymous)
+    # "memory" (per worker) or "sqlite" (shared by the workers of a host, in RATE_LIMIT_SQLITE_PATH)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "storage/rate_limits.db"
+    PLANS_RATE_PER_MINUTE: float = 5
+    PLANS_RATE_BURST: int = 3
+    CHAT_RATE_PER_MINUTE: float = 20
+    CHAT_RATE_BURST: int = 10
+    # Peers whose X-Forwarded-For names the client of anonymous requests: comma-separated IPs/CIDRs, or "*".
+    # Loopback only by default; deployments add their load balancer's range (see .env.example)
+    TRUSTED_PROXIES: str = "127.0.0.1,::1"
+    # Requests in flight per LLM endpoint and worker; more are refused with 503
+    PLANS_MAX_CONCURRENT: int = 4
+    CHAT_MAX_CONCURRENT: int = 8
+    # Email outbox: seconds between polls when no signup wakes the sender
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 5
+    # Emails sent per minute, in bursts of up to EMAIL_RATE_BURST
+    EMAIL_RATE_PER_MINUTE: float = 30
+    EMAIL_RATE_BURST: int = 5
+    # Attempts before an email is marked failed; retries back off from EMAIL_RETRY_BASE_DELAY seconds
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_RETRY_BASE_DELAY: float = 30
+    # Seconds the SMTP connection may stay idle before it is closed
+    EMAIL_SMTP_IDLE_TIMEOUT: float = 60
+
     class Config:
         env_file = ".env"
 
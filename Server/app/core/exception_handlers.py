@@ -5,6 +5,8 @@ from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError, HTTPException
 import logging
 
+from app.core.rate_limit import RateLimitExceeded
+
 logger = logging.getLogger(__name__)
 
 
@@ -65,6 +67,24 @@ async def http_exception_handler(request: Request, exc: HTTPException) -> JSONRe
     )
 
 
+async def rate_limit_exception_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+    """
+    Handle rate limit and concurrency cap rejections, telling the client when to retry
+    """
+    logger.warning(f"Rate limited: {request.url.path} ({exc.code})")
+
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "detail": {
+                "message": exc.message,
+                "code": exc.code
+            }
+        },
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 async def generic_exception_handler(request: Request, exc: Exception) -> JSONResponse:
     """
     Handle generic exceptions
@@ -0,0 +1,152 @@
+# app/core/google_certs.py
+from typing import Callable, Dict, Optional, Tuple
+import logging
+import re
+import threading
+import time
+
+import requests
+from fastapi.concurrency import run_in_threadpool
+from google.auth import exceptions, jwt
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+# Used when the response carries no max-age
+DEFAULT_MAX_AGE = 3600
+# Refresh this long before the certs expire, so requests never wait for a fetch
+REFRESH_MARGIN = 300
+# Wait between attempts when a background refresh fails
+RETRY_DELAY = 30
+# A token signed with an unknown key forces a refetch at most this often
+UNKNOWN_KEY_REFETCH_INTERVAL = 60
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+# (key id -> PEM certificate, seconds they may be cached)
+CertsFetch = Callable[[], Tuple[Dict[str, str], int]]
+
+
+def max_age(cache_control: Optional[str]) -> int:
+    match = MAX_AGE.search(cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+
+# Keeps the connection to Google open between refreshes
+_http = requests.Session()
+
+
+def fetch_google_certs(url: str = GOOGLE_CERTS_URL) -> Tuple[Dict[str, str], int]:
+    """Download Google's signing certificates"""
+    response = _http.get(url, timeout=10)
+    response.raise_for_status()
+    return response.json(), max_age(response.headers.get("Cache-Control"))
+
+
+class GoogleCertCache:
+    """Google's ID-token signing certificates, kept for as long as Google allows.
+
+    The certs are fetched once and cached for the response's max-age. A
+    background thread refreshes them shortly before they expire, so a Google
+    login verifies its token locally, with no network round trip. Verification
+    runs in the threadpool, off the event loop.
+    """
+
+    def __init__(self, fetch: CertsFetch = fetch_google_certs):
+        self.fetch = fetch
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._last_forced = 0.0
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_refreshing = threading.Event()
+
+    def refresh(self) -> Dict[str, str]:
+        """Fetch the certs now and reset their expiry from max-age"""
+        certs, seconds = self.fetch()
+        with self._lock:
+            self._certs = certs
+            self._expires_at = time.monotonic() + seconds
+        logger.info(f"Google certificates refreshed ({len(certs)} keys, max-age {seconds}s)")
+        return certs
+
+    def certs(self) -> Dict[str, str]:
+        """Cached certs; fetched only when missing or past their max-age"""
+        with self._lock:
+            if self._certs and time.monotonic() < self._expires_at:
+                return self._certs
+        try:
+            return self.refresh()
+        except Exception as e:
+            # Stale keys beat no keys: Google rotates them well after announcing
+            if not self._certs:
+                raise
+            logger.error(f"Google certificates refresh failed, using the cached ones: {e}")
+            with self._lock:
+                # Do not retry on every login while Google is unreachable
+                self._expires_at = time.monotonic() + RETRY_DELAY
+            return self._certs
+
+    def _refresh_for_unknown_key(self) -> bool:
+        """Refetch after a token names a key we do not have (rotation); rate-limited"""
+        with self._lock:
+            if time.monotonic() - self._last_forced < UNKNOWN_KEY_REFETCH_INTERVAL:
+                return False
+            self._last_forced = time.monotonic()
+        self.refresh()
+        return True
+
+    def verify(self, token: str, audience: str) -> dict:
+        """Claims of a Google ID token, like google.oauth2.id_token.verify_oauth2_token"""
+        try:
+            claims = jwt.decode(token, certs=self.certs(), audience=audience)
+        except ValueError as e:
+            if "key id" not in str(e) or not self._refresh_for_unknown_key():
+                raise
+            claims = jwt.decode(token, certs=self._certs, audience=audience)
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise exceptions.GoogleAuthError(
+                f"Wrong issuer. 'iss' should be one of the following: {GOOGLE_ISSUERS}"
+            )
+        return claims
+
+    async def verify_async(self, token: str, audience: str) -> dict:
+        return await run_in_threadpool(self.verify, token, audience)
+
+    def _refresh_loop(self) -> None:
+        while True:
+            with self._lock:
+                remaining = self._expires_at - time.monotonic()
+            # Short max-ages are refreshed halfway through
+            delay = max(remaining - min(REFRESH_MARGIN, remaining / 2), 1)
+            if self._stop_refreshing.wait(delay):
+                return
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing Google certificates: {e}")
+                if self._stop_refreshing.wait(RETRY_DELAY):
+                    return
+
+    def start_refresher(self) -> None:
+        """Fetch the certs now, then keep them fresh in the background"""
+        if self._refresher and self._refresher.is_alive():
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error fetching Google certificates: {e}")
+        self._stop_refreshing.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name="google-certs", daemon=True)
+        self._refresher.start()
+
+    def stop_refresher(self) -> None:
+        self._stop_refreshing.set()
+        if self._refresher:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+
+# Create a singleton instance
+google_certs = GoogleCertCache()
@@ -0,0 +1,20 @@
+# app/core/json_stream.py
+import json
+from typing import Any, AsyncIterable, AsyncIterator
+
+
+async def stream_json_array(items: AsyncIterable[Any], envelope: dict = None, key: str = "data") -> AsyncIterator[bytes]:
+    """Encode ``{**envelope, key: [items...]}`` one item at a time.
+
+    Only the current item is held in memory, so the size of an export doesn't
+    bound the memory of the worker serving it.
+    """
+    head = json.dumps({**(envelope or {}), key: []}, ensure_ascii=False, default=str)
+    # Split the encoded envelope around the (empty) list
+    opening, closing = head.rsplit("[]", 1)
+    yield (opening + "[").encode()
+    first = True
+    async for item in items:
+        yield (("" if first else ",") + json.dumps(item, ensure_ascii=False, default=str)).encode()
+        first = False
+    yield ("]" + closing).encode()
@@ -0,0 +1,76 @@
+# app/core/password_hasher.py
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional, Tuple
+import asyncio
+import logging
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """bcrypt hashing in a bounded thread pool.
+
+    bcrypt releases the GIL, so a few threads use as many cores without
+    starving the event loop or the request threadpool: at most ``workers``
+    hashes run at once and the rest queue. Hashes made with another work
+    factor than ``rounds`` are reported by ``verify_and_update`` so they can be
+    rehashed on login.
+    """
+
+    def __init__(self, rounds: int, workers: int):
+        self.rounds = rounds
+        self.workers = workers
+        # min = max = default: any other cost, lower or higher, needs a rehash
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    # Blocking calls, for sync routes (already off the event loop)
+
+    def hash(self, password: str) -> str:
+        return self._pool().submit(self.context.hash, password).result()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._pool().submit(self.context.verify, password, hashed).result()
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new hash); the new hash is None unless the stored one uses outdated parameters"""
+        return self._pool().submit(self.context.verify_and_update, password, hashed).result()
+
+    # Awaitable calls, for async routes
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._pool().submit(self.context.hash, password))
+
+    async def verify_async(self, password: str, hashed: str) -> bool:
+        return await asyncio.wrap_future(self._pool().submit(self.context.verify, password, hashed))
+
+    async def verify_and_update_async(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self._pool().submit(self.context.verify_and_update, password, hashed))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Create a singleton instance
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_ROUNDS, settings.PASSWORD_HASH_WORKERS)
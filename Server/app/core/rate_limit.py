@@ -0,0 +1,210 @@
+# app/core/rate_limit.py
+from pathlib import Path
+from threading import Lock, local
+from typing import Optional, Sequence, Tuple
+import ipaddress
+import math
+import random
+import sqlite3
+import time
+
+from cachetools import TTLCache
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+# Tokens left in a bucket, and when it was last updated (Unix time)
+BucketState = Tuple[float, float]
+
+
+class RateLimitExceeded(Exception):
+    """Answered with ``status_code`` and a Retry-After header (see exception_handlers)"""
+
+    def __init__(self, status_code: int, retry_after: float, code: str, message: str):
+        self.status_code = status_code
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.code = code
+        self.message = message
+
+
+def take_token(state: Optional[BucketState], rate: float, capacity: float, now: float) -> Tuple[bool, float, BucketState]:
+    """Token bucket step: (allowed, seconds until a token is available, new state)"""
+    tokens, updated = state if state is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return True, 0.0, (tokens - 1, now)
+    return False, (1 - tokens) / rate, (tokens, now)
+
+
+class MemoryBucketStore:
+    """Buckets of this worker only. An idle bucket refills completely after
+    ``ttl`` seconds, so it is then simply forgotten"""
+
+    blocking = False
+
+    def __init__(self, ttl: float, maxsize: int = 100_000):
+        self._buckets = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = Lock()
+
+    def take(self, key: str, rate: float, capacity: float) -> Tuple[bool, float]:
+        with self._lock:
+            allowed, retry_after, self._buckets[key] = take_token(self._buckets.get(key), rate, capacity, time.time())
+        return allowed, retry_after
+
+
+class SqliteBucketStore:
+    """Buckets in a SQLite file, shared by every worker of the host"""
+
+    blocking = True
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._local = local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.connection = connection
+        return connection
+
+    def take(self, key: str, rate: float, capacity: float) -> Tuple[bool, float]:
+        connection = self._connection()
+        now = time.time()
+        # IMMEDIATE: the read-modify-write is serialized across processes
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            allowed, retry_after, (tokens, updated) = take_token(row, rate, capacity, now)
+            connection.execute(
+                "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, updated),
+            )
+            if random.random() < 0.001:
+                # Buckets idle for ttl are full again: same as no row
+                connection.execute("DELETE FROM buckets WHERE updated < ?", (now - self.ttl,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+
+# None: every peer is trusted ("*")
+Networks = Optional[Tuple[ipaddress._BaseNetwork, ...]]
+
+
+def trusted_networks(spec: str) -> Networks:
+    """Parse TRUSTED_PROXIES: "*", or comma-separated addresses and CIDR ranges"""
+    if spec.strip() == "*":
+        return None
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in spec.split(",") if item.strip())
+
+
+def is_trusted(address: str, networks: Networks) -> bool:
+    if networks is None:
+        return True
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def forwarded_client(peer: str, forwarded_for: Sequence[str], networks: Networks) -> str:
+    """The client address behind our proxies.
+
+    X-Forwarded-For is only believed when the connection comes from a trusted
+    proxy. Each proxy appends the address it received the request from, so
+    the rightmost untrusted entry is the client; entries left of it are
+    whatever the client chose to send.
+    """
+    if not is_trusted(peer, networks):
+        return peer
+    hops = [hop.strip() for header in forwarded_for for hop in header.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted(hop, networks):
+            return hop
+    return hops[0] if hops else peer
+
+
+def client_key(request: Request) -> str:
+    """The authenticated user, or the client address for anonymous requests.
+
+    Anonymous clients are told apart by X-Forwarded-For when the request comes
+    through TRUSTED_PROXIES (Render's load balancer, nginx...); otherwise every
+    client behind the proxy would share the proxy's bucket.
+    """
+    claims = getattr(request.state, "claims", None)
+    if claims and claims.get("id"):
+        return f"user:{claims['id']}"
+    if request.client is None:
+        return "ip:unknown"
+    return f"ip:{forwarded_client(request.client.host, request.headers.getlist('x-forwarded-for'), TRUSTED_PROXIES)}"
+
+
+class RateLimiter:
+    """Route dependency: ``per_minute`` requests per client, in bursts of up to ``burst``"""
+
+    def __init__(self, name: str, per_minute: float, burst: int, backend: str = "memory"):
+        self.name = name
+        self.rate = per_minute / 60
+        self.capacity = burst
+        ttl = burst / self.rate
+        if backend == "sqlite":
+            self.store = SqliteBucketStore(settings.RATE_LIMIT_SQLITE_PATH, ttl)
+        elif backend == "memory":
+            self.store = MemoryBucketStore(ttl)
+        else:
+            raise ValueError(f"Unknown rate limit backend: {backend}")
+
+    async def __call__(self, request: Request) -> None:
+        key = f"{self.name}:{client_key(request)}"
+        if self.store.blocking:
+            allowed, retry_after = await run_in_threadpool(self.store.take, key, self.rate, self.capacity)
+        else:
+            allowed, retry_after = self.store.take(key, self.rate, self.capacity)
+        if not allowed:
+            raise RateLimitExceeded(429, retry_after, "RATE_LIMITED", "Too many requests, please retry later")
+
+
+class ConcurrencyLimit:
+    """Route dependency capping the requests of an endpoint in flight on this worker.
+
+    Requests beyond ``limit`` are refused at once with 503 rather than queued,
+    so a burst cannot pile up calls to the LLM provider.
+    """
+
+    def __init__(self, name: str, limit: int, retry_after: float = 5):
+        self.name = name
+        self.limit = limit
+        self.retry_after = retry_after
+        self.active = 0
+
+    async def __call__(self):
+        # Runs on the event loop: no lock needed around the counter
+        if self.active >= self.limit:
+            raise RateLimitExceeded(503, self.retry_after, "SERVICE_BUSY", "Service is busy, please retry later")
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+
+TRUSTED_PROXIES = trusted_networks(settings.TRUSTED_PROXIES)
+
+# One limiter and concurrency cap per LLM-backed endpoint family
+plans_rate_limit = RateLimiter("plans", settings.PLANS_RATE_PER_MINUTE, settings.PLANS_RATE_BURST, settings.RATE_LIMIT_BACKEND)
+chat_rate_limit = RateLimiter("chat", settings.CHAT_RATE_PER_MINUTE, settings.CHAT_RATE_BURST, settings.RATE_LIMIT_BACKEND)
+plans_concurrency = ConcurrencyLimit("plans", settings.PLANS_MAX_CONCURRENT)
+trip_concurrency = ConcurrencyLimit("trip", settings.PLANS_MAX_CONCURRENT)
+chat_concurrency = ConcurrencyLimit("chat", settings.CHAT_MAX_CONCURRENT)
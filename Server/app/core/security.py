@@ -1,22 +1,21 @@
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from app.core.config import settings
 from typing import Union
 from fastapi import HTTPException, status
+from app.core.password_hasher import password_hasher
 
-# Initialize password context and secret key for JWT
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Secret key for JWT; passwords are hashed by password_hasher, in its own pool
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None) -> str:
@@ -31,7 +30,12 @@ def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None
         )
     to_encode.update({"id": user_id})
 
+    # users.token_epoch at issue time; logout-all bumps it to revoke this token
+    to_encode.update({"epoch": data.get("epoch", 0)})
+
     if expires_delta:
+        # Logout-all markers only outlive tokens up to this bound
+        expires_delta = min(expires_delta, timedelta(seconds=settings.ACCESS_TOKEN_MAX_LIFETIME))
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(hours=1)
@@ -1,67 +1,187 @@
-from typing import Set, Dict
-from datetime import datetime, UTC
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import heapq
 import logging
 import threading
+import time
 from jose import jwt
 from app.core.config import settings
+from app.core.token_revocation import RevocationBackend, MemoryRevocationBackend, revocation_backend
 
 logger = logging.getLogger(__name__)
 
+# Seqs re-read on every refresh: a concurrent logout may commit a lower seq
+# after a higher one has already been seen
+REFRESH_OVERLAP = 100
+
+
+def token_id(token: str) -> bytes:
+    """Compact, fixed-size key for a token (16-byte BLAKE2b digest)"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def epoch_marker_id(user_id: int, epoch: int) -> bytes:
+    """Key of a logout-all marker; never equal to a token's id"""
+    return token_id(f"epoch:{user_id}:{epoch}")
+
+
+def token_claims(token: str) -> dict:
+    """Claims of a token without verifying it, or {} when it cannot be read"""
+    try:
+        return jwt.get_unverified_claims(token)
+    except Exception as e:
+        logger.error(f"Error reading token claims: {e}")
+        return {}
+
 
 class TokenManager:
-    def __init__(self):
-        self._invalid_tokens: Set[str] = set()
-        self._user_tokens: Dict[int, Set[str]] = {}
+    """Revoked tokens, kept only until they would have expired anyway.
+
+    Logout-all does not list tokens: it records a marker with the user's new
+    token epoch, and every token carrying an older epoch is rejected.
+    Revocations are written to a shared backend and mirrored in a local dict
+    keyed by ``token_id``, which a background thread keeps in sync by
+    fetching only the rows past the last seq seen. A min-heap orders entries
+    by expiry so pruning only ever touches expired ones. Writes take the
+    lock; reads are a single dict lookup without it (atomic under the GIL),
+    so the per-request check in the middleware never waits on the backend.
+    """
+
+    def __init__(self, backend: Optional[RevocationBackend] = None):
+        self.backend = backend if backend is not None else MemoryRevocationBackend()
+        self._revoked: Dict[bytes, float] = {}
+        # user id -> lowest token epoch still accepted, from logout-all markers
+        self._epochs: Dict[int, int] = {}
+        self._expiry_heap: List[Tuple[float, bytes, Optional[int], Optional[int]]] = []
+        self._seq = 0
         self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeping = threading.Event()
 
-    def _extract_token_expiry(self, token: str) -> datetime:
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            exp = payload.get('exp')
-            if exp:
-                return datetime.fromtimestamp(exp, UTC)
-        except Exception as e:
-            logger.error(f"Error extracting token expiry: {e}")
-        return datetime.now(UTC)
+    def _extract_token_expiry(self, token: str) -> float:
+        """Expiry timestamp of a token that has already been verified by the caller"""
+        exp = token_claims(token).get('exp')
+        if exp:
+            return float(exp)
+        # Unknown expiry: keep it as long as a token can live
+        return time.time() + settings.ACCESS_TOKEN_MAX_LIFETIME
 
-    def invalidate_token(self, token: str, user_id: int = None) -> None:
-        """Invalidate a token and store it with its expiry time"""
+    def _record(self, tid: bytes, user_id: Optional[int], exp: float, epoch: Optional[int] = None) -> None:
+        """Add a revocation or logout-all marker to the local view; the caller holds the lock"""
+        if tid in self._revoked:
+            return
+        heapq.heappush(self._expiry_heap, (exp, tid, user_id, epoch))
+        self._revoked[tid] = exp
+        if epoch is not None and epoch > self._epochs.get(user_id, 0):
+            self._epochs[user_id] = epoch
+
+    def _prune(self, now: float) -> int:
+        """Drop expired revocations; the caller holds the lock"""
+        pruned = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, tid, user_id, epoch = heapq.heappop(self._expiry_heap)
+            self._revoked.pop(tid, None)
+            # Every token older than the marker has expired by now
+            if epoch is not None and self._epochs.get(user_id) == epoch:
+                del self._epochs[user_id]
+            pruned += 1
+        return pruned
+
+    def invalidate_token(self, token: str, user_id: int = None, expires_at: float = None) -> None:
+        """Invalidate a token on every worker until its expiry time"""
+        exp = expires_at if expires_at is not None else self._extract_token_expiry(token)
+        tid = token_id(token)
+        self.backend.add(tid, user_id, exp)
         with self._lock:
-            self._invalid_tokens.add(token)
-            if user_id:
-                if user_id not in self._user_tokens:
-                    self._user_tokens[user_id] = set()
-                self._user_tokens[user_id].add(token)
+            self._prune(time.time())
+            self._record(tid, user_id, exp)
             logger.info(f"Token invalidated for user {user_id}")
 
-    def is_token_invalid(self, token: str) -> bool:
-        """Check if a token is in the invalid tokens set"""
+    def is_token_invalid(self, token: str, claims: Optional[dict] = None) -> bool:
+        """Check if a token has been invalidated, alone or by a logout-all (lock-free)"""
+        exp = self._revoked.get(token_id(token))
+        if exp is not None and exp > time.time():
+            return True
+        if not self._epochs:
+            return False
+        if claims is None:
+            claims = token_claims(token)
+        return self.is_epoch_revoked(claims.get("id"), claims.get("epoch", 0))
+
+    def is_epoch_revoked(self, user_id: Optional[int], epoch: int) -> bool:
+        """Whether tokens of ``user_id`` issued at ``epoch`` predate a logout-all"""
+        return epoch < self._epochs.get(user_id, 0)
+
+    def refresh(self) -> int:
+        """Pull revocations made by other workers since the last refresh"""
+        now = time.time()
+        rows = self.backend.changes_since(max(self._seq - REFRESH_OVERLAP, 0), now)
+        added = 0
         with self._lock:
-            return token in self._invalid_tokens
+            for seq, tid, user_id, exp, epoch in rows:
+                if tid not in self._revoked:
+                    added += 1
+                self._record(tid, user_id, exp, epoch)
+                self._seq = max(self._seq, seq)
+        return added
 
-    def clear_invalid_tokens(self) -> None:
-        """Clear expired tokens from the invalid tokens set"""
-        current_time = datetime.now(UTC)
+    def clear_invalid_tokens(self) -> int:
+        """Clear expired tokens from the revocation store"""
+        now = time.time()
         with self._lock:
-            valid_tokens = set()
-            for token in self._invalid_tokens:
-                try:
-                    expiry = self._extract_token_expiry(token)
-                    if expiry > current_time:
-                        valid_tokens.add(token)
-                except Exception:
-                    continue
-            self._invalid_tokens = valid_tokens
-            logger.info("Expired tokens cleared")
-
-    def invalidate_all_user_tokens(self, user_id: int) -> None:
-        """Invalidate all tokens for a specific user"""
+            pruned = self._prune(now)
+        self.backend.prune(now)
+        if pruned:
+            logger.info(f"{pruned} expired tokens cleared")
+        return pruned
+
+    def invalidate_all_user_tokens(self, user_id: int, epoch: int) -> None:
+        """Revoke every token of a user issued before ``epoch`` (their bumped users.token_epoch)"""
+        # Tokens issued before the bump expire within ACCESS_TOKEN_MAX_LIFETIME
+        exp = time.time() + settings.ACCESS_TOKEN_MAX_LIFETIME
+        tid = epoch_marker_id(user_id, epoch)
+        self.backend.add(tid, user_id, exp, epoch)
         with self._lock:
-            if user_id in self._user_tokens:
-                for token in self._user_tokens[user_id]:
-                    self._invalid_tokens.add(token)
-                logger.info(f"All tokens invalidated for user {user_id}")
+            self._record(tid, user_id, exp, epoch)
+        logger.info(f"All tokens invalidated for user {user_id}")
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def _sync(self, refresh_interval: float, sweep_interval: float) -> None:
+        last_sweep = time.monotonic()
+        while not self._stop_sweeping.wait(refresh_interval):
+            try:
+                self.refresh()
+                if time.monotonic() - last_sweep >= sweep_interval:
+                    last_sweep = time.monotonic()
+                    self.clear_invalid_tokens()
+            except Exception as e:
+                logger.error(f"Error syncing revoked tokens: {e}")
+
+    def start_sweeper(self, sweep_interval: float, refresh_interval: Optional[float] = None) -> None:
+        """Load the shared revocations, then keep them in sync and pruned in the background"""
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error loading revoked tokens: {e}")
+        self._stop_sweeping.clear()
+        self._sweeper = threading.Thread(
+            target=self._sync,
+            args=(refresh_interval or sweep_interval, sweep_interval),
+            name="token-sweeper",
+            daemon=True,
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop_sweeping.set()
+        if self._sweeper:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
 
 
 # Create a singleton instance
-token_manager = TokenManager()
\ No newline at end of file
+token_manager = TokenManager(revocation_backend(settings.TOKEN_REVOCATION_BACKEND))
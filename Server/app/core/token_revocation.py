@@ -0,0 +1,124 @@
+# app/core/token_revocation.py
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+import bisect
+import heapq
+import threading
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from app.db.database import SessionLocal
+from app.db.models import RevokedToken
+
+# (seq, token id, user id, expiry timestamp, epoch); epoch is set on logout-all
+# markers, which revoke every token of the user issued before that epoch
+Revocation = Tuple[int, bytes, Optional[int], float, Optional[int]]
+
+
+class RevocationBackend(ABC):
+    """Where revocations are shared between workers.
+
+    ``add`` records a revocation, ``changes_since`` returns the live ones with
+    a seq greater than the given one, in seq order, and ``prune`` drops the
+    expired ones.
+    """
+
+    @abstractmethod
+    def add(self, tid: bytes, user_id: Optional[int], expires_at: float, epoch: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    def changes_since(self, seq: int, now: float) -> List[Revocation]:
+        ...
+
+    @abstractmethod
+    def prune(self, now: float) -> int:
+        ...
+
+
+class MemoryRevocationBackend(RevocationBackend):
+    """Process-local backend, for a single worker and for tests.
+
+    Rows are kept in seq order, indexed by token id (duplicates) and by
+    expiry (pruning), so no operation walks every revocation.
+    """
+
+    def __init__(self):
+        self._rows: List[Revocation] = []
+        self._by_tid: Dict[bytes, Revocation] = {}
+        # (expiry, seq) of every row, soonest expiry first
+        self._expiries: List[Tuple[float, int]] = []
+        # Never reused, even once the newest rows are pruned, so readers miss nothing
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def add(self, tid, user_id, expires_at, epoch=None):
+        with self._lock:
+            if tid in self._by_tid:
+                return
+            self._seq += 1
+            seq = self._seq
+            row = (seq, tid, user_id, expires_at, epoch)
+            self._rows.append(row)
+            self._by_tid[tid] = row
+            heapq.heappush(self._expiries, (expires_at, seq))
+
+    def changes_since(self, seq, now):
+        with self._lock:
+            start = bisect.bisect_right(self._rows, seq, key=lambda row: row[0])
+            return [row for row in self._rows[start:] if row[3] > now]
+
+    def prune(self, now):
+        with self._lock:
+            expired = set()
+            while self._expiries and self._expiries[0][0] <= now:
+                expired.add(heapq.heappop(self._expiries)[1])
+            if not expired:
+                return 0
+            live = []
+            for row in self._rows:
+                if row[0] in expired:
+                    self._by_tid.pop(row[1], None)
+                else:
+                    live.append(row)
+            self._rows = live
+        return len(expired)
+
+
+class DatabaseRevocationBackend(RevocationBackend):
+    """Revocations in the ``revoked_tokens`` table, seen by every worker and pod"""
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def add(self, tid, user_id, expires_at, epoch=None):
+        with self.session_factory() as db:
+            try:
+                db.execute(insert(RevokedToken).values(token_id=tid, user_id=user_id, expires_at=expires_at, epoch=epoch))
+                db.commit()
+            except IntegrityError:
+                # Already revoked, by another worker or an earlier logout
+                db.rollback()
+
+    def changes_since(self, seq, now):
+        with self.session_factory() as db:
+            rows = db.execute(
+                select(RevokedToken.seq, RevokedToken.token_id, RevokedToken.user_id, RevokedToken.expires_at, RevokedToken.epoch)
+                .where(RevokedToken.seq > seq, RevokedToken.expires_at > now)
+                .order_by(RevokedToken.seq)
+            )
+            return [tuple(row) for row in rows]
+
+    def prune(self, now):
+        with self.session_factory() as db:
+            result = db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            db.commit()
+            return result.rowcount
+
+
+def revocation_backend(name: str) -> RevocationBackend:
+    """Backend named by the TOKEN_REVOCATION_BACKEND setting"""
+    if name == "memory":
+        return MemoryRevocationBackend()
+    if name == "database":
+        return DatabaseRevocationBackend()
+    raise ValueError(f"Unknown token revocation backend: {name}")
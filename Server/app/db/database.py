@@ -1,17 +1,43 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
 import os
 
+from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, instrumented_pool_class, pool_metrics
+from app.db.query_metrics import query_metrics
+
 # Charger les variables d'environnement depuis le fichier .env
 load_dotenv()
 
 # Récupérer l'URL de la base de données depuis les variables d'environnement
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
+
+def pool_options(url: str, metrics: PoolMetrics, pool_class=QueuePool) -> dict:
+    """Pool arguments for ``create_engine`` from the DB_POOL_* settings"""
+    url = make_url(url)
+    # SQLite en mémoire : une seule connexion partagée, pas de pool à régler
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(pool_class, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
 # Configuration SQLAlchemy
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options(SQLALCHEMY_DATABASE_URL, pool_metrics["sync"]))
+pool_metrics["sync"].attach(engine)
+query_metrics.attach(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -21,3 +47,37 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Pilotes asynchrones équivalents aux pilotes synchrones
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Same database as ``url``, through its asyncio driver"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    # asyncpg spells libpq's sslmode as ssl
+    if backend == "postgresql" and "sslmode" in url.query:
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": url.query["sslmode"]})
+    return url.render_as_string(hide_password=False)
+
+
+# Configuration SQLAlchemy asynchrone, pour les routes async def
+async_engine = create_async_engine(
+    async_database_url(SQLALCHEMY_DATABASE_URL),
+    **pool_options(SQLALCHEMY_DATABASE_URL, pool_metrics["async"], AsyncAdaptedQueuePool)
+)
+pool_metrics["async"].attach(async_engine.sync_engine)
+query_metrics.attach(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,136 @@
+# app/db/ingest_tourism.py
+"""Bulk-load the tourism dataset into the villes / hotels / activities tables.
+
+Usage: python -m app.db.ingest_tourism [--file PATH] [--batch-size N]
+
+Everything is written in a single transaction: missing cities are created,
+new hotels/activities are inserted in batches and changed prices are
+updated in bulk by primary key. Re-running the command is idempotent.
+
+The same transaction bumps the planner data generation, which the API
+workers' caches are keyed by: they serve the new data within
+plannerDataService.GENERATION_CHECK_SECONDS, without a restart.
+"""
+import argparse
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+import pandas as pd
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.Ai.datasets import TOURISM_DATA_FILE
+from app.db.database import Base, SessionLocal, engine
+from app.db.models import Activities, DataGeneration, Hotels, Villes
+from app.services.plannerDataService import bumpPlannerGeneration, invalidatePlannerCache
+from app.services.VilleService import getOrCreateVilleIds
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 'Type de donnée' -> table
+DATA_TYPES = {
+    "Hôtel": Hotels,
+    "Activité": Activities,
+}
+
+
+def _batches(rows: List[dict], size: int) -> Iterable[List[dict]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _upsert(db: Session, model, rows: List[dict], batch_size: int) -> Tuple[int, int]:
+    """Insert rows missing from ``model`` and update changed prices, keyed by (idVille, nom)"""
+    existing = {
+        (row.idVille, row.nom): (row.id, row.cout)
+        for row in db.execute(
+            select(model.id, model.idVille, model.nom, model.cout)
+            .where(model.idVille.in_({row["idVille"] for row in rows}))
+        )
+    }
+
+    new_rows, changed = [], []
+    for row in rows:
+        match = existing.get((row["idVille"], row["nom"]))
+        if match is None:
+            new_rows.append(row)
+        elif match[1] != row["cout"]:
+            changed.append({"id": match[0], "cout": row["cout"]})
+
+    for batch in _batches(new_rows, batch_size):
+        db.execute(insert(model), batch)
+    for batch in _batches(changed, batch_size):
+        db.execute(update(model), batch)
+    return len(new_rows), len(changed)
+
+
+def ingest_tourism_data(db: Session, tourism_df: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Tuple[int, int]]:
+    """Load ``tourism_df`` into the database and commit once. Returns (inserted, updated) per table."""
+    tourism_df = tourism_df.dropna(subset=['Coût (MAD)'])
+    tourism_df = tourism_df[tourism_df['Type de donnée'].isin(DATA_TYPES)]
+    # The dataset repeats a few (city, name) pairs; the last price wins
+    tourism_df = tourism_df.drop_duplicates(subset=['Ville', 'Nom de l\'élément', 'Type de donnée'], keep='last')
+
+    try:
+        villes = getOrCreateVilleIds(db, sorted(tourism_df['Ville'].unique()))
+
+        results = {}
+        for data_type, model in DATA_TYPES.items():
+            subset = tourism_df[tourism_df['Type de donnée'] == data_type]
+            rows = [
+                {
+                    "nom": str(nom),
+                    "cout": float(cout),
+                    "description": str(classement),
+                    "idVille": villes[ville]
+                }
+                for ville, nom, classement, cout in zip(
+                    subset['Ville'], subset['Nom de l\'élément'], subset['classement'], subset['Coût (MAD)']
+                )
+            ]
+            results[model.__tablename__] = _upsert(db, model, rows, batch_size) if rows else (0, 0)
+
+        # Committed with the data: the workers' caches switch to it together
+        bumpPlannerGeneration(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # This process sees the new data at once; the API workers on their next generation check
+    invalidatePlannerCache()
+    return results
+
+
+def ensure_indexes() -> None:
+    """create_all doesn't add indexes to tables that already exist"""
+    Base.metadata.create_all(
+        bind=engine, tables=[Villes.__table__, Hotels.__table__, Activities.__table__, DataGeneration.__table__]
+    )
+    for model in (Hotels, Activities):
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load the tourism dataset into the database")
+    parser.add_argument("--file", default=TOURISM_DATA_FILE, help="Tourism dataset (.xlsx)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    ensure_indexes()
+    db = SessionLocal()
+    try:
+        results = ingest_tourism_data(db, pd.read_excel(args.file), args.batch_size)
+    finally:
+        db.close()
+
+    for table, (inserted, updated) in results.items():
+        print(f"{table}: {inserted} inserted, {updated} updated")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
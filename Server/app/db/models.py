@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Float,  UniqueConstraint, PrimaryKeyConstraint,JSON, LargeBinary
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, ForeignKey, Float,  UniqueConstraint, PrimaryKeyConstraint,JSON, LargeBinary, Index, Text, func
+from sqlalchemy.orm import relationship, deferred
 from app.db.database import Base
 
 
@@ -10,7 +10,7 @@ class Plans(Base):
     dateCreation = Column(Date)
     preference = relationship("Preferences", back_populates="plan", uselist=False)
     userPlans = relationship("UserPlan", back_populates="plan")
-    idUser = Column(Integer, ForeignKey("users.id"), nullable=False)  
+    idUser = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     user = relationship("User", back_populates="plans")  
     favorites = relationship("Favorite", back_populates="plan")
 
@@ -25,7 +25,7 @@ class Preferences(Base):
     dateRetour = Column(Date)
     idPlan = Column(Integer, ForeignKey("plans.id"), unique=True)
     plan = relationship("Plans", back_populates="preference")
-    userId = Column(Integer, ForeignKey("users.id"))
+    userId = Column(Integer, ForeignKey("users.id"), index=True)
     user = relationship("User", back_populates="preferences")
     villes = relationship("LieuxToVisit", back_populates="preference")
 
@@ -43,16 +43,26 @@ class User(Base):
     prenom = Column(String)
     email = Column(String)
     password = Column(String)
-    image = Column(LargeBinary, nullable=True)
+    # Legacy in-row picture, moved to the blob store on first read (see get_user_image)
+    image = deferred(Column(LargeBinary, nullable=True))
     image_type = Column(String, nullable=True)
+    # sha256 of the picture in the blob store
+    image_hash = Column(String(64), nullable=True)
+    # Embedded in access tokens; bumped by logout-all to revoke every older token
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
     preferences = relationship("Preferences", back_populates="user")
     plans = relationship("Plans", back_populates="user")  # Relation vers Plans
 
+    # Emails are matched case-insensitively: lookups filter on lower(email)
+    __table_args__ = (
+        Index('ix_users_email_lower', func.lower(email), unique=True),
+    )
+
 class Villes(Base):
     __tablename__ = "villes"
 
     id = Column(Integer, primary_key=True, index=True)
-    nom = Column(String)
+    nom = Column(String, index=True)
     budget = Column(Float)
     activities = relationship("Activities", back_populates="ville")
     itineraries = relationship("Itineraires", secondary="ville_itineraire", back_populates="villes")
@@ -72,6 +82,10 @@ class Activities(Base):
     ville = relationship("Villes", back_populates="activities")
     itineraries = relationship("Itineraires", back_populates="activity")  # Relation ajoutée
 
+    __table_args__ = (
+        Index('ix_activities_ville_cout', 'idVille', 'cout'),
+    )
+
 
 class Itineraires(Base):
     __tablename__ = "itineraires"
@@ -99,6 +113,10 @@ class Hotels(Base):
     ville = relationship("Villes", back_populates="hotels")
     itineraries = relationship("Itineraires", back_populates="hotel")  
 
+    __table_args__ = (
+        Index('ix_hotels_ville_cout', 'idVille', 'cout'),
+    )
+
 
 class VilleItineraire(Base):
     __tablename__ = "ville_itineraire"
@@ -142,6 +160,70 @@ class LieuxToVisit(Base):
 class Favorite(Base):
     __tablename__ = "favorites"
     id = Column(Integer, primary_key=True, index=True)
-    plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False)  
-    favorite_data = Column(JSON)  
-    plan = relationship("Plans", back_populates="favorites")
\ No newline at end of file
+    plan_id = Column(Integer, ForeignKey("plans.id"), nullable=False, index=True)
+    # Legacy inline copy of the plan; new favorites reference a PlanBlob instead
+    favorite_data = deferred(Column(JSON))
+    blob_hash = Column(String(64), ForeignKey("plan_blobs.hash", name="fk_favorites_blob_hash"), nullable=True, index=True)
+    plan = relationship("Plans", back_populates="favorites")
+    blob = relationship("PlanBlob")
+
+
+class PlanBlob(Base):
+    """A favorited plan body, stored once however many favorites point at it"""
+    __tablename__ = "plan_blobs"
+
+    # sha256 of the canonical JSON (sorted keys, no whitespace)
+    hash = Column(String(64), primary_key=True)
+    # zlib-compressed canonical JSON, only loaded when the full plan is needed
+    data = deferred(Column(LargeBinary, nullable=False))
+    size = Column(Integer, nullable=False)
+    # Small extract served by the list endpoints
+    summary = Column(JSON)
+
+class RevokedToken(Base):
+    """A logged-out token, shared by every worker until it would have expired"""
+    __tablename__ = "revoked_tokens"
+
+    # Increasing; workers only fetch the rows past the last seq they have seen
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    # token_id() of the JWT, never the token itself
+    token_id = Column(LargeBinary(16), nullable=False, unique=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    # Unix timestamp; rows past it are deleted by the sweeper
+    expires_at = Column(Float, nullable=False, index=True)
+    # Logout-all marker: tokens of user_id with an older epoch are revoked
+    epoch = Column(Integer, nullable=True)
+
+
+class EmailOutbox(Base):
+    """An email to send, written in the same transaction as the change that triggers it"""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    # Template family, see email_service.EMAIL_KINDS
+    kind = Column(String(50), nullable=False)
+    recipient = Column(String, nullable=False)
+    # Template variables
+    context = Column(JSON, nullable=False)
+    # pending, sent or failed
+    status = Column(String(10), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    # Unix timestamp; also pushed forward while a sender holds the row
+    next_attempt_at = Column(Float, nullable=False)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(Float, nullable=False)
+    sent_at = Column(Float, nullable=True)
+
+    # The senders' poll: due pending rows, oldest first
+    __table_args__ = (
+        Index('ix_email_outbox_due', status, next_attempt_at),
+    )
+
+
+class DataGeneration(Base):
+    """Counter bumped whenever a dataset changes, so every process can tell its cache is stale"""
+    __tablename__ = "data_generations"
+
+    # e.g. plannerDataService.PLANNER_DATA
+    name = Column(String(50), primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
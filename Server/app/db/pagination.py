@@ -0,0 +1,26 @@
+# app/db/pagination.py
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import Select
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def keyset(statement: Select, column, cursor: Optional[int], limit: int) -> Select:
+    """Rows after ``cursor`` in ``column`` order, plus one to tell whether a next page exists.
+
+    Unlike OFFSET, the cost of a page doesn't grow with how deep it is.
+    """
+    if cursor is not None:
+        statement = statement.where(column > cursor)
+    return statement.order_by(column).limit(limit + 1)
+
+
+def keyset_page(rows: Sequence[T], limit: int, key: Callable[[T], int]) -> Tuple[List[T], Optional[int]]:
+    """Split the result of ``keyset`` into the page and the cursor of the next one"""
+    page = list(rows[:limit])
+    next_cursor = key(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
@@ -0,0 +1,127 @@
+# app/db/pool_metrics.py
+import bisect
+import threading
+import time
+from typing import Dict, Optional, Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float("inf"))
+
+
+class PoolMetrics:
+    """Counters and checkout-wait histogram for one connection pool"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.peak_in_use = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    @property
+    def pool(self) -> Optional[Pool]:
+        # engine.dispose() swaps in a new pool; always read the current one
+        return self.engine.pool if self.engine is not None else None
+
+    def attach(self, engine: Engine) -> None:
+        """Follow ``engine``'s pool (listeners carry over when the pool is recreated)"""
+        self.engine = engine
+        pool = engine.pool
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            in_use = self.pool.checkedout() if hasattr(self.pool, "checkedout") else 0
+            with self._lock:
+                self.peak_in_use = max(self.peak_in_use, in_use)
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self) -> Dict:
+        pool = self.pool
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "peak_in_use": self.peak_in_use,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_histogram": {
+                    ("+Inf" if bound == float("inf") else f"{bound * 1000:g}ms"): count
+                    for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)
+                },
+            }
+        if pool is not None and hasattr(pool, "checkedout"):
+            data.update({
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
+
+
+class _TimedCheckout:
+    """Pool mixin timing how long ``connect()`` waits for a connection"""
+
+    metrics: PoolMetrics
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+def instrumented_pool_class(pool_class: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """Subclass of ``pool_class`` reporting checkout waits to ``metrics``.
+
+    A class attribute (rather than instance state) so pools recreated by
+    ``engine.dispose()`` keep reporting.
+    """
+    return type(f"Instrumented{pool_class.__name__}", (_TimedCheckout, pool_class), {"metrics": metrics})
+
+
+# One metrics object per engine
+pool_metrics = {
+    "sync": PoolMetrics("sync"),
+    "async": PoolMetrics("async"),
+}
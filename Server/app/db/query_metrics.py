@@ -0,0 +1,152 @@
+# app/db/query_metrics.py
+import bisect
+import logging
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the per-statement latency histogram buckets
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, float("inf"))
+# Distinct statements tracked; the rest are folded into OTHER_STATEMENTS
+MAX_STATEMENTS = 500
+OTHER_STATEMENTS = "<other>"
+# Longest statement text kept in logs and metrics
+MAX_STATEMENT_LENGTH = 500
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists: (?, ?, ?) / (%(p_1)s, %(p_2)s) / ($1, $2)
+_PARAMETER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+)\s*,)*\s*(?:\?|%\(\w+\)s|\$\d+)\s*\)")
+
+
+def normalize_statement(statement: str) -> str:
+    """One key per statement shape, whatever the size of its IN lists"""
+    statement = _PARAMETER_LIST.sub("(...)", _WHITESPACE.sub(" ", statement).strip())
+    return statement[:MAX_STATEMENT_LENGTH]
+
+
+class StatementStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": {
+                ("+Inf" if bound == float("inf") else f"{bound:g}ms"): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+        }
+
+
+class QueryMetrics:
+    """Per-statement timings from engine events, a slow-query log and sampled traces.
+
+    Thresholds are read from settings on every query so they can be changed
+    at runtime:
+      SLOW_QUERY_MS           log statements slower than this (0 disables)
+      SQL_EXPLAIN_SLOW_QUERIES  also log the plan of slow SELECTs (debug only)
+      SQL_TRACE_SAMPLE_RATE   fraction of statements logged with their timing
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, StatementStats] = {}
+        self.slow_queries = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+            self.slow_queries = 0
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        key = normalize_statement(statement)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= MAX_STATEMENTS:
+                    key = OTHER_STATEMENTS
+                stats = self._stats.setdefault(key, StatementStats())
+            stats.record(elapsed_ms)
+
+        slow_ms = settings.SLOW_QUERY_MS
+        if slow_ms and elapsed_ms >= slow_ms:
+            with self._lock:
+                self.slow_queries += 1
+            # Parameters are left out: they may hold credentials or personal data
+            logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {key}")
+            if settings.SQL_EXPLAIN_SLOW_QUERIES and not executemany:
+                plan = self.explain(conn, statement, parameters)
+                if plan:
+                    logger.warning(f"Plan of slow query:\n{plan}")
+        elif settings.SQL_TRACE_SAMPLE_RATE and random.random() < settings.SQL_TRACE_SAMPLE_RATE:
+            logger.info(f"SQL trace ({elapsed_ms:.3f} ms, rowcount={cursor.rowcount}): {key}")
+
+    @staticmethod
+    def explain(conn, statement: str, parameters) -> Optional[str]:
+        """Query plan of a SELECT, from a separate cursor so the caller's results are untouched"""
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+        except Exception as e:
+            return f"EXPLAIN failed: {str(e)}"
+        finally:
+            cursor.close()
+
+    def snapshot(self, top: int = 20) -> Dict:
+        """The ``top`` statements by total time"""
+        with self._lock:
+            ranked = sorted(self._stats.items(), key=lambda item: item[1].total_ms, reverse=True)
+            statements: List[Dict] = [{"statement": key, **stats.snapshot()} for key, stats in ranked[:top]]
+            return {
+                "statements_tracked": len(self._stats),
+                "queries": sum(stats.count for stats in self._stats.values()),
+                "slow_queries": self.slow_queries,
+                "slow_query_ms": settings.SLOW_QUERY_MS,
+                "top_statements": statements,
+            }
+
+
+# Create a singleton instance
+query_metrics = QueryMetrics()
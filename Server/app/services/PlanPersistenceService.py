@@ -0,0 +1,89 @@
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.db.models import Hotels, Activities, Itineraires, VilleItineraire, UserPlan
+from app.services.VilleService import getOrCreateVilleIds
+
+
+def _resolveOrInsert(db: Session, model, prices: dict) -> dict:
+    """Map (idVille, nom) -> id, inserting the missing rows in one bulk insert"""
+    if not prices:
+        return {}
+
+    ids = {
+        (row.idVille, row.nom): row.id
+        for row in db.execute(
+            select(model.id, model.idVille, model.nom)
+            .where(tuple_(model.idVille, model.nom).in_(list(prices)))
+        )
+    }
+    missing = [
+        {"idVille": idVille, "nom": nom, "cout": cout}
+        for (idVille, nom), cout in prices.items()
+        if (idVille, nom) not in ids
+    ]
+    if missing:
+        created = db.execute(insert(model).returning(model.idVille, model.nom, model.id), missing).all()
+        ids.update({(row.idVille, row.nom): row.id for row in created})
+    return ids
+
+
+def persistGeneratedPlans(db: Session, idPlan: int, generated_plans: list[dict]) -> dict:
+    """Write every tier of a generated plan (hotels, activities, itineraries, links) in one transaction.
+
+    Each stage is a single bulk INSERT ... RETURNING, so a whole result costs a
+    handful of statements and exactly one commit whatever its size.
+    """
+    stops = [stop for tier in generated_plans for stop in tier["plan"]]
+    if not stops:
+        return {"itineraires": 0}
+
+    try:
+        villes = getOrCreateVilleIds(db, [stop["city"] for stop in stops])
+
+        hotel_prices, activity_prices = {}, {}
+        for stop in stops:
+            idVille = villes[stop["city"]]
+            hotel_prices[(idVille, stop["hotel"]["name"])] = stop["hotel"]["pricePerNight"]
+            for activity in stop["activities"]:
+                activity_prices[(idVille, activity["name"])] = activity["price"]
+
+        hotels = _resolveOrInsert(db, Hotels, hotel_prices)
+        activities = _resolveOrInsert(db, Activities, activity_prices)
+
+        # One itinerary per activity of a stop (or one without activity)
+        itineraries = []
+        for stop in stops:
+            idVille = villes[stop["city"]]
+            row = {
+                "id_hotel": hotels[(idVille, stop["hotel"]["name"])],
+                "time_spent_by_ville": stop["days_spent"],
+                "budget": stop["hotel"]["totalPrice"] + stop["total_activities_cost"]
+            }
+            activity_ids = [activities[(idVille, a["name"])] for a in stop["activities"]] or [None]
+            itineraries.extend((idVille, {**row, "id_activite": idActivite}) for idActivite in activity_ids)
+
+        itineraire_ids = db.scalars(
+            insert(Itineraires).returning(Itineraires.id, sort_by_parameter_order=True),
+            [row for _, row in itineraries]
+        ).all()
+
+        ville_itineraire_ids = db.scalars(
+            insert(VilleItineraire).returning(VilleItineraire.id, sort_by_parameter_order=True),
+            [
+                {"idVille": idVille, "idItineraire": idItineraire}
+                for (idVille, _), idItineraire in zip(itineraries, itineraire_ids)
+            ]
+        ).all()
+
+        db.execute(
+            insert(UserPlan),
+            [{"idPlan": idPlan, "idVilleItineraire": id} for id in ville_itineraire_ids]
+        )
+
+        db.commit()
+        return {"itineraires": len(itineraire_ids)}
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'enregistrement du plan: {str(e)}")
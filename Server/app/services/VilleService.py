@@ -1,7 +1,9 @@
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 from app.db.models import Villes
 from fastapi import HTTPException
 from app.db.database import get_db 
+from app.services.villeCatalogService import ville_catalog
 
 
 
@@ -13,11 +15,28 @@ def getVillesService(db : Session):
     return db.query(Villes).all()
 
 def getVilleIdByName(db: Session, name: str):
-    ville = db.query(Villes).filter(Villes.nom == name).first()
-    if ville:
-        return ville.id
-    else:
-        return None 
+    # Served from the in-memory catalog; db is only used to (re)load it
+    return ville_catalog.id_for(db, name)
+
+
+def getVilleIdsByNames(db: Session, names: list[str]) -> dict[str, int]:
+    """Resolve city names to ids in one query; unknown names are left out"""
+    if not names:
+        return {}
+    return dict(db.execute(select(Villes.nom, Villes.id).where(Villes.nom.in_(set(names)))).all())
+
+
+def getOrCreateVilleIds(db: Session, names: list[str]) -> dict[str, int]:
+    """Resolve city names to ids in one query, creating the missing ones in one insert.
+
+    Does not commit: callers own the transaction.
+    """
+    villes = dict(db.execute(select(Villes.nom, Villes.id).where(Villes.nom.in_(names))).all())
+    missing = [{"nom": name} for name in dict.fromkeys(names) if name not in villes]
+    if missing:
+        created = db.execute(insert(Villes).returning(Villes.nom, Villes.id), missing).all()
+        villes.update(dict(created))
+    return villes
 
 
 
@@ -0,0 +1,72 @@
+# app/services/blob_store.py
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BlobTooLargeError(ValueError):
+    pass
+
+
+class BlobStore:
+    """Content-addressed files on local disk: a blob lives at <root>/<ab>/<cd>/<sha256>.
+
+    Identical uploads share one file, and a blob never changes once written,
+    so its digest doubles as a strong ETag.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: Optional[str]) -> bool:
+        return bool(digest) and self.path_for(digest).is_file()
+
+    def _write(self, source: BinaryIO, max_bytes: int) -> str:
+        staging = self.root / "tmp"
+        staging.mkdir(parents=True, exist_ok=True)
+        sha256 = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=staging)
+        try:
+            with os.fdopen(fd, "wb") as target:
+                while chunk := source.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise BlobTooLargeError(f"Blob exceeds {max_bytes} bytes")
+                    sha256.update(chunk)
+                    target.write(chunk)
+
+            digest = sha256.hexdigest()
+            path = self.path_for(digest)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, path)
+            return digest
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    async def save_stream(self, source: BinaryIO, max_bytes: int) -> str:
+        """Copy ``source`` into the store chunk by chunk and return its digest.
+
+        Raises BlobTooLargeError as soon as more than ``max_bytes`` have been read.
+        """
+        return await run_in_threadpool(self._write, source, max_bytes)
+
+    async def save_bytes(self, data: bytes) -> str:
+        return await self.save_stream(BytesIO(data), len(data))
+
+
+# Create a singleton instance
+blob_store = BlobStore(settings.BLOB_STORE_DIR)
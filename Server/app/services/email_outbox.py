@@ -0,0 +1,277 @@
+# app/services/email_outbox.py
+from email.message import EmailMessage
+from typing import Callable, Optional
+import asyncio
+import logging
+import random
+import time
+
+import aiosmtplib
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.core.rate_limit import BucketState, take_token
+from app.db.database import AsyncSessionLocal
+from app.db.models import EmailOutbox
+from app.services.email_service import EMAIL_KINDS, email_service
+
+logger = logging.getLogger(__name__)
+
+# A claimed email is retried by any sender after this long (the worker died mid-send)
+CLAIM_LEASE = 300
+# Longest wait between two attempts of an email
+MAX_RETRY_DELAY = 3600
+
+
+def enqueue_email(db, kind: str, recipient: str, context: dict) -> EmailOutbox:
+    """Queue an email in the caller's session.
+
+    It is only inserted when the caller commits, so a rolled back signup
+    sends nothing. Works with sync and async sessions alike; call
+    ``email_outbox.notify()`` after the commit to send it right away.
+    """
+    if kind not in EMAIL_KINDS:
+        raise ValueError(f"Unknown email kind: {kind}")
+    now = time.time()
+    email = EmailOutbox(
+        kind=kind,
+        recipient=recipient,
+        context=context,
+        status="pending",
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now
+    )
+    db.add(email)
+    return email
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx answers and unbuildable emails are not retried; network errors and 4xx are"""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(refused.code >= 500 for refused in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code >= 500
+    return not isinstance(error, (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError))
+
+
+class SmtpConnection:
+    """One authenticated SMTP connection, reused across emails.
+
+    Opened (and logged in) on the first send, reopened when the server has
+    dropped it, and closed after ``idle_timeout`` seconds without a send.
+    """
+
+    def __init__(self, hostname: str, port: int, username: Optional[str], password: Optional[str],
+                 start_tls: bool = True, idle_timeout: float = 60, timeout: float = 30):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        # Connections opened so far
+        self.connections = 0
+        self._client: Optional[aiosmtplib.SMTP] = None
+        self._last_used = 0.0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        await self.close()
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        # EHLO, STARTTLS and AUTH, once per connection
+        await client.connect()
+        self.connections += 1
+        self._client = client
+        return client
+
+    async def send(self, message: EmailMessage) -> None:
+        client = self._client
+        if client is None or not client.is_connected:
+            client = await self._connect()
+        try:
+            try:
+                await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # Servers close connections they find idle: retry once on a fresh one
+                client = await self._connect()
+                await client.send_message(message)
+        except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+            # The server answered (and the transaction was reset): the connection is fine
+            raise
+        except Exception:
+            await self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    async def close_if_idle(self) -> None:
+        if self._client is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            await self.close()
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is None or not client.is_connected:
+            return
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+
+class EmailOutboxWorker:
+    """Sends the emails queued in ``email_outbox``, from an asyncio task.
+
+    Due rows are claimed one at a time with a conditional UPDATE, so several
+    workers (one per uvicorn process) never send the same row twice. Sends
+    are paced by a token bucket of ``rate_per_minute`` per worker; failures
+    are retried with exponential backoff until ``max_attempts``.
+    """
+
+    def __init__(self, smtp: SmtpConnection, session_factory=AsyncSessionLocal,
+                 build: Callable[[str, str, dict], EmailMessage] = email_service.build_message,
+                 rate_per_minute: float = 30, burst: int = 5, max_attempts: int = 8,
+                 retry_base_delay: float = 30, poll_interval: float = 5):
+        self.smtp = smtp
+        self.session_factory = session_factory
+        self.build = build
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.poll_interval = poll_interval
+        self._bucket: Optional[BucketState] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def retry_delay(self, attempts: int) -> float:
+        """Backoff after the ``attempts``-th failure, with jitter so retries spread out"""
+        delay = min(MAX_RETRY_DELAY, self.retry_base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1)
+
+    async def _claim(self):
+        """The oldest due email, leased to this worker; None when nothing is due"""
+        async with self.session_factory() as db:
+            while True:
+                now = time.time()
+                row = (await db.execute(
+                    select(EmailOutbox.id, EmailOutbox.kind, EmailOutbox.recipient, EmailOutbox.context,
+                           EmailOutbox.attempts, EmailOutbox.next_attempt_at)
+                    .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                    .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+                    .limit(1)
+                )).first()
+                if row is None:
+                    return None
+                # Only succeeds if no other worker claimed the row since we read it
+                result = await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id == row.id, EmailOutbox.status == "pending",
+                           EmailOutbox.next_attempt_at == row.next_attempt_at)
+                    .values(next_attempt_at=now + CLAIM_LEASE, attempts=EmailOutbox.attempts + 1)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                if result.rowcount == 1:
+                    return row
+
+    async def _pace(self) -> None:
+        while True:
+            allowed, wait, self._bucket = take_token(self._bucket, self.rate, self.burst, time.monotonic())
+            if allowed:
+                return
+            await asyncio.sleep(wait)
+
+    async def _record(self, row, error: Optional[Exception]) -> None:
+        attempts = row.attempts + 1
+        now = time.time()
+        if error is None:
+            values = {"status": "sent", "sent_at": now, "last_error": None}
+        elif is_permanent(error) or attempts >= self.max_attempts:
+            logger.error(f"Giving up on email {row.id} to {row.recipient} after {attempts} attempts: {error}")
+            values = {"status": "failed", "last_error": str(error)[:1000]}
+        else:
+            logger.warning(f"Email {row.id} to {row.recipient} failed (attempt {attempts}), will retry: {error}")
+            values = {"next_attempt_at": now + self.retry_delay(attempts), "last_error": str(error)[:1000]}
+        async with self.session_factory() as db:
+            await db.execute(
+                update(EmailOutbox).where(EmailOutbox.id == row.id).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def run_once(self) -> int:
+        """Send every due email; returns how many were sent"""
+        sent = 0
+        while True:
+            row = await self._claim()
+            if row is None:
+                return sent
+            await self._pace()
+            error = None
+            try:
+                await self.smtp.send(self.build(row.kind, row.recipient, row.context))
+                sent += 1
+                logger.info(f"Email {row.id} ({row.kind}) sent to {row.recipient}")
+            except Exception as e:
+                error = e
+            await self._record(row, error)
+
+    def notify(self) -> None:
+        """Wake the worker after committing new emails. Call from the event loop."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+                await self.smtp.close_if_idle()
+            except Exception as e:
+                logger.error(f"Error sending queued emails: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Start sending in the background; call from the event loop (app startup)"""
+        if self._task and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="email-outbox")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        await self.smtp.close()
+
+
+# Create a singleton instance
+email_outbox = EmailOutboxWorker(
+    SmtpConnection(
+        settings.MAIL_SERVER,
+        settings.MAIL_PORT,
+        settings.MAIL_USERNAME,
+        settings.MAIL_PASSWORD,
+        idle_timeout=settings.EMAIL_SMTP_IDLE_TIMEOUT
+    ),
+    rate_per_minute=settings.EMAIL_RATE_PER_MINUTE,
+    burst=settings.EMAIL_RATE_BURST,
+    max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+    retry_base_delay=settings.EMAIL_RETRY_BASE_DELAY,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_INTERVAL
+)
@@ -3,12 +3,41 @@ from pathlib import Path
 import logging
 from app.core.config import settings
 from jinja2 import Environment, FileSystemLoader
+from email.message import EmailMessage
 from email.utils import formatdate, make_msgid
 import time
-import asyncio
 logger = logging.getLogger(__name__)
 
 
+# Extra headers of the Google welcome email, for better deliverability
+GOOGLE_WELCOME_HEADERS = {
+    "X-Priority": "3",
+    "X-MSMail-Priority": "Normal",
+    "Importance": "Normal",
+    "X-Mailer": "TouristAI Service",
+    "List-Unsubscribe": f"<mailto:{settings.MAIL_USERNAME}?subject=unsubscribe>",
+    "Precedence": "bulk",
+    "X-Auto-Response-Suppress": "OOF, AutoReply",
+    "Auto-Submitted": "auto-generated",
+    "X-Report-Abuse": f"Please report abuse here: mailto:{settings.MAIL_USERNAME}",
+    "Feedback-ID": "welcome-email:touristai:google-signup:1"
+}
+
+# Outbox kind -> (template, subject, extra headers)
+EMAIL_KINDS = {
+    "welcome": (
+        "welcome.html",
+        "Welcome to TouristAI - Let's Explore Morocco Together!",
+        {}
+    ),
+    "google_welcome": (
+        "google_welcome.html",
+        "Welcome to TouristAI - Your Google Account is Connected!",
+        GOOGLE_WELCOME_HEADERS
+    ),
+}
+
+
 class EmailService:
     def __init__(self):
         self.templates_dir = Path(__file__).parent.parent / 'email_templates'
@@ -31,82 +60,30 @@ class EmailService:
 
         self.fast_mail = FastMail(self.conf)
 
-    async def send_welcome_email(self, email: str, name: str) -> bool:
-        try:
-            logger.info(f"Attempting to send welcome email to {email}")
-
-            template = self.env.get_template('welcome.html')
-            html_content = template.render(
-                name=name,
-                email=email,
-                support_email=settings.MAIL_USERNAME,
-                website_url="https://touristai.online"
-            )
-
-            message = MessageSchema(
-                subject="Welcome to TouristAI - Let's Explore Morocco Together!",
-                recipients=[email],
-                body=html_content,
-                subtype="html"
-            )
-
-            await self.fast_mail.send_message(message)
-            logger.info(f"Welcome email sent successfully to {email}")
-            return True
-
-        except Exception as e:
-            logger.error(f"Failed to send welcome email to {email}: {str(e)}")
-            return False
-
-    async def send_google_welcome_email(self, email: str, name: str) -> bool:
-        try:
-            logger.info(f"Attempting to send Google welcome email to {email}")
-
-            template = self.env.get_template('google_welcome.html')
-            html_content = template.render(
-                name=name,
-                email=email,
-                support_email=settings.MAIL_USERNAME,
-                website_url="https://touristai.online"
-            )
-
-            # Create unique message ID and date
-            msg_id = make_msgid(domain='touristai.online')
-            date = formatdate(time.time(), localtime=True)
-
-            # Add enhanced headers for better deliverability
-            message = MessageSchema(
-                subject="Welcome to TouristAI - Your Google Account is Connected!",
-                recipients=[email],
-                body=html_content,
-                subtype="html",
-                headers={
-                    "Message-ID": msg_id,
-                    "Date": date,
-                    "From": f"{settings.MAIL_FROM_NAME} <{settings.MAIL_USERNAME}>",
-                    "X-Priority": "3",
-                    "X-MSMail-Priority": "Normal",
-                    "Importance": "Normal",
-                    "X-Mailer": "TouristAI Service",
-                    "List-Unsubscribe": f"<mailto:{settings.MAIL_USERNAME}?subject=unsubscribe>",
-                    "Precedence": "bulk",
-                    "X-Auto-Response-Suppress": "OOF, AutoReply",
-                    "Auto-Submitted": "auto-generated",
-                    "X-Report-Abuse": f"Please report abuse here: mailto:{settings.MAIL_USERNAME}",
-                    "Feedback-ID": "welcome-email:touristai:google-signup:1"
-                }
-            )
-
-            # Add a small delay to prevent rate limiting
-            await asyncio.sleep(1)
-
-            await self.fast_mail.send_message(message)
-            logger.info(f"Google welcome email sent successfully to {email}")
-            return True
+    def build_message(self, kind: str, recipient: str, context: dict) -> EmailMessage:
+        """The email of an outbox row, rendered from its template.
+
+        Welcome emails are queued in the outbox (see email_outbox) and sent by
+        its background worker rather than during the request.
+        """
+        template_name, subject, headers = EMAIL_KINDS[kind]
+        html_content = self.env.get_template(template_name).render(
+            email=recipient,
+            support_email=settings.MAIL_USERNAME,
+            website_url="https://touristai.online",
+            **context
+        )
 
-        except Exception as e:
-            logger.error(f"Failed to send Google welcome email to {email}: {str(e)}")
-            return False
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = f"{settings.MAIL_FROM_NAME} <{settings.MAIL_FROM}>"
+        message["To"] = recipient
+        message["Date"] = formatdate(time.time(), localtime=True)
+        message["Message-ID"] = make_msgid(domain='touristai.online')
+        for name, value in headers.items():
+            message[name] = value
+        message.set_content(html_content, subtype="html")
+        return message
 
     async def test_email_connection(self) -> bool:
         try:
@@ -126,4 +103,4 @@ class EmailService:
 
 
 # Create singleton instance
-email_service = EmailService()
\ No newline at end of file
+email_service = EmailService()
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import zlib
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Favorite, PlanBlob
+
+# INSERT ... ON CONFLICT DO NOTHING, per dialect
+INSERT_IGNORE = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def canonicalPlan(data: dict) -> bytes:
+    """Same plan, same bytes: keys sorted, no insignificant whitespace"""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def scalarFields(data: dict) -> dict:
+    return {key: value for key, value in data.items() if not isinstance(value, (dict, list))}
+
+
+def planSummary(data: dict) -> dict:
+    """What the favorites list shows: the plan's scalar fields (total_cost,
+    total_days_spent...), its cost breakdown, and the scalar fields of each
+    stop (city, days_spent...) without hotels and activities"""
+    summary = scalarFields(data)
+    if isinstance(data.get("breakdown"), dict):
+        summary["breakdown"] = data["breakdown"]
+    stops = data.get("plan")
+    if isinstance(stops, list):
+        summary["plan"] = [scalarFields(stop) for stop in stops if isinstance(stop, dict)]
+    return summary
+
+
+def encodePlan(data: dict) -> PlanBlob:
+    canonical = canonicalPlan(data)
+    return PlanBlob(
+        hash=hashlib.sha256(canonical).hexdigest(),
+        data=zlib.compress(canonical, 6),
+        size=len(canonical),
+        summary=planSummary(data)
+    )
+
+
+def decodePlan(data: bytes) -> dict:
+    return json.loads(zlib.decompress(data))
+
+
+def lockPlanBlob(hash: str):
+    """The blob row, locked until commit (a no-op on SQLite, which has one writer at a time)"""
+    return select(PlanBlob.hash).where(PlanBlob.hash == hash).with_for_update()
+
+
+async def storePlanBlob(db: AsyncSession, data: dict) -> str:
+    """Hash of ``data``'s blob, stored and locked in the caller's transaction.
+
+    Favorites are added and deleted concurrently: the lock keeps a delete of
+    the last favorite sharing this plan from dropping the blob before the new
+    favorite referencing it is committed.
+    """
+    blob = encodePlan(data)
+    values = {"hash": blob.hash, "data": blob.data, "size": blob.size, "summary": blob.summary}
+    insert = INSERT_IGNORE[db.get_bind().dialect.name]
+    while True:
+        await db.execute(insert(PlanBlob).values(**values).on_conflict_do_nothing(index_elements=[PlanBlob.hash]))
+        # Gone when a delete that saw the blob committed in between: store it again
+        if await db.scalar(lockPlanBlob(blob.hash)) is not None:
+            return blob.hash
+
+
+async def deleteOrphanPlanBlob(db: AsyncSession, blob_hash: str):
+    """Drop the blob once no favorite references it any more"""
+    if blob_hash:
+        # Waits for a concurrent storePlanBlob's transaction, whose favorite the delete then sees
+        await db.execute(lockPlanBlob(blob_hash))
+        await db.execute(
+            delete(PlanBlob).where(
+                PlanBlob.hash == blob_hash,
+                ~exists().where(Favorite.blob_hash == blob_hash)
+            )
+        )
@@ -0,0 +1,121 @@
+from threading import Lock
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from cachetools import TTLCache
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Activities, DataGeneration, Hotels, Villes
+
+# Read-through cache shared by every session of the worker
+CACHE_TTL_SECONDS = 300
+_cache = TTLCache(maxsize=1024, ttl=CACHE_TTL_SECONDS)
+_cache_lock = Lock()
+
+# data_generations row bumped by every ingestion; cache keys include it, so
+# an ingestion run from another process (the CLI) reaches every worker once
+# it re-reads the generation, at most GENERATION_CHECK_SECONDS later
+PLANNER_DATA = "planner_catalog"
+GENERATION_CHECK_SECONDS = 5
+_generation_cache = TTLCache(maxsize=1, ttl=GENERATION_CHECK_SECONDS)
+
+
+def invalidatePlannerCache():
+    """Drop this process's cached planner data (other processes: see bumpPlannerGeneration)"""
+    with _cache_lock:
+        _cache.clear()
+        _generation_cache.clear()
+
+
+def bumpPlannerGeneration(db: Session) -> None:
+    """Mark the planner data as changed, in the caller's transaction"""
+    bumped = db.execute(
+        update(DataGeneration)
+        .where(DataGeneration.name == PLANNER_DATA)
+        .values(generation=DataGeneration.generation + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not bumped:
+        db.execute(insert(DataGeneration).values(name=PLANNER_DATA, generation=1))
+
+
+def _planner_generation(db: Session) -> int:
+    with _cache_lock:
+        generation = _generation_cache.get(PLANNER_DATA)
+    if generation is None:
+        generation = db.scalar(
+            select(DataGeneration.generation).where(DataGeneration.name == PLANNER_DATA)
+        ) or 0
+        with _cache_lock:
+            _generation_cache[PLANNER_DATA] = generation
+    return generation
+
+
+def _read_through(key, loader):
+    with _cache_lock:
+        value = _cache.get(key)
+    if value is None:
+        value = loader()
+        with _cache_lock:
+            _cache[key] = value
+    return value
+
+
+class DatabaseCatalog:
+    """Planner data source backed by the hotels / activities tables.
+
+    Both queries filter on idVille and order by cout, so they are served by
+    the (idVille, cout) indexes without a sort.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._generation: Optional[int] = None
+
+    @property
+    def generation(self) -> int:
+        """Generation of the hotels / activities this catalog serves"""
+        # One generation per catalog (request), so a plan never mixes two datasets
+        if self._generation is None:
+            self._generation = _planner_generation(self.db)
+        return self._generation
+
+    def _key(self, *key):
+        return (self.generation, *key)
+
+    def hotels_for(self, city: str) -> Tuple[np.ndarray, Callable[[int], str]]:
+        """Prices of the city's hotels (ascending) and a name lookup by position"""
+        def load():
+            rows = self.db.execute(
+                select(Hotels.nom, Hotels.cout)
+                .join(Villes, Hotels.idVille == Villes.id)
+                .where(Villes.nom == city, Hotels.cout.is_not(None))
+                .order_by(Hotels.cout)
+            ).all()
+            return tuple(row.nom for row in rows), np.array([row.cout for row in rows], dtype=np.float64)
+
+        names, costs = _read_through(self._key("hotels", city), load)
+        return costs, names.__getitem__
+
+    def activities_for(self, city: str, max_cost: float) -> List[dict]:
+        """The city's activities that fit in ``max_cost``, cheapest first"""
+        def load():
+            rows = self.db.execute(
+                select(Activities.nom, Activities.cout)
+                .join(Villes, Activities.idVille == Villes.id)
+                .where(Villes.nom == city, Activities.cout.is_not(None))
+                .order_by(Activities.cout)
+            ).all()
+            return tuple((row.nom, row.cout) for row in rows)
+
+        activities = _read_through(self._key("activities", city), load)
+        return [{"name": name, "price": cost} for name, cost in activities if cost <= max_cost]
+
+
+def getPlannerCatalog(db: Session) -> Optional[DatabaseCatalog]:
+    """Catalog the planner should use, or None to read the compiled datasets"""
+    if settings.PLANNER_DATA_SOURCE == "database":
+        return DatabaseCatalog(db)
+    return None
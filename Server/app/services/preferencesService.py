@@ -1,16 +1,41 @@
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
 from app.db.models import Preferences,LieuxToVisit
 from fastapi import HTTPException
 from app.db.database import get_db 
-from app.services.VilleService import getVilleIdByName
+from app.db.pagination import DEFAULT_PAGE_SIZE, keyset, keyset_page
+from app.services.VilleService import getVilleIdsByNames
 
 
 
 
+def resolveCityIds(db: Session, cities: list[str]) -> list[int]:
+    """City ids in request order (duplicates dropped), with every unknown city reported at once"""
+    cities = list(dict.fromkeys(cities))
+    cityIds = getVilleIdsByNames(db, cities)
+    unknown = [city for city in cities if city not in cityIds]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Les villes suivantes n'existent pas ou sont invalides : {', '.join(unknown)}"
+        )
+    return [cityIds[city] for city in cities]
+
+
+def addLieuxToVisit(db: Session, idPreference: int, cityIds: list[int]):
+    if cityIds:
+        db.execute(
+            insert(LieuxToVisit),
+            [{"idPreference": idPreference, "idVille": cityId} for cityId in cityIds]
+        )
+
 
 def createPreferenceService(db: Session, lieuDepart: str, cities: list[str], dateDepart: str, dateRetour: str, budget: float, idPlan: int, userId: int):
     try:
-        
+        # Cities are checked before anything is written
+        cityIds = resolveCityIds(db, cities)
+
         newPref = Preferences(
             lieuDepart=lieuDepart,
             dateDepart=dateDepart,
@@ -21,25 +46,17 @@ def createPreferenceService(db: Session, lieuDepart: str, cities: list[str], dat
         )
 
         db.add(newPref)
-        db.flush()  
-        db.refresh(newPref)  
-        db.commit()  
+        db.flush()
 
-       
-        for city in cities:
-            cityId = getVilleIdByName(db, city)
-            if not cityId:
-                raise HTTPException(status_code=400, detail=f"La ville '{city}' n'existe pas ou est invalide.")
-
-            newLieu = LieuxToVisit(
-                idPreference=newPref.id,
-                idVille=cityId
-            )
-            db.add(newLieu)
-            db.commit()  
+        addLieuxToVisit(db, newPref.id, cityIds)
+        db.commit()
 
         return newPref
 
+    except HTTPException:
+        db.rollback()
+        raise
+
     except IntegrityError as e:
         
         db.rollback()  
@@ -57,8 +74,12 @@ def createPreferenceService(db: Session, lieuDepart: str, cities: list[str], dat
 
 
 
-def getPreferencesService(db : Session):
-    return db.query(Preferences).all()    
+def getPreferencesService(db: Session, userId: int, cursor: int = None, limit: int = DEFAULT_PAGE_SIZE):
+    """One page of the user's preferences by id, and the cursor of the next page"""
+    rows = db.scalars(
+        keyset(select(Preferences).where(Preferences.userId == userId), Preferences.id, cursor, limit)
+    ).all()
+    return keyset_page(rows, limit, key=lambda pref: pref.id)
 
 def getPreferencesById(db : Session, Id: int):
     preference = db.query(Preferences).filter(Preferences.id == Id).first()
@@ -94,116 +115,8 @@ def updatePreferenceService(
 
     if not preference:
         raise HTTPException(status_code=404, detail="Preference not found")
-    
-    
-    if lieuDepart is not None:
-        preference.lieuDepart = lieuDepart
-    if dateDepart is not None:
-        preference.dateDepart = dateDepart
-    if dateRetour is not None:
-        preference.dateRetour = dateRetour
-    if budget is not None:
-        preference.budget = budget
-    if idPlan is not None:
-        preference.idPlan = idPlan
-    if userId is not None:
-        preference.userId = userId
-    
-    
-    if cities is not None:
-       
-        db.query(LieuxToVisit).filter(LieuxToVisit.idPreference == preference_id).delete()
-
-
-        for city in cities:
-            cityId = getVilleIdByName(db, city)
-            newLieu = LieuxToVisit(
-                idPreference=preference_id,
-                idVille=cityId
-            )
-            db.add(newLieu)
-    
-    db.commit()
-    db.refresh(preference)
-    return preference
-
-from sqlalchemy.orm import Session
-from app.db.models import Preferences,LieuxToVisit
-from fastapi import HTTPException
-from app.db.database import get_db 
-from app.services.VilleService import getVilleIdByName
-
-
-
-
-def createPreferenceService(db : Session, lieuDepart: str, cities : list[str],dateDepart: str, dateRetour: str,budget: float, idPlan: int, userId:int):
-    
-    
-    newPref = Preferences(
-        lieuDepart = lieuDepart,
-        dateDepart = dateDepart,
-        dateRetour = dateRetour,
-        budget = budget,
-        idPlan = idPlan,
-        userId = userId
-    )
-    db.add(newPref)
-    db.flush()
-    db.refresh(newPref)
-    db.commit()
-    
-    
-    for city in cities:
-        cityId = getVilleIdByName(db,city)
-        newLieu = LieuxToVisit(
-            idPreference = newPref.id,
-            idVille = cityId
-        )
-        db.add(newLieu)
-        db.commit()
-
-
-    return newPref
-
-
-def getPreferencesService(db : Session):
-    return db.query(Preferences).all()    
-
-def getPreferencesById(db : Session, Id: int):
-    preference = db.query(Preferences).filter(Preferences.id == Id).first()
-    if preference:
-        return preference
-    else:
-        return None
-
-
-def deletePreferenceById(db: Session, id: int):
-    preference = db.query(Preferences).filter(Preferences.id == id).first()  
-    if not preference:
-        return None
-    db.query(LieuxToVisit).filter(LieuxToVisit.idPreference == id).delete()
-    db.delete(preference)
-    db.commit()
-    return preference
 
-
-def updatePreferenceService(
-    db: Session, 
-    preference_id: int, 
-    lieuDepart: str = None, 
-    cities: list[str] = None, 
-    dateDepart: str = None, 
-    dateRetour: str = None, 
-    budget: float = None, 
-    idPlan: int = None, 
-    userId: int = None
-):
-
-    preference = db.query(Preferences).filter(Preferences.id == preference_id).first()
-
-    if not preference:
-        raise HTTPException(status_code=404, detail="Preference not found")
-    
+    cityIds = resolveCityIds(db, cities) if cities is not None else None
     
     if lieuDepart is not None:
         preference.lieuDepart = lieuDepart
@@ -219,18 +132,10 @@ def updatePreferenceService(
         preference.userId = userId
     
     
-    if cities is not None:
+    if cityIds is not None:
        
         db.query(LieuxToVisit).filter(LieuxToVisit.idPreference == preference_id).delete()
-
-
-        for city in cities:
-            cityId = getVilleIdByName(db, city)
-            newLieu = LieuxToVisit(
-                idPreference=preference_id,
-                idVille=cityId
-            )
-            db.add(newLieu)
+        addLieuxToVisit(db, preference_id, cityIds)
     
     db.commit()
     db.refresh(preference)
@@ -245,7 +150,3 @@ def PreferenceToAi(preference):
         "dateRetour": preference.dateRetour,
         "budget": preference.budget
     }
-
-
-    
-
@@ -0,0 +1,111 @@
+# app/services/thumbnails.py
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+from app.services.blob_store import BlobStore, blob_store
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels of each variant served by /user/profile/image?size=
+THUMBNAIL_SIZES = {
+    "small": 64,
+    "medium": 256,
+    "large": 512,
+}
+# Extension -> Pillow format
+THUMBNAIL_FORMATS = {
+    "webp": "WEBP",
+    "jpg": "JPEG",
+}
+
+
+def thumbnail_path(original: Path, size: str, extension: str) -> Path:
+    """Variants are stored next to the original blob"""
+    return original.with_name(f"{original.name}_{size}.{extension}")
+
+
+def render_thumbnails(original: str, sizes: Dict[str, int]) -> List[str]:
+    """Write every size x format variant of ``original``. Runs in a worker process."""
+    source = Path(original)
+    written = []
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale while decoding when it can
+        image.draft("RGB", (max(sizes.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        # Animated GIFs keep their first frame
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+        for size, pixels in sorted(sizes.items(), key=lambda item: -item[1]):
+            image.thumbnail((pixels, pixels), Image.Resampling.LANCZOS)
+            for extension, image_format in THUMBNAIL_FORMATS.items():
+                variant = image
+                if image_format == "JPEG" and variant.mode == "RGBA":
+                    variant = Image.new("RGB", image.size, "white")
+                    variant.paste(image, mask=image.getchannel("A"))
+                target = thumbnail_path(source, size, extension)
+                tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+                variant.save(tmp, image_format, quality=82)
+                os.replace(tmp, target)
+                written.append(str(target))
+    return written
+
+
+class ThumbnailService:
+    """Generates profile picture variants in a process pool, off the event loop"""
+
+    def __init__(self, store: BlobStore, sizes: Dict[str, int], workers: int):
+        self.store = store
+        self.sizes = sizes
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = set()
+        self._tasks = set()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def path_for(self, image_hash: str, size: str, extension: str) -> Path:
+        return thumbnail_path(self.store.path_for(image_hash), size, extension)
+
+    async def generate(self, image_hash: str) -> List[str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool(), render_thumbnails, str(self.store.path_for(image_hash)), self.sizes
+        )
+
+    async def _generate_logged(self, image_hash: str) -> None:
+        try:
+            await self.generate(image_hash)
+        except Exception as e:
+            logger.error(f"Thumbnail generation failed for {image_hash}: {str(e)}")
+        finally:
+            self._pending.discard(image_hash)
+
+    def schedule(self, image_hash: str) -> None:
+        """Generate the variants in the background; until then the original is served"""
+        if image_hash in self._pending:
+            return
+        self._pending.add(image_hash)
+        # The loop only keeps weak references to tasks
+        task = asyncio.get_running_loop().create_task(self._generate_logged(image_hash))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Create a singleton instance
+thumbnail_service = ThumbnailService(blob_store, THUMBNAIL_SIZES, settings.THUMBNAIL_WORKERS)
@@ -1,3 +1,4 @@
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 from app.schemas.user import UserCreate
 from app.controllers.auth_controller import signup, signin
@@ -5,8 +6,11 @@ from fastapi import HTTPException ,  status
 from app.schemas.user import UserUpdate
 from app.db.models import User
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from app.core.security import verify_password, hash_password
+from app.core.password_hasher import password_hasher
+from app.core.auth_context import user_snapshots
 from app.schemas.user import PasswordUpdate
+from app.services.blob_store import blob_store
+from app.services.thumbnails import thumbnail_service
 
 
 # Business logic for user signup
@@ -64,9 +68,12 @@ def update_user_profile(db: Session, user_id: int, user_data: UserUpdate):
                     }
                 )
 
+            # Stored lowercase, like signup: tokens carry it and get_current_user compares it
+            update_data['email'] = update_data['email'].lower()
+
             # Check if email is already taken
-            if update_data['email'] != db_user.email:
-                existing_user = db.query(User).filter(User.email == update_data['email']).first()
+            if update_data['email'] != db_user.email.lower():
+                existing_user = db.query(User).filter(func.lower(User.email) == update_data['email']).first()
                 if existing_user:
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
@@ -97,6 +104,7 @@ def update_user_profile(db: Session, user_id: int, user_data: UserUpdate):
 
             db.commit()
             db.refresh(db_user)
+            user_snapshots.invalidate(user_id)
 
             # Return the user model object directly
             return db_user
@@ -136,8 +144,26 @@ def update_user_profile(db: Session, user_id: int, user_data: UserUpdate):
         )
 
 
-async def update_user_image(db: Session, user_id: int, image_data: bytes, image_type: str):
-    """Update user's profile picture"""
+def get_user_image(db: Session, user_id: int):
+    """Legacy profile picture bytes and content type, or None if the user has none"""
+    row = db.query(User.image, User.image_type).filter(User.id == user_id).first()
+    if not row or not row.image:
+        return None
+    return row
+
+
+async def move_user_image_to_store(db: Session, user_id: int, image: bytes) -> str:
+    """Copy a legacy in-row picture into the blob store and drop it from the row"""
+    image_hash = await blob_store.save_bytes(image)
+    db.query(User).filter(User.id == user_id).update({User.image_hash: image_hash, User.image: None})
+    db.commit()
+    user_snapshots.invalidate(user_id)
+    thumbnail_service.schedule(image_hash)
+    return image_hash
+
+
+async def update_user_image(db: Session, user_id: int, image_hash: str, image_type: str):
+    """Point the user's profile picture at a blob already in the blob store"""
     try:
         db_user = db.query(User).filter(User.id == user_id).first()
         if not db_user:
@@ -150,11 +176,16 @@ async def update_user_image(db: Session, user_id: int, image_data: bytes, image_
             )
 
         # Update image and image type
-        db_user.image = image_data
+        db_user.image_hash = image_hash
         db_user.image_type = image_type
+        db_user.image = None
 
         db.commit()
         db.refresh(db_user)
+        user_snapshots.invalidate(user_id)
+
+        # Resized variants are produced in the background
+        thumbnail_service.schedule(image_hash)
         return db_user
 
     except HTTPException:
@@ -170,7 +201,19 @@ async def update_user_image(db: Session, user_id: int, image_data: bytes, image_
             }
         )
 
-def update_user_password(db: Session, user_id: int, password_data: PasswordUpdate):
+def bump_token_epoch(db: Session, user_id: int) -> int:
+    """Increment the user's token epoch, revoking every token issued before; returns the new epoch"""
+    # A single UPDATE: concurrent logouts each get their own increment
+    new_epoch = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(token_epoch=User.token_epoch + 1)
+        .returning(User.token_epoch)
+    ).scalar_one()
+    db.commit()
+    return new_epoch
+
+async def update_user_password(db: Session, user_id: int, password_data: PasswordUpdate):
     """Update user password with validation"""
     try:
         # Get the user from database
@@ -185,7 +228,7 @@ def update_user_password(db: Session, user_id: int, password_data: PasswordUpdat
             )
 
         # Verify current password
-        if not verify_password(password_data.current_password, db_user.password):
+        if not await password_hasher.verify_async(password_data.current_password, db_user.password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -196,7 +239,7 @@ def update_user_password(db: Session, user_id: int, password_data: PasswordUpdat
             )
 
         # Verify new password is different from current
-        if verify_password(password_data.new_password, db_user.password):
+        if await password_hasher.verify_async(password_data.new_password, db_user.password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -207,7 +250,7 @@ def update_user_password(db: Session, user_id: int, password_data: PasswordUpdat
             )
 
         # Update password
-        db_user.password = hash_password(password_data.new_password)
+        db_user.password = await password_hasher.hash_async(password_data.new_password)
         db.commit()
 
         return {
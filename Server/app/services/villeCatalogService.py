@@ -0,0 +1,110 @@
+import hashlib
+import json
+import time
+from itertools import chain
+from threading import Lock
+from typing import Dict, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Villes
+
+# Session.info flag set when a transaction writes to the villes table
+_VILLES_CHANGED = "villes_changed"
+
+
+class VilleCatalog:
+    """In-memory copy of the villes table (name -> id, id -> row).
+
+    Loaded at startup and reloaded lazily once invalidated by a committed
+    write, or after VILLES_CACHE_MAX_AGE seconds so that writes made by other
+    workers are eventually picked up. Every load bumps ``version``.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.version = 0
+        self._loaded_at: Optional[float] = None
+        self._by_name: Dict[str, int] = {}
+        self._by_id: Dict[int, dict] = {}
+        self._payload = b""
+        self._id_payloads: Dict[str, bytes] = {}
+        self._etag = ""
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > settings.VILLES_CACHE_MAX_AGE
+
+    def load(self, db: Session) -> None:
+        rows = [
+            {"idVille": id, "name": nom, "budget": budget}
+            for id, nom, budget in db.execute(select(Villes.id, Villes.nom, Villes.budget).order_by(Villes.id))
+        ]
+        payload = json.dumps({"villes": rows}, ensure_ascii=False, separators=(",", ":")).encode()
+        with self._lock:
+            self.version += 1
+            self._by_id = {row["idVille"]: row for row in rows}
+            self._by_name = {row["name"]: row["idVille"] for row in rows}
+            self._payload = payload
+            self._id_payloads = {
+                row["name"]: json.dumps({"idVille": row["idVille"]}).encode() for row in rows
+            }
+            self._etag = f'"{hashlib.sha1(payload).hexdigest()[:16]}"'
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if self._stale():
+            self.load(db)
+
+    def id_for(self, db: Session, name: str) -> Optional[int]:
+        self._ensure_loaded(db)
+        return self._by_name.get(name)
+
+    def get(self, db: Session, id: int) -> Optional[dict]:
+        self._ensure_loaded(db)
+        return self._by_id.get(id)
+
+    def payload(self, db: Session) -> tuple[bytes, str]:
+        """Serialized GET /villes/ body and its ETag"""
+        self._ensure_loaded(db)
+        with self._lock:
+            return self._payload, self._etag
+
+    def id_payload(self, db: Session, name: str) -> tuple[Optional[bytes], str]:
+        """Serialized GET /villes/{name}/id body (None if unknown) and the catalog ETag"""
+        self._ensure_loaded(db)
+        with self._lock:
+            return self._id_payloads.get(name), self._etag
+
+
+# Create a singleton instance
+ville_catalog = VilleCatalog()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_ville_changes(session, flush_context):
+    if any(isinstance(obj, Villes) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_VILLES_CHANGED] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_ville_statements(orm_execute_state):
+    # Bulk insert(Villes) / update(Villes) executed through the session
+    if not orm_execute_state.is_select and orm_execute_state.bind_mapper is Villes.__mapper__:
+        orm_execute_state.session.info[_VILLES_CHANGED] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop(_VILLES_CHANGED, False):
+        ville_catalog.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop(_VILLES_CHANGED, None)
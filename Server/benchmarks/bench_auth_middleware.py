@@ -0,0 +1,100 @@
+"""Per-request overhead of the token validation middleware.
+
+Calls a one-route app directly through ASGI (no server, no sockets) with:
+no middleware, the former @app.middleware("http") validate_token
+(BaseHTTPMiddleware), and TokenValidationMiddleware. Each is measured on a
+public path and on a protected path carrying a valid bearer token; the
+difference with "none" is the cost the middleware adds to every request.
+
+Usage (from Server/): python -m benchmarks.bench_auth_middleware
+"""
+import asyncio
+import time
+from datetime import timedelta
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+
+from app.core.auth_context import request_claims
+from app.core.auth_middleware import TokenValidationMiddleware
+from app.core.security import create_access_token
+from app.core.token_management import token_manager
+
+REQUESTS = 20000
+PUBLIC_PATHS = ["/user/signin", "/user/signup", "/auth/google", "/docs", "/openapi.json", "/redoc"]
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/user/signin")
+    @app.get("/villes")
+    async def endpoint():
+        return {"ok": True}
+
+    return app
+
+
+def with_base_http_middleware():
+    app = make_app()
+
+    @app.middleware("http")
+    async def validate_token(request: Request, call_next):
+        try:
+            if request.url.path in PUBLIC_PATHS:
+                return await call_next(request)
+            auth_header = request.headers.get('Authorization')
+            if auth_header and auth_header.startswith('Bearer '):
+                token = auth_header.split(' ')[1]
+                claims = request_claims(request, token)
+                if token_manager.is_token_invalid(token, claims):
+                    return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={})
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=status.HTTP_401_UNAUTHORIZED, content={})
+
+    return app
+
+
+def with_asgi_middleware():
+    app = make_app()
+    app.add_middleware(TokenValidationMiddleware, public_paths=PUBLIC_PATHS)
+    return app
+
+
+async def per_request(app, path, headers):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(500):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+async def main():
+    token = create_access_token({"sub": "a@example.com", "id": 1}, timedelta(minutes=30))
+    authorization = [(b"authorization", f"Bearer {token}".encode())]
+    apps = {"none": make_app(), "http": with_base_http_middleware(), "asgi": with_asgi_middleware()}
+
+    print(f"{REQUESTS} requests per case, microseconds per request")
+    for label, path, headers in (("public path", "/user/signin", []), ("bearer token", "/villes", authorization)):
+        timings = {name: await per_request(app, path, headers) for name, app in apps.items()}
+        print(f"{label:<13} none {timings['none']:6.1f}   "
+              f"@app.middleware {timings['http']:6.1f} (+{timings['http'] - timings['none']:.1f})   "
+              f"ASGI {timings['asgi']:6.1f} (+{timings['asgi'] - timings['none']:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
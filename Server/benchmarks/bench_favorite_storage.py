@@ -0,0 +1,127 @@
+"""Storage size and list latency of favorites: inline JSON vs shared compressed blobs.
+
+Seeds FAVORITES favorites drawn from DISTINCT_PLANS generated plans for one
+user, on a SQLite file database, in two layouts:
+
+  inline  each favorite carries its own copy of the plan (favorite_data),
+          and the list loads every body, as before plan_blobs
+  blobs   favorites reference a zlib-compressed plan_blobs row keyed by the
+          canonical JSON hash, and the list returns summaries only
+
+Usage (from Server/): python -m benchmarks.bench_favorite_storage
+"""
+import os
+import random
+import tempfile
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker, undefer
+
+from app.db.database import Base
+from app.db.models import User, Plans, Favorite, PlanBlob
+from app.db.pagination import DEFAULT_PAGE_SIZE, keyset
+from app.services.planBlobService import encodePlan
+
+FAVORITES = 5000
+DISTINCT_PLANS = 100
+RUNS = 20
+CITIES = ["Marrakech", "Agadir", "Essaouira", "Casablanca", "Fes", "Rabat", "Tangier", "Chefchaouen"]
+
+
+def sample_plan(rng: random.Random, idPlan: int) -> dict:
+    return {
+        "idPlan": idPlan,
+        "budget_tier": rng.choice(["Premium", "Standard", "Economy"]),
+        "plan": [
+            {
+                "city": city,
+                "hotel": {"name": f"Hotel {city} {rng.randint(1, 50)}", "pricePerNight": rng.randint(200, 2000), "totalPrice": 0},
+                "activities": [{"name": f"{city} activity {i}", "price": rng.randint(50, 500)} for i in range(6)],
+                "days_spent": rng.randint(1, 4),
+                "total_activities_cost": 0
+            }
+            for city in rng.sample(CITIES, 4)
+        ]
+    }
+
+
+def build(layout: str, path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Plans.__table__, PlanBlob.__table__, Favorite.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, nom="Bench", prenom="User", email="bench@example.com", password="x"))
+    db.add_all([Plans(id=i, dateCreation=date.today(), idUser=1) for i in range(1, DISTINCT_PLANS + 1)])
+    db.commit()
+
+    rng = random.Random(42)
+    plans = [sample_plan(rng, i) for i in range(1, DISTINCT_PLANS + 1)]
+    if layout == "blobs":
+        blobs = {blob.hash: blob for blob in map(encodePlan, plans)}
+        db.add_all(blobs.values())
+        hashes = [encodePlan(plan).hash for plan in plans]
+    for n in range(FAVORITES):
+        i = rng.randrange(DISTINCT_PLANS)
+        if layout == "inline":
+            db.add(Favorite(plan_id=i + 1, favorite_data=plans[i]))
+        else:
+            db.add(Favorite(plan_id=i + 1, blob_hash=hashes[i]))
+    db.commit()
+    db.close()
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+    return engine
+
+
+def list_inline(db, limit=None):
+    statement = select(Favorite).options(undefer(Favorite.favorite_data)).join(Plans).where(Plans.idUser == 1)
+    if limit:
+        statement = keyset(statement, Favorite.id, None, limit)
+    favorites = db.scalars(statement).all()
+    return [{"favorite_id": fav.id, "plan_id": fav.plan_id, "favorite_data": fav.favorite_data} for fav in favorites]
+
+
+def list_summaries(db, limit=None):
+    statement = (
+        select(Favorite.id, Favorite.plan_id, PlanBlob.summary)
+        .join(Plans).outerjoin(PlanBlob, Favorite.blob_hash == PlanBlob.hash)
+        .where(Plans.idUser == 1)
+    )
+    if limit:
+        statement = keyset(statement, Favorite.id, None, limit)
+    return [{"favorite_id": row.id, "plan_id": row.plan_id, "summary": row.summary} for row in db.execute(statement)]
+
+
+def timed(engine, listing):
+    Session = sessionmaker(bind=engine)
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        db = Session()
+        listing(db)
+        db.close()
+    return (time.perf_counter() - start) / RUNS * 1000
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    print(f"{FAVORITES} favorites of {DISTINCT_PLANS} distinct plans, {RUNS} runs")
+    print(f"{'layout':<8}{'db size (KiB)':>15}{'list all (ms)':>16}{'page of 50 (ms)':>18}")
+
+    inline_path = os.path.join(directory, "inline.db")
+    engine = build("inline", inline_path)
+    all_ms = timed(engine, list_inline)
+    page_ms = timed(engine, lambda db: list_inline(db, DEFAULT_PAGE_SIZE))
+    print(f"{'inline':<8}{os.path.getsize(inline_path) / 1024:>15,.0f}{all_ms:>16.2f}{page_ms:>18.2f}")
+    engine.dispose()
+
+    blobs_path = os.path.join(directory, "blobs.db")
+    engine = build("blobs", blobs_path)
+    all_ms = timed(engine, list_summaries)
+    page_ms = timed(engine, lambda db: list_summaries(db, DEFAULT_PAGE_SIZE))
+    print(f"{'blobs':<8}{os.path.getsize(blobs_path) / 1024:>15,.0f}{all_ms:>16.2f}{page_ms:>18.2f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
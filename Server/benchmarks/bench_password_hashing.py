@@ -0,0 +1,76 @@
+"""Login throughput and latency with bcrypt on the event loop vs in the pool.
+
+Runs CONCURRENT logins (one bcrypt verify each) at once on a single event
+loop, with a heartbeat coroutine measuring how late the loop wakes it up:
+the delay every other request on the worker would see. "inline" verifies
+on the loop, as signup used to hash; "pool" awaits PasswordHasher.
+
+Usage (from Server/): python -m benchmarks.bench_password_hashing
+"""
+import asyncio
+import statistics
+import time
+
+from app.core.password_hasher import PasswordHasher
+
+ROUNDS = 10
+WORKERS = 4
+CONCURRENT = 32
+HEARTBEAT = 0.005
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def heartbeat(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(time.perf_counter() - start - HEARTBEAT)
+
+
+async def run(verify):
+    latencies, lags, stop = [], [], asyncio.Event()
+
+    async def login():
+        await verify()
+        # From arrival: every login is received at ``start``
+        latencies.append(time.perf_counter() - start)
+
+    ticker = asyncio.create_task(heartbeat(lags, stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(CONCURRENT)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return elapsed, latencies, lags or [elapsed]
+
+
+def report(name, elapsed, latencies, lags):
+    print(f"{name:<7} {CONCURRENT / elapsed:8.1f} logins/s"
+          f"   login p50 {statistics.median(latencies) * 1000:7.1f} ms"
+          f"   p99 {percentile(latencies, 0.99) * 1000:7.1f} ms"
+          f"   loop lag p99 {percentile(lags, 0.99) * 1000:7.1f} ms")
+
+
+async def main():
+    hasher = PasswordHasher(rounds=ROUNDS, workers=WORKERS)
+    hashed = hasher.hash("correct horse battery staple")
+
+    async def inline():
+        hasher.context.verify("correct horse battery staple", hashed)
+
+    async def pooled():
+        await hasher.verify_async("correct horse battery staple", hashed)
+
+    print(f"bcrypt cost {ROUNDS}, {CONCURRENT} concurrent logins, {WORKERS} hashing threads")
+    report("inline", *await run(inline))
+    report("pool", *await run(pooled))
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Commits and latency to persist one generated plan (3 tiers).
+
+Compares the row-by-row services (createHotelService, addActivite,
+createItineraireService, addVilleItineraire, createUserPlanService) with
+persistGeneratedPlans on an in-memory SQLite database.
+
+Usage (from Server/): python -m benchmarks.bench_plan_persistence
+"""
+import time
+from datetime import date
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.models import User, Plans, Villes, Hotels, Activities, Itineraires, VilleItineraire, UserPlan
+from app.services.activiteService import addActivite
+from app.services.hotelService import createHotelService
+from app.services.ItineraireService import createItineraireService, addVilleItineraire
+from app.services.PlanPersistenceService import persistGeneratedPlans
+from app.services.UserPlanService import createUserPlanService
+from app.services.VilleService import getOrCreateVilleIds
+
+CITIES = ["Marrakech", "Agadir", "Essaouira", "Casablanca"]
+TIERS = ["Premium", "Standard", "Economy"]
+ACTIVITIES_PER_CITY = 4
+RUNS = 20
+
+
+def sample_plans():
+    return [
+        {
+            "budget_tier": tier,
+            "plan": [
+                {
+                    "city": city,
+                    "hotel": {"name": f"{tier} hotel {city}", "pricePerNight": 500.0, "totalPrice": 1000.0},
+                    "activities": [{"name": f"{city} activity {i}", "price": 100} for i in range(ACTIVITIES_PER_CITY)],
+                    "days_spent": 2,
+                    "total_activities_cost": 100 * ACTIVITIES_PER_CITY
+                }
+                for city in CITIES
+            ]
+        }
+        for tier in TIERS
+    ]
+
+
+def persist_row_by_row(db, idPlan, generated_plans):
+    villes = getOrCreateVilleIds(db, CITIES)
+    db.commit()
+    for tier in generated_plans:
+        for stop in tier["plan"]:
+            idVille = villes[stop["city"]]
+            hotel = createHotelService(db, Hotels(nom=stop["hotel"]["name"], cout=stop["hotel"]["pricePerNight"], idVille=idVille))
+            for activity in stop["activities"]:
+                new_activity = Activities(nom=activity["name"], cout=activity["price"], idVille=idVille)
+                addActivite(db, new_activity)
+                itineraire = Itineraires(
+                    id_activite=new_activity.id,
+                    id_hotel=hotel.id,
+                    time_spent_by_ville=stop["days_spent"],
+                    budget=stop["hotel"]["totalPrice"] + stop["total_activities_cost"]
+                )
+                createItineraireService(db, itineraire)
+                link = addVilleItineraire(db, idVille, itineraire.id)
+                createUserPlanService(db, UserPlan(idPlan=idPlan, idVilleItineraire=link.id))
+
+
+def measure(persist):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[model.__table__ for model in
+                                                  (User, Plans, Villes, Hotels, Activities, Itineraires, VilleItineraire, UserPlan)])
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    user = User(nom="Bench", prenom="User", email="bench@example.com", password="x")
+    db.add(user)
+    db.commit()
+
+    commits, statements, elapsed = 0, 0, 0.0
+    for _ in range(RUNS):
+        plan = Plans(dateCreation=date.today(), idUser=user.id)
+        db.add(plan)
+        db.commit()
+
+        counters = {"commit": 0, "statement": 0}
+        on_commit = lambda conn: counters.__setitem__("commit", counters["commit"] + 1)
+        on_statement = lambda *args: counters.__setitem__("statement", counters["statement"] + 1)
+        event.listen(engine, "commit", on_commit)
+        event.listen(engine, "before_cursor_execute", on_statement)
+        start = time.perf_counter()
+        persist(db, plan.id, sample_plans())
+        elapsed += time.perf_counter() - start
+        event.remove(engine, "commit", on_commit)
+        event.remove(engine, "before_cursor_execute", on_statement)
+        commits += counters["commit"]
+        statements += counters["statement"]
+
+    db.close()
+    engine.dispose()
+    return commits / RUNS, statements / RUNS, elapsed / RUNS * 1000
+
+
+def main():
+    print(f"{len(TIERS)} tiers x {len(CITIES)} cities x {ACTIVITIES_PER_CITY} activities, {RUNS} runs")
+    print(f"{'pipeline':<14}{'commits/plan':>14}{'statements/plan':>18}{'ms/plan':>10}")
+    for name, persist in (("row-by-row", persist_row_by_row), ("bulk", persistGeneratedPlans)):
+        commits, statements, ms = measure(persist)
+        print(f"{name:<14}{commits:>14.1f}{statements:>18.1f}{ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
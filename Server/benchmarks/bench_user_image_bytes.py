@@ -0,0 +1,81 @@
+"""Bytes read from the database per authenticated request.
+
+Every authenticated route runs get_current_user, which loads the User row.
+This compares the row as it was loaded before User.image was deferred
+(image eagerly included) with the current mapping, for a user with a 5 MB
+profile picture, on a SQLite file database.
+
+Usage (from Server/): python -m benchmarks.bench_user_image_bytes
+"""
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, undefer
+
+from app.db.database import Base
+from app.db.models import User
+from app.services.user_service import get_user_image
+
+IMAGE_SIZE = 5 * 1024 * 1024
+RUNS = 50
+
+
+def bytes_read(engine, run):
+    """Size of every value fetched by the statements ``run`` emits"""
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", listener)
+    run()
+    event.remove(engine, "before_cursor_execute", listener)
+
+    total = 0
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for statement, parameters in statements:
+            for row in cursor.execute(statement, parameters).fetchall():
+                total += sum(len(value) if isinstance(value, (bytes, str)) else 8 for value in row if value is not None)
+    finally:
+        raw.close()
+    return total
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(User(id=1, nom="Bench", prenom="User", email="bench@example.com", password="x",
+                image=os.urandom(IMAGE_SIZE), image_type="image/jpeg"))
+    db.commit()
+    db.close()
+
+    cases = {
+        "auth (eager image)": lambda db: db.query(User).options(undefer(User.image)).filter(User.id == 1).first(),
+        "auth (deferred)": lambda db: db.query(User).filter(User.id == 1).first(),
+        "/profile/image": lambda db: get_user_image(db, 1),
+    }
+
+    print(f"user with a {IMAGE_SIZE // (1024 * 1024)} MB image, {RUNS} runs")
+    print(f"{'request':<22}{'bytes/request':>16}{'ms/request':>12}")
+    for name, load in cases.items():
+        def run():
+            db = Session()
+            load(db)
+            db.close()
+
+        read = bytes_read(engine, run)
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            run()
+        ms = (time.perf_counter() - start) / RUNS * 1000
+        print(f"{name:<22}{read:>16,}{ms:>12.3f}")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,34 @@
-from fastapi import FastAPI, Request, HTTPException , status
+from fastapi import FastAPI, HTTPException
 
 from app.routes.auth_routes import router as user_router
 # from app.routes.auth_routes import router as auth_router
 # from app.routes.auth_routes import router as auth_router
-from app.db.database import engine, Base, SessionLocal
+from app.db.database import engine, Base, SessionLocal, async_engine
 from app.db.models import Villes
 from app.Ai.router import plans_router
 from app.controllers.trip_controller import router as trip_router
 from app.services.trip_planner import TripPlannerService
 from app.controllers.google_auth_controller import router as google_auth_router
 from app.controllers.logout_controller import router as logout_router
+from app.controllers.metrics_controller import router as metrics_router
 from app.core.token_management import token_manager
+from app.core.auth_middleware import TokenValidationMiddleware
+from app.core.body_limit import BodySizeLimitMiddleware, MULTIPART_OVERHEAD
+from app.core.google_certs import google_certs
+from app.core.rate_limit import RateLimitExceeded
+from app.core.config import settings
+from app.Ai.datasets import dataset_registry
+from app.services.villeCatalogService import ville_catalog
+from app.services.thumbnails import thumbnail_service
+from app.core.password_hasher import password_hasher
+from app.services.email_outbox import email_outbox
 from app.core.exception_handlers import (
     http_exception_handler,
+    rate_limit_exception_handler,
     validation_exception_handler,
     generic_exception_handler
 )
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from starlette.status import HTTP_401_UNAUTHORIZED
 
 
 # Create tables in the database
@@ -32,7 +42,6 @@ import logging
 from app.controllers.user_controller import router as user_profile_router
 
 logging.basicConfig(level=logging.INFO)
-logging.getLogger('sqlalchemy').setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 
 
@@ -40,56 +49,28 @@ app = FastAPI()
 
 #  exception handlers
 app.add_exception_handler(HTTPException, http_exception_handler)
+app.add_exception_handler(RateLimitExceeded, rate_limit_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(Exception, generic_exception_handler)
 
 
-@app.middleware("http")
-async def validate_token(request: Request, call_next):
-    """Middleware to check if a token has been invalidated"""
-    try:
-        # Skip token validation for non-protected routes
-        if request.url.path in [
-            "/user/signin",
-            "/user/signup",
-            "/auth/google",
-            "/docs",
-            "/openapi.json",
-            "/redoc"
-        ]:
-            return await call_next(request)
-
-        auth_header = request.headers.get('Authorization')
-        if auth_header and auth_header.startswith('Bearer '):
-            token = auth_header.split(' ')[1]
-
-            # Check if token is invalidated
-            if token_manager.is_token_invalid(token):
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={
-                        "detail": {
-                            "message": "Token has been invalidated. Please login again.",
-                            "code": "INVALID_TOKEN"
-                        }
-                    }
-                )
-
-        response = await call_next(request)
-        return response
+# Rejects revoked tokens; these paths are served without a token check
+PUBLIC_PATHS = {
+    "/user/signin",
+    "/user/signup",
+    "/auth/google",
+    "/docs",
+    "/openapi.json",
+    "/redoc"
+}
+app.add_middleware(TokenValidationMiddleware, public_paths=PUBLIC_PATHS)
+
+# Oversized uploads are refused before they are spooled
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/user/profile/image": settings.PROFILE_IMAGE_MAX_BYTES + MULTIPART_OVERHEAD}
+)
 
-    except Exception as e:
-        logger.error(f"Error in token validation middleware: {str(e)}")
-        return JSONResponse(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            content={
-                "detail": {
-                    "message": "Authentication failed",
-                    "code": "AUTH_ERROR",
-                    "error": str(e)
-                }
-            }
-        )
 # Include user-related routes
 app.include_router(trip_router)
 app.include_router(user_router, prefix="/user", tags=["Authentication moad"])
@@ -142,6 +123,9 @@ def startup_event():
             db.commit()
             print("Initial cities data has been added successfully!")
 
+        # Warm the in-memory city catalog served by /villes/
+        ville_catalog.load(db)
+
     except Exception as e:
         print(f"Error adding initial data: {e}")
         db.rollback()
@@ -149,6 +133,24 @@ def startup_event():
     finally:
         db.close()
 
+    # Pick up dataset edits without a redeploy
+    if settings.DATASET_WATCH_INTERVAL > 0:
+        dataset_registry.start_watcher(settings.DATASET_WATCH_INTERVAL)
+    token_manager.start_sweeper(settings.TOKEN_SWEEP_INTERVAL, settings.TOKEN_REVOCATION_REFRESH_INTERVAL)
+    google_certs.start_refresher()
+    email_outbox.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    dataset_registry.stop_watcher()
+    token_manager.stop_sweeper()
+    google_certs.stop_refresher()
+    thumbnail_service.shutdown()
+    password_hasher.shutdown()
+    await email_outbox.stop()
+    await async_engine.dispose()
+
 
 
 app.include_router(preferences_router)
@@ -158,3 +160,4 @@ app.include_router(chatbot_router, prefix="/api/chat", tags=["chat"])
 app.include_router(user_profile_router, prefix="/user", tags=["user"])
 app.include_router(google_auth_router, tags=["Authentication moad"])
 app.include_router(logout_router, prefix="/user", tags=["Authentication moad"])
+app.include_router(metrics_router, tags=["Metrics"])
@@ -3,4 +3,84 @@ import sys
 import os
 
 # Add the parent directory (server) to Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
\ No newline at end of file
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.controllers.auth_controller import get_current_user
+from app.controllers.user_controller import router as user_profile_router
+from app.core.body_limit import BodySizeLimitMiddleware
+from app.db.database import Base, get_db
+from app.db.models import User
+from app.services.blob_store import blob_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "root", tmp_path / "blobs")
+    return blob_store
+
+
+@pytest.fixture
+def legacy_image():
+    """Profile picture of user 1, still stored in the users row"""
+    return b"\x89PNG" + b"\x00" * 4096
+
+
+@pytest.fixture
+def engine(legacy_image):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, nom="Test", prenom="User", email="test@example.com", password="x",
+                image=legacy_image, image_type="image/png"))
+    db.add(User(id=2, nom="No", prenom="Image", email="noimage@example.com", password="x"))
+    db.commit()
+    db.close()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+    listener = lambda conn, cursor, statement, *args: executed.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    yield executed
+    event.remove(engine, "before_cursor_execute", listener)
+
+
+@pytest.fixture
+def make_client():
+    """Builds a TestClient of the /user profile routes, logged in as ``user_id``"""
+    def make(engine, user_id, body_limits=None):
+        TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+        def override_get_db():
+            db = TestingSessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        # Same User query as get_current_user, without the token round trip
+        def override_get_current_user(db=Depends(get_db)):
+            return db.query(User).filter(User.id == user_id).first()
+
+        app = FastAPI()
+        app.include_router(user_profile_router, prefix="/user")
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_user] = override_get_current_user
+        if body_limits:
+            app.add_middleware(BodySizeLimitMiddleware, limits=body_limits)
+        return TestClient(app)
+
+    return make
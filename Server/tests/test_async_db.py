@@ -0,0 +1,190 @@
+import asyncio
+import pytest
+from datetime import date
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.controllers.auth_controller import get_current_user
+from app.controllers.preferencesController import router as preferences_router
+import app.controllers.preferencesController as preferences_controller
+from app.db.database import Base, async_database_url, get_async_db
+from app.db.models import User, Plans, Favorite, PlanBlob
+from app.services.planBlobService import deleteOrphanPlanBlob, storePlanBlob
+
+
+@pytest.mark.parametrize("url,expected", [
+    ("postgresql://u:p@db:5432/tourism", "postgresql+asyncpg://u:p@db:5432/tourism"),
+    ("postgresql+psycopg2://u:p@db/tourism", "postgresql+asyncpg://u:p@db/tourism"),
+    ("postgresql://u:p@db/tourism?sslmode=require", "postgresql+asyncpg://u:p@db/tourism?ssl=require"),
+    ("sqlite:///./test.db", "sqlite+aiosqlite:///./test.db"),
+])
+def test_async_database_url(url, expected):
+    assert async_database_url(url) == expected
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Plans.__table__, PlanBlob.__table__, Favorite.__table__])
+    db = sessionmaker(bind=engine)()
+    user = User(id=1, nom="Test", prenom="User", email="test@example.com", password="x")
+    db.add_all([user, Plans(id=10, dateCreation=date.today(), idUser=1)])
+    db.commit()
+    db.close()
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def client(database_url, monkeypatch):
+    async_engine = create_async_engine(async_database_url(database_url))
+    TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    monkeypatch.setattr(preferences_controller, "AsyncSessionLocal", TestingAsyncSessionLocal)
+
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(preferences_router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="test@example.com")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class TestAsyncFavorites:
+    def test_add_list_delete_favorite(self, client):
+        added = client.post("/preferencesFavorites/", json={"idPlan": 10, "budget_tier": "Economy"})
+        assert added.status_code == 200
+
+        response = client.get("/preferencesFavorites/")
+        assert response.status_code == 200
+        favorites = response.json()["data"]
+        assert [(f["plan_id"], f["favorite_data"]["budget_tier"]) for f in favorites] == [(10, "Economy")]
+        assert added.json()["favorite_id"] == favorites[0]["favorite_id"]
+
+        response = client.delete(f"/preferencesFavorites/{favorites[0]['favorite_id']}/")
+        assert response.status_code == 200
+        assert client.get("/preferencesFavorites/").json() == []
+
+    def test_favorites_are_paginated_by_id(self, client):
+        for tier in ("Premium", "Standard", "Economy", "Budget", "Luxury"):
+            client.post("/preferencesFavorites/", json={"idPlan": 10, "budget_tier": tier})
+
+        tiers, cursor = [], None
+        while True:
+            params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+            page = client.get("/preferencesFavorites/", params=params).json()
+            assert len(page["data"]) <= 2
+            tiers += [fav["favorite_data"]["budget_tier"] for fav in page["data"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert tiers == ["Premium", "Standard", "Economy", "Budget", "Luxury"]
+
+        assert client.get("/preferencesFavorites/", params={"limit": 500}).status_code == 422
+
+    def test_export_streams_every_favorite(self, client, monkeypatch):
+        monkeypatch.setattr(preferences_controller, "MAX_PAGE_SIZE", 2)
+        for i in range(5):
+            client.post("/preferencesFavorites/", json={"idPlan": 10, "budget_tier": f"tier {i}"})
+
+        response = client.get("/preferencesFavorites/export")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["message"] == "Favoris récupérés avec succès"
+        assert [fav["favorite_data"]["budget_tier"] for fav in body["data"]] == [f"tier {i}" for i in range(5)]
+
+    def test_favorites_scoped_to_current_user(self, client, database_url):
+        engine = create_engine(database_url)
+        db = sessionmaker(bind=engine)()
+        db.add_all([User(id=2, nom="Other", prenom="User", email="other@example.com", password="x"),
+                    Plans(id=20, dateCreation=date.today(), idUser=2),
+                    Favorite(plan_id=20, favorite_data={"budget_tier": "Other"})])
+        db.commit()
+        db.close()
+        engine.dispose()
+
+        assert client.get("/preferencesFavorites/").json() == []
+        assert client.get("/preferencesFavorites/export").json()["data"] == []
+
+    def test_identical_plans_share_one_blob(self, client, database_url):
+        plan = {"idPlan": 10, "budget_tier": "Premium", "plan": [{"city": "Fès", "hotel": {"name": "Riad"}}]}
+        client.post("/preferencesFavorites/", json=plan)
+        # Same plan, keys in another order
+        client.post("/preferencesFavorites/", json=dict(reversed(list(plan.items()))))
+
+        favorites = client.get("/preferencesFavorites/").json()["data"]
+        assert [fav["favorite_data"] for fav in favorites] == [{"idPlan": 10, "budget_tier": "Premium", "plan": [{"city": "Fès"}]}] * 2
+
+        engine = create_engine(database_url)
+        with engine.connect() as conn:
+            assert conn.scalar(select(func.count()).select_from(PlanBlob)) == 1
+
+            detail = client.get(f"/preferencesFavorites/{favorites[0]['favorite_id']}/").json()
+            assert detail["favorite_data"] == plan
+
+            client.delete(f"/preferencesFavorites/{favorites[0]['favorite_id']}/")
+            assert conn.scalar(select(func.count()).select_from(PlanBlob)) == 1
+            client.delete(f"/preferencesFavorites/{favorites[1]['favorite_id']}/")
+            assert conn.scalar(select(func.count()).select_from(PlanBlob)) == 0
+        engine.dispose()
+
+    def test_legacy_inline_favorite_still_readable(self, client, database_url):
+        engine = create_engine(database_url)
+        db = sessionmaker(bind=engine)()
+        favorite = Favorite(plan_id=10, favorite_data={"budget_tier": "Legacy"})
+        db.add(favorite)
+        db.commit()
+        favorite_id = favorite.id
+        db.close()
+        engine.dispose()
+
+        assert client.get(f"/preferencesFavorites/{favorite_id}/").json()["favorite_data"] == {"budget_tier": "Legacy"}
+        assert client.get("/preferencesFavorites/export").json()["data"][0]["favorite_data"] == {"budget_tier": "Legacy"}
+        assert client.get("/preferencesFavorites/999/").status_code == 404
+
+
+def test_delete_racing_an_add_of_the_same_plan_keeps_the_blob(database_url):
+    plan = {"idPlan": 10, "budget_tier": "Premium", "plan": [{"city": "Fès"}]}
+
+    async def scenario():
+        engine = create_async_engine(async_database_url(database_url))
+        Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+        async with Session() as db:
+            old = Favorite(plan_id=10, blob_hash=await storePlanBlob(db, plan))
+            db.add(old)
+            await db.commit()
+
+        async with Session() as adding, Session() as deleting:
+            # The add finds the blob stored...
+            blob_hash = await storePlanBlob(adding, plan)
+
+            async def delete_last_favorite():
+                favorite = await deleting.get(Favorite, old.id)
+                await deleting.delete(favorite)
+                await deleting.flush()
+                await deleteOrphanPlanBlob(deleting, favorite.blob_hash)
+                await deleting.commit()
+
+            # ...while the last favorite using it is deleted
+            deletion = asyncio.create_task(delete_last_favorite())
+            await asyncio.sleep(0.2)
+            adding.add(Favorite(plan_id=10, blob_hash=blob_hash))
+            await adding.commit()
+            await deletion
+
+        async with Session() as db:
+            favorites = (await db.scalars(select(Favorite))).all()
+            blobs = (await db.scalars(select(PlanBlob.hash))).all()
+        await engine.dispose()
+        return favorites, blobs
+
+    favorites, blobs = asyncio.run(scenario())
+    assert len(favorites) == 1
+    assert blobs == [favorites[0].blob_hash]
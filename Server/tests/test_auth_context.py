@@ -0,0 +1,136 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from jose import jwt
+from sqlalchemy.orm import sessionmaker
+
+import app.core.security as security
+from app.controllers.auth_controller import get_current_user, signin
+from app.core.auth_context import VerifiedTokenCache, user_snapshots, verified_tokens
+from app.core.password_hasher import password_hasher
+from app.core.security import create_access_token
+from app.db.database import get_db
+from app.db.models import User
+from app.schemas.user import UserLogin, UserUpdate
+from app.services.user_service import update_user_image, update_user_profile
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    verified_tokens.clear()
+    user_snapshots.clear()
+    yield
+    verified_tokens.clear()
+    user_snapshots.clear()
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting_decode)
+    return calls
+
+
+@pytest.fixture
+def client(engine):
+    TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+
+    @app.post("/signin")
+    def sign_in(user: UserLogin, db=Depends(get_db)):
+        return signin(user, db)
+
+    @app.get("/me")
+    def me(current_user=Depends(get_current_user)):
+        # get_current_user returns its error responses instead of raising
+        if isinstance(current_user, JSONResponse):
+            return current_user
+        return {"id": current_user.id, "email": current_user.email, "image_hash": current_user.image_hash}
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def bearer(email="test@example.com", user_id=1, minutes=5):
+    token = create_access_token({"sub": email, "id": user_id}, timedelta(minutes=minutes))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_token_verified_and_user_loaded_once(client, statements, decodes):
+    headers = bearer()
+    for _ in range(3):
+        response = client.get("/me", headers=headers)
+        assert response.json() == {"id": 1, "email": "test@example.com", "image_hash": None}
+
+    assert len(decodes) == 1
+    assert sum("FROM users" in statement for statement in statements) == 1
+
+
+def test_profile_change_invalidates_snapshot(client, engine):
+    headers = bearer()
+    client.get("/me", headers=headers)
+
+    db = sessionmaker(bind=engine)()
+    asyncio.run(update_user_image(db, 1, "ab" * 32, "image/png"))
+    db.close()
+
+    assert client.get("/me", headers=headers).json()["image_hash"] == "ab" * 32
+
+
+def test_token_for_other_email_is_rejected(client):
+    client.get("/me", headers=bearer())
+    response = client.get("/me", headers=bearer(email="someone@example.com"))
+    assert response.status_code == 404
+
+
+def test_cached_claims_expire_with_the_token():
+    cache = VerifiedTokenCache(maxsize=10, ttl=300)
+    token = create_access_token({"sub": "a@example.com", "id": 1}, timedelta(seconds=1))
+    assert cache.claims(token)["id"] == 1
+
+    time.sleep(1.1)
+    with pytest.raises(HTTPException):
+        cache.claims(token)
+
+
+def test_signin_with_other_casing_then_me(client, engine):
+    db = sessionmaker(bind=engine)()
+    db.query(User).filter(User.id == 1).update({"password": password_hasher.hash("Password123!")})
+    db.commit()
+    db.close()
+
+    response = client.post("/signin", json={"email": "Test@Example.com", "password": "Password123!"})
+    token = response.json()["access_token"]
+
+    response = client.get("/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["email"] == "test@example.com"
+
+
+def test_profile_email_is_stored_lowercase(client, engine):
+    db = sessionmaker(bind=engine)()
+    assert update_user_profile(db, 1, UserUpdate(email="New.Address@Example.com")).email == "new.address@example.com"
+    db.close()
+
+    response = client.get("/me", headers=bearer(email="new.address@example.com"))
+    assert response.json()["email"] == "new.address@example.com"
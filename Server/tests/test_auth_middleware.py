@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.auth_context import verified_tokens
+from app.core.auth_middleware import TokenValidationMiddleware, bearer_token
+from app.core.security import create_access_token
+from app.core.token_management import token_manager
+from app.core.token_revocation import MemoryRevocationBackend
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(TokenValidationMiddleware, public_paths={"/user/signin"})
+
+    @app.get("/claims")
+    def claims(request: Request):
+        return {"claims": getattr(request.state, "claims", None)}
+
+    @app.get("/user/signin")
+    def signin(request: Request):
+        return {"claims": getattr(request.state, "claims", None)}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a", b"b", b"c"]))
+
+    verified_tokens.clear()
+    with TestClient(app) as test_client:
+        yield test_client
+    verified_tokens.clear()
+
+
+def bearer(user_id=1):
+    token = create_access_token({"sub": "a@example.com", "id": user_id}, timedelta(minutes=5))
+    return token, {"Authorization": f"Bearer {token}"}
+
+
+def test_bearer_token_from_raw_headers():
+    assert bearer_token([(b"host", b"x"), (b"authorization", b"Bearer abc")]) == "abc"
+    assert bearer_token([(b"authorization", b"Basic abc")]) is None
+    assert bearer_token([]) is None
+
+
+def test_claims_left_for_the_routes(client):
+    token, headers = bearer()
+    assert client.get("/claims", headers=headers).json()["claims"]["id"] == 1
+    # Public paths are not even decoded
+    assert client.get("/user/signin", headers=headers).json()["claims"] is None
+    assert client.get("/claims").json()["claims"] is None
+
+
+def test_revoked_token_rejected(client, monkeypatch):
+    monkeypatch.setattr(token_manager, "backend", MemoryRevocationBackend())
+    token, headers = bearer(user_id=41)
+    token_manager.invalidate_token(token, 41)
+    response = client.get("/claims", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"]["code"] == "INVALID_TOKEN"
+
+
+def test_invalid_token_passed_to_the_routes(client):
+    response = client.get("/claims", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 200
+    assert response.json()["claims"] is None
+
+
+def test_streaming_response_untouched(client):
+    _, headers = bearer()
+    assert client.get("/stream", headers=headers).content == b"abc"
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.Ai.compiled_dataset import shortest_paths
+from app.Ai.datasets import DatasetRegistry
+
+
+def write_datasets(tmp_path, hotel_price):
+    tourism_path = tmp_path / "tourism.xlsx"
+    transport_path = tmp_path / "transport.xlsx"
+    pd.DataFrame({
+        "Ville": ["Agadir", "Agadir", "Rabat"],
+        "Nom de l'élément": ["Ayour", "Littoral", "Balima"],
+        "classement": ["1*", "1*", "3*"],
+        "Coût (MAD)": [hotel_price, 150.0, 600.0],
+        "Type de donnée": ["Hôtel", "Hôtel", "Hôtel"],
+    }).to_excel(tourism_path, index=False)
+    pd.DataFrame({
+        "Ville de départ": ["Agadir", "Rabat", "Rabat", "Fès"],
+        "Ville d'arrivée": ["Rabat", "Agadir", "Fès", "Rabat"],
+        "Distance (km)": [600, 600, 200, 200],
+        "Temps de transport (h)": [8, 8, 3, 3],
+        "Moyen de transport recommandé": ["Bus", "Bus", "Train", "Train"],
+    }).to_excel(transport_path, index=False)
+    return str(tourism_path), str(transport_path)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return DatasetRegistry(*write_datasets(tmp_path, 200.0), cache_dir=str(tmp_path / "compiled"))
+
+
+class TestDatasetRegistry:
+    def test_snapshot_indexes(self, registry):
+        snapshot = registry.current
+        assert list(snapshot.hotel_costs("Agadir")) == [150.0, 200.0]
+        assert len(snapshot.hotel_costs("Unknown")) == 0
+        start, end = snapshot.hotel_bounds("Agadir")
+        assert [snapshot.hotel_name_at(i) for i in range(start, end)] == ["Littoral", "Ayour"]
+        assert snapshot.distance("Agadir", "Rabat") == 600.0
+        assert snapshot.distance("Agadir", "Ouarzazate") is None
+
+    def test_reload_swaps_snapshot(self, registry, tmp_path):
+        pinned = registry.current
+        write_datasets(tmp_path, 999.0)
+
+        reloaded = registry.reload_in_background().result(timeout=30)
+
+        assert reloaded is registry.current
+        assert reloaded.version != pinned.version
+        assert list(reloaded.hotel_costs("Agadir")) == [150.0, 999.0]
+        # A plan that pinned the old snapshot keeps its view
+        assert list(pinned.hotel_costs("Agadir")) == [150.0, 200.0]
+
+    def test_missing_links_use_shortest_route(self, registry):
+        snapshot = registry.current
+        # No direct Agadir <-> Fès link: route through Rabat
+        assert snapshot.distance("Agadir", "Fès") == 800.0
+        assert snapshot.distance("Fès", "Agadir") == 800.0
+        # The tourism dataset's spelling resolves to the same city
+        assert snapshot.distance("Agadir", "Fes") == 800.0
+        assert snapshot.distance("Rabat", "Rabat") is None
+
+    def test_workers_share_compiled_arrays(self, registry, tmp_path):
+        other_worker = DatasetRegistry(
+            registry.tourism_path, registry.transport_path, cache_dir=registry.cache_dir
+        )
+        snapshot = other_worker.current
+        assert snapshot.version == registry.current.version
+        assert isinstance(snapshot.hotel_cost, np.memmap)
+        assert snapshot.hotel_cost.filename == registry.current.hotel_cost.filename
+        assert not snapshot.hotel_cost.flags.writeable
+
+    def test_reload_without_changes_keeps_snapshot(self, registry):
+        pinned = registry.current
+        assert registry.reload() is pinned
+
+
+def test_shortest_paths_prefers_cheaper_multi_hop():
+    nan = np.nan
+    direct = np.array([
+        [nan, 100.0, 500.0, nan],
+        [100.0, nan, 100.0, nan],
+        [500.0, 100.0, nan, nan],
+        [nan, nan, nan, nan],
+    ])
+    routes = shortest_paths(direct)
+    assert routes[0, 2] == 200.0
+    assert np.isnan(routes[0, 3])
+    assert np.isnan(routes[0, 0])
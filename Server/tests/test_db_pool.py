@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.controllers.metrics_controller import router as metrics_router
+from app.core.config import settings
+from app.db.database import async_database_url, pool_options
+from app.db.pool_metrics import PoolMetrics, pool_metrics
+
+
+@pytest.fixture
+def pool_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 1)
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", True)
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+
+def make_engine(url, metrics):
+    engine = create_engine(url, **pool_options(url, metrics))
+    metrics.attach(engine)
+    return engine
+
+
+class TestPoolOptions:
+    def test_in_memory_sqlite_keeps_default_pool(self):
+        assert pool_options("sqlite://", PoolMetrics("test")) == {}
+        assert pool_options("sqlite:///:memory:", PoolMetrics("test")) == {}
+
+    def test_settings_applied(self, pool_settings, database_url):
+        options = pool_options("postgresql://u:p@db/tourism", PoolMetrics("test"))
+        assert options["pool_size"] == 2
+        assert options["max_overflow"] == 1
+        assert options["pool_pre_ping"] is True
+
+        engine = make_engine(database_url, PoolMetrics("test"))
+        assert engine.pool.size() == 2
+        assert engine.pool._max_overflow == 1
+
+
+class TestPoolStress:
+    def test_concurrent_checkouts_wait_and_are_counted(self, pool_settings, database_url):
+        metrics = PoolMetrics("test")
+        engine = make_engine(database_url, metrics)
+
+        def worker():
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=worker) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        snapshot = metrics.snapshot()
+        assert snapshot["checkouts"] == 12
+        assert snapshot["timeouts"] == 0
+        # pool_size + max_overflow connections at most
+        assert snapshot["peak_in_use"] == 3
+        assert snapshot["connects"] <= 3
+        assert snapshot["in_use"] == 0
+        # 12 workers on 3 connections: some of them queued
+        assert snapshot["wait_max_ms"] >= 40
+        assert sum(snapshot["wait_histogram"].values()) == 12
+        engine.dispose()
+
+    def test_exhausted_pool_times_out(self, pool_settings, database_url):
+        metrics = PoolMetrics("test")
+        engine = make_engine(database_url, metrics)
+        engine.pool._timeout = 0.1
+
+        held = [engine.connect() for _ in range(3)]
+        snapshot = metrics.snapshot()
+        assert snapshot["in_use"] == 3
+        assert snapshot["overflow"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        assert metrics.snapshot()["timeouts"] == 1
+
+        for conn in held:
+            conn.close()
+        engine.dispose()
+
+    def test_metrics_follow_pool_after_dispose(self, pool_settings, database_url):
+        metrics = PoolMetrics("test")
+        engine = make_engine(database_url, metrics)
+        engine.dispose()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert metrics.snapshot()["checkouts"] == 1
+        assert metrics.snapshot()["connects"] == 1
+        engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_async_pool(self, pool_settings, database_url):
+        metrics = PoolMetrics("test")
+        engine = create_async_engine(async_database_url(database_url),
+                                     **pool_options(database_url, metrics, AsyncAdaptedQueuePool))
+        metrics.attach(engine.sync_engine)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        assert metrics.snapshot()["checkouts"] == 1
+        await engine.dispose()
+
+
+def test_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(settings, "DATASET_ADMIN_TOKEN", "admin-secret")
+    app = FastAPI()
+    app.include_router(metrics_router)
+    with TestClient(app) as client:
+        response = client.get("/metrics/db", headers={"X-Admin-Token": "admin-secret"})
+    assert response.status_code == 200
+    assert set(response.json()["pools"]) == set(pool_metrics)
+
+
+def test_metrics_endpoint_requires_admin_token(monkeypatch):
+    app = FastAPI()
+    app.include_router(metrics_router)
+    with TestClient(app) as client:
+        # Disabled while no admin token is configured
+        monkeypatch.setattr(settings, "DATASET_ADMIN_TOKEN", None)
+        assert client.get("/metrics/db").status_code == 403
+        assert client.get("/metrics/db", headers={"X-Admin-Token": ""}).status_code == 403
+
+        monkeypatch.setattr(settings, "DATASET_ADMIN_TOKEN", "admin-secret")
+        assert client.get("/metrics/db").status_code == 403
+        response = client.get("/metrics/db", headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+    assert "queries" not in response.text
@@ -0,0 +1,256 @@
+import asyncio
+import base64
+import time
+from email import message_from_bytes
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, async_database_url
+from app.db.models import EmailOutbox, User
+from app.services.email_outbox import EmailOutboxWorker, SmtpConnection, enqueue_email
+
+
+class FakeSmtpServer:
+    """Just enough ESMTP (EHLO, AUTH PLAIN, MAIL, RCPT, DATA) to stand in for a relay"""
+
+    def __init__(self):
+        self.connections = 0
+        self.logins = []
+        self.messages = []
+        # Codes answered to the next RCPT commands, instead of 250
+        self.rcpt_codes = []
+        self._writers = []
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop_connections(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.append(writer)
+
+        def reply(*lines):
+            writer.write(b"".join(line.encode() + b"\r\n" for line in lines))
+
+        reply("220 fake ESMTP")
+        try:
+            while line := await reader.readline():
+                command = line.decode().strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    reply("250-fake", "250-AUTH PLAIN", "250 8BITMIME")
+                elif verb == "AUTH":
+                    _, username, password = base64.b64decode(command.split()[2]).split(b"\0")
+                    self.logins.append((username.decode(), password.decode()))
+                    reply("235 ok")
+                elif verb == "RCPT" and self.rcpt_codes:
+                    reply(f"{self.rcpt_codes.pop(0)} not now")
+                elif verb == "DATA":
+                    reply("354 go ahead")
+                    data = b""
+                    while (chunk := await reader.readline()) != b".\r\n":
+                        data += chunk
+                    self.messages.append(message_from_bytes(data))
+                    reply("250 queued")
+                elif verb == "QUIT":
+                    reply("221 bye")
+                    break
+                else:
+                    reply("250 ok")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, EmailOutbox.__table__])
+    engine.dispose()
+    return url
+
+
+def queue(database_url, *recipients):
+    engine = create_engine(database_url)
+    with sessionmaker(bind=engine)() as db:
+        for recipient in recipients:
+            enqueue_email(db, "welcome", recipient, {"name": "Test User"})
+        db.commit()
+    engine.dispose()
+
+
+def outbox(database_url):
+    engine = create_engine(database_url)
+    with sessionmaker(bind=engine)() as db:
+        rows = db.scalars(select(EmailOutbox).order_by(EmailOutbox.id)).all()
+    engine.dispose()
+    return rows
+
+
+def run(database_url, scenario, **options):
+    """Run ``scenario(worker, server)`` against a fake SMTP server"""
+    async def main():
+        server = FakeSmtpServer()
+        port = await server.start()
+        engine = create_async_engine(async_database_url(database_url))
+        smtp = SmtpConnection("127.0.0.1", port, "mailer", "secret", start_tls=False, timeout=5)
+        options.setdefault("rate_per_minute", 6000)
+        worker = EmailOutboxWorker(smtp, async_sessionmaker(bind=engine, expire_on_commit=False), **options)
+        try:
+            return await scenario(worker, server)
+        finally:
+            await worker.stop()
+            await server.stop()
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_rolled_back_signup_queues_nothing(database_url):
+    engine = create_engine(database_url)
+    with sessionmaker(bind=engine)() as db:
+        db.add(User(nom="Test", prenom="User", email="gone@example.com", password="x"))
+        enqueue_email(db, "welcome", "gone@example.com", {"name": "Test User"})
+        db.rollback()
+    engine.dispose()
+    assert outbox(database_url) == []
+
+    with pytest.raises(ValueError):
+        enqueue_email(None, "unknown", "x@example.com", {})
+
+
+def test_sends_over_one_authenticated_connection(database_url):
+    queue(database_url, "a@example.com", "b@example.com", "c@example.com")
+
+    async def scenario(worker, server):
+        return await worker.run_once(), server
+
+    sent, server = run(database_url, scenario)
+
+    assert sent == 3
+    assert server.connections == 1
+    assert server.logins == [("mailer", "secret")]
+    assert [message["To"] for message in server.messages] == ["a@example.com", "b@example.com", "c@example.com"]
+    assert server.messages[0]["Subject"].startswith("Welcome to TouristAI")
+    assert "Test User" in server.messages[0].get_payload(decode=True).decode()
+    rows = outbox(database_url)
+    assert [(row.status, row.attempts) for row in rows] == [("sent", 1)] * 3
+    assert all(row.sent_at for row in rows)
+
+
+def test_reconnects_when_the_server_drops_the_connection(database_url):
+    queue(database_url, "a@example.com")
+
+    async def scenario(worker, server):
+        await worker.run_once()
+        server.drop_connections()
+        await asyncio.sleep(0.05)
+        queue(database_url, "b@example.com")
+        return await worker.run_once(), server
+
+    sent, server = run(database_url, scenario)
+
+    assert sent == 1
+    assert server.connections == 2
+    assert [row.status for row in outbox(database_url)] == ["sent", "sent"]
+
+
+def test_transient_failure_is_retried_with_backoff(database_url):
+    queue(database_url, "a@example.com")
+
+    async def scenario(worker, server):
+        server.rcpt_codes = [451]
+        before = time.time()
+        assert await worker.run_once() == 0
+        row = outbox(database_url)[0]
+        assert row.status == "pending" and row.attempts == 1
+        assert "451" in row.last_error
+        assert before + 5 <= row.next_attempt_at <= time.time() + 10
+        # Not due yet
+        assert await worker.run_once() == 0
+
+        engine = create_engine(database_url)
+        with engine.begin() as connection:
+            connection.execute(update(EmailOutbox).values(next_attempt_at=time.time()))
+        engine.dispose()
+        return await worker.run_once(), server
+
+    sent, server = run(database_url, scenario, retry_base_delay=10)
+
+    assert sent == 1
+    # The refusal did not cost the connection
+    assert server.connections == 1
+    row = outbox(database_url)[0]
+    assert (row.status, row.attempts) == ("sent", 2)
+
+
+def test_gives_up_on_permanent_failures_and_after_max_attempts(database_url):
+    queue(database_url, "bounce@example.com", "busy@example.com")
+
+    async def scenario(worker, server):
+        server.rcpt_codes = [550, 451]
+        await worker.run_once()
+        engine = create_engine(database_url)
+        with engine.begin() as connection:
+            connection.execute(update(EmailOutbox).values(next_attempt_at=time.time()))
+        engine.dispose()
+        server.rcpt_codes = [452]
+        await worker.run_once()
+
+    run(database_url, scenario, max_attempts=2)
+
+    bounced, busy = outbox(database_url)
+    assert (bounced.status, bounced.attempts) == ("failed", 1)
+    assert (busy.status, busy.attempts) == ("failed", 2)
+    assert "452" in busy.last_error
+
+
+def test_sends_are_paced_by_the_token_bucket(database_url):
+    queue(database_url, *[f"user{i}@example.com" for i in range(4)])
+
+    async def scenario(worker, server):
+        started = time.monotonic()
+        sent = await worker.run_once()
+        return sent, time.monotonic() - started
+
+    # 10 per second, no burst: 3 waits of 0.1 s after the first send
+    sent, elapsed = run(database_url, scenario, rate_per_minute=600, burst=1)
+
+    assert sent == 4
+    assert elapsed >= 0.28
+
+
+def test_background_worker_sends_when_notified(database_url):
+    async def scenario(worker, server):
+        worker.poll_interval = 60
+        worker.start()
+        await asyncio.sleep(0.05)
+        queue(database_url, "a@example.com")
+        worker.notify()
+        for _ in range(100):
+            if server.messages:
+                break
+            await asyncio.sleep(0.02)
+        return server
+
+    server = run(database_url, scenario)
+
+    assert len(server.messages) == 1
+    assert outbox(database_url)[0].status == "sent"
@@ -0,0 +1,131 @@
+import datetime
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, exceptions, jwt
+
+import app.core.google_certs as google_certs_module
+from app.core.google_certs import GoogleCertCache, max_age
+
+CLIENT_ID = "client-id.apps.googleusercontent.com"
+
+
+def make_key(kid):
+    """A local stand-in for one of Google's signing keys: (signer, kid, PEM cert)"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name)
+        .public_key(key.public_key()).serial_number(1)
+        .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    signer = crypt.RSASigner.from_string(pem, key_id=kid)
+    return signer, kid, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return [make_key("key-1"), make_key("key-2")]
+
+
+def id_token(signer, audience=CLIENT_ID, issuer="https://accounts.google.com", email="a@example.com"):
+    now = int(time.time())
+    return jwt.encode(signer, {
+        "iss": issuer, "aud": audience, "sub": "123", "email": email,
+        "given_name": "A", "family_name": "B", "iat": now, "exp": now + 3600,
+    }).decode()
+
+
+class FakeGoogle:
+    """Serves the current key set, counting fetches"""
+
+    def __init__(self, keys, max_age=3600):
+        self.keys = keys
+        self.max_age = max_age
+        self.fetches = 0
+
+    def __call__(self):
+        self.fetches += 1
+        return {kid: cert for _, kid, cert in self.keys}, self.max_age
+
+
+def test_max_age_parsing():
+    assert max_age("public, max-age=19850, must-revalidate, no-transform") == 19850
+    assert max_age(None) == google_certs_module.DEFAULT_MAX_AGE
+
+
+def test_certs_fetched_once_per_max_age(keys):
+    google = FakeGoogle(keys[:1])
+    cache = GoogleCertCache(fetch=google)
+    for _ in range(5):
+        assert cache.verify(id_token(keys[0][0]), CLIENT_ID)["email"] == "a@example.com"
+    assert google.fetches == 1
+
+
+def test_expired_certs_are_refetched(keys):
+    google = FakeGoogle(keys[:1], max_age=0)
+    cache = GoogleCertCache(fetch=google)
+    cache.verify(id_token(keys[0][0]), CLIENT_ID)
+    cache.verify(id_token(keys[0][0]), CLIENT_ID)
+    assert google.fetches == 2
+
+
+def test_stale_certs_used_when_google_is_unreachable(keys):
+    google = FakeGoogle(keys[:1], max_age=0)
+    cache = GoogleCertCache(fetch=google)
+    cache.refresh()
+
+    def unreachable():
+        raise ConnectionError("no route to host")
+
+    cache.fetch = unreachable
+    assert cache.verify(id_token(keys[0][0]), CLIENT_ID)["sub"] == "123"
+
+
+def test_rotated_key_triggers_one_refetch(keys):
+    google = FakeGoogle(keys[:1])
+    cache = GoogleCertCache(fetch=google)
+    cache.refresh()
+    google.keys = keys
+
+    assert cache.verify(id_token(keys[1][0]), CLIENT_ID)["sub"] == "123"
+    assert google.fetches == 2
+
+    # An unknown key does not let callers hammer Google
+    unknown = make_key("key-3")
+    with pytest.raises(ValueError):
+        cache.verify(id_token(unknown[0]), CLIENT_ID)
+    assert google.fetches == 2
+
+
+def test_wrong_audience_or_issuer_rejected(keys):
+    cache = GoogleCertCache(fetch=FakeGoogle(keys))
+    with pytest.raises(ValueError):
+        cache.verify(id_token(keys[0][0], audience="someone-else"), CLIENT_ID)
+    with pytest.raises(exceptions.GoogleAuthError):
+        cache.verify(id_token(keys[0][0], issuer="https://evil.example.com"), CLIENT_ID)
+
+
+async def test_verify_async(keys):
+    cache = GoogleCertCache(fetch=FakeGoogle(keys))
+    assert (await cache.verify_async(id_token(keys[1][0]), CLIENT_ID))["email"] == "a@example.com"
+
+
+def test_background_refresh_before_expiry(keys):
+    google = FakeGoogle(keys, max_age=2)
+    cache = GoogleCertCache(fetch=google)
+    cache.start_refresher()
+    try:
+        deadline = time.time() + 5
+        while google.fetches < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        assert google.fetches >= 2
+    finally:
+        cache.stop_refresher()
@@ -0,0 +1,111 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, func, select, text
+
+from app.db.database import Base
+from app.db.models import User, Plans, Favorite, Villes
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "3f9c1d2e7a41_add_hot_path_indexes.py"
+SEED_USERS = 1_000_000
+NEW_INDEXES = ["ix_users_email_lower", "ix_plans_idUser", "ix_preferences_userId", "ix_favorites_plan_id", "ix_villes_nom"]
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("hot_path_indexes", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    """Pre-migration database (tables without the new indexes) seeded with 1M users"""
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('indexes') / 'seeded.db'}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Plans.__table__, Favorite.__table__, Villes.__table__])
+    with engine.begin() as conn:
+        # Preferences' composite autoincrement key can't be created on SQLite
+        conn.execute(text('CREATE TABLE preferences (id INTEGER, "lieuDepart" VARCHAR, budget FLOAT, '
+                          '"userId" INTEGER REFERENCES users (id), PRIMARY KEY (id, "lieuDepart"))'))
+        for name in NEW_INDEXES:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+        conn.execute(text(
+            "WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count) "
+            "INSERT INTO users (id, nom, prenom, email, password) "
+            "SELECT n, 'Nom', 'Prenom', 'user' || n || '@example.com', 'x' FROM seq"
+        ), {"count": SEED_USERS})
+        conn.execute(text(
+            'INSERT INTO plans (id, "dateCreation", "idUser") SELECT id, date(\'now\'), id FROM users WHERE id % 10 = 0'
+        ))
+        conn.execute(text("INSERT INTO favorites (plan_id, favorite_data) SELECT id, '{}' FROM plans WHERE id % 20 = 0"))
+        conn.execute(text(
+            'INSERT INTO preferences (id, "lieuDepart", budget, "userId") SELECT id, \'Rabat\', 1000, "idUser" FROM plans'
+        ))
+        conn.execute(text("INSERT INTO villes (nom) VALUES ('Marrakech'), ('Fes'), ('Agadir')"))
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def migrated(engine):
+    migration = load_migration()
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+    return engine
+
+
+def index_names(engine) -> set:
+    # Reflection skips expression indexes such as lower(email)
+    with engine.connect() as conn:
+        return set(conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'index'")))
+
+
+def query_plan(engine, statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+
+class TestHotPathIndexes:
+    def test_users_scanned_before_migration(self, engine):
+        if "ix_users_email_lower" in index_names(engine):
+            pytest.skip("module fixture already migrated")
+        plan = query_plan(engine, select(User).where(func.lower(User.email) == "user42@example.com"))
+        assert plan.startswith("SCAN users")
+
+    def test_email_lookup_uses_index(self, migrated):
+        plan = query_plan(migrated, select(User).where(func.lower(User.email) == "user42@example.com"))
+        assert "USING INDEX ix_users_email_lower" in plan
+
+    def test_email_index_is_unique_case_insensitively(self, migrated):
+        with pytest.raises(Exception):
+            with migrated.begin() as conn:
+                conn.execute(text("INSERT INTO users (email) VALUES ('USER42@example.com')"))
+
+    def test_favorites_join_uses_indexes(self, migrated):
+        plan = query_plan(migrated, select(Favorite).join(Plans).where(Plans.idUser == 420))
+        assert "ix_plans_idUser" in plan
+        assert "ix_favorites_plan_id" in plan
+
+    def test_preferences_by_user_uses_index(self, migrated):
+        plan = query_plan(migrated, text('SELECT * FROM preferences WHERE "userId" = 420'))
+        assert "ix_preferences_userId" in plan
+
+    def test_ville_by_name_uses_index(self, migrated):
+        plan = query_plan(migrated, select(Villes.id).where(Villes.nom == "Fes"))
+        assert "ix_villes_nom" in plan
+
+    def test_migration_is_idempotent_and_reversible(self, migrated):
+        migration = load_migration()
+        with migrated.begin() as conn:
+            with Operations.context(MigrationContext.configure(conn)):
+                migration.upgrade()
+                migration.downgrade()
+                migration.upgrade()
+        assert set(NEW_INDEXES) <= index_names(migrated)
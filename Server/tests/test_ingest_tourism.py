@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.ingest_tourism import ingest_tourism_data
+import app.services.plannerDataService as plannerDataService
+from app.db.models import Activities, DataGeneration, Hotels, Villes
+from app.services.plannerDataService import DatabaseCatalog, invalidatePlannerCache
+
+
+def tourism_df(agadir_price=200.0):
+    return pd.DataFrame({
+        "Ville": ["Agadir", "Agadir", "Agadir", "Rabat", "Rabat"],
+        "Nom de l'élément": ["Ayour", "Littoral", "Souss", "Balima", "Kasbah tour"],
+        "classement": ["1*", "1*", "2*", "3*", "-"],
+        "Coût (MAD)": [agadir_price, 150.0, None, 600.0, 80.0],
+        "Type de donnée": ["Hôtel", "Hôtel", "Hôtel", "Hôtel", "Activité"],
+    })
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (Villes, Hotels, Activities, DataGeneration):
+        model.__table__.create(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    invalidatePlannerCache()
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    yield db
+    db.close()
+
+
+class TestIngestTourism:
+    def test_ingest_is_one_transaction(self, engine, db_session):
+        commits = []
+        event.listen(engine, "commit", lambda conn: commits.append(conn))
+
+        results = ingest_tourism_data(db_session, tourism_df())
+
+        assert len(commits) == 1
+        assert results == {"hotels": (3, 0), "activities": (1, 0)}
+        assert db_session.scalar(select(func.count()).select_from(Villes)) == 2
+
+    def test_ingest_is_idempotent_and_updates_prices(self, db_session):
+        ingest_tourism_data(db_session, tourism_df())
+        results = ingest_tourism_data(db_session, tourism_df(agadir_price=250.0))
+
+        assert results == {"hotels": (0, 1), "activities": (0, 0)}
+        assert db_session.scalar(select(Hotels.cout).where(Hotels.nom == "Ayour")) == 250.0
+
+    def test_catalog_reads_through_cache(self, engine, db_session):
+        ingest_tourism_data(db_session, tourism_df())
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        catalog = DatabaseCatalog(db_session)
+        costs, name_at = catalog.hotels_for("Agadir")
+        catalog.hotels_for("Agadir")
+
+        assert list(costs) == [150.0, 200.0]
+        assert [name_at(0), name_at(1)] == ["Littoral", "Ayour"]
+        assert sum("FROM hotels" in statement for statement in statements) == 1
+        assert catalog.activities_for("Rabat", 100) == [{"name": "Kasbah tour", "price": 80.0}]
+        assert catalog.activities_for("Rabat", 50) == []
+
+    def test_ingest_from_another_process_reaches_cached_catalog(self, monkeypatch, db_session):
+        ingest_tourism_data(db_session, tourism_df())
+        catalog = DatabaseCatalog(db_session)
+        assert list(catalog.hotels_for("Agadir")[0]) == [150.0, 200.0]
+
+        # The CLI's own invalidation only reaches its process, not this one
+        monkeypatch.setattr("app.db.ingest_tourism.invalidatePlannerCache", lambda: None)
+        ingest_tourism_data(db_session, tourism_df(agadir_price=120.0))
+        assert list(DatabaseCatalog(db_session).hotels_for("Agadir")[0]) == [150.0, 200.0]
+
+        # GENERATION_CHECK_SECONDS later this worker re-reads the generation
+        plannerDataService._generation_cache.clear()
+        fresh = DatabaseCatalog(db_session)
+        costs, name_at = fresh.hotels_for("Agadir")
+        assert list(costs) == [120.0, 150.0]
+        assert name_at(0) == "Ayour"
+        # Plans report the generation that served them
+        assert fresh.generation == catalog.generation + 1
+
+    def test_hotel_query_uses_ville_cout_index(self, db_session):
+        plan = db_session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT nom, cout FROM hotels WHERE \"idVille\" = 1 ORDER BY cout"
+        )).all()
+        details = " ".join(row[-1] for row in plan)
+        assert "ix_hotels_ville_cout" in details
+        assert "TEMP B-TREE" not in details
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.json_stream import stream_json_array
+from app.services.preferencesService import getPreferencesService
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    with engine.begin() as conn:
+        # Preferences' composite autoincrement key can't be created on SQLite
+        conn.execute(text('CREATE TABLE preferences (id INTEGER, "lieuDepart" VARCHAR, budget FLOAT, '
+                          '"dateDepart" DATE, "dateRetour" DATE, "idPlan" INTEGER, "userId" INTEGER, '
+                          'PRIMARY KEY (id, "lieuDepart"))'))
+        conn.execute(text('INSERT INTO preferences (id, "lieuDepart", budget, "userId") VALUES '
+                          "(1, 'Rabat', 100, 1), (2, 'Rabat', 200, 2), (3, 'Fes', 300, 1), "
+                          "(4, 'Rabat', 400, 1), (5, 'Agadir', 500, 2), (6, 'Tanger', 600, 1)"))
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+class TestPreferencesKeyset:
+    def test_pages_cover_only_the_users_preferences(self, db_session):
+        ids, cursor = [], None
+        while True:
+            page, cursor = getPreferencesService(db_session, 1, cursor, limit=3)
+            assert len(page) <= 3
+            ids += [pref.id for pref in page]
+            if cursor is None:
+                break
+        assert ids == [1, 3, 4, 6]
+
+    def test_last_full_page_has_no_next_cursor(self, db_session):
+        page, cursor = getPreferencesService(db_session, 2, None, limit=2)
+        assert [pref.id for pref in page] == [2, 5]
+        assert cursor is None
+
+
+class TestStreamJsonArray:
+    async def test_encodes_envelope_and_items(self):
+        async def items():
+            for i in range(3):
+                yield {"id": i, "name": "Fès"}
+
+        chunks = [chunk async for chunk in stream_json_array(items(), {"message": "ok"})]
+        assert len(chunks) == 5
+        assert json.loads(b"".join(chunks)) == {"message": "ok", "data": [{"id": i, "name": "Fès"} for i in range(3)]}
+
+    async def test_empty(self):
+        async def items():
+            return
+            yield
+
+        body = b"".join([chunk async for chunk in stream_json_array(items(), key="preferences")])
+        assert json.loads(body) == {"preferences": []}
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.controllers.auth_controller as auth_controller
+from app.core.password_hasher import PasswordHasher
+from app.db.database import Base
+from app.db.models import User
+from app.schemas.user import UserLogin
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(rounds=4, workers=2)
+    yield hasher
+    hasher.shutdown()
+
+
+def test_hash_and_verify(hasher):
+    hashed = hasher.hash("secret")
+    assert hashed.startswith("$2b$04$")
+    assert hasher.verify("secret", hashed)
+    assert not hasher.verify("wrong", hashed)
+
+
+async def test_async_calls_run_in_the_pool(hasher):
+    hashed = await hasher.hash_async("secret")
+    assert await hasher.verify_async("secret", hashed)
+    assert await hasher.verify_and_update_async("secret", hashed) == (True, None)
+
+
+def test_other_work_factor_is_rehashed(hasher):
+    for rounds in (5, 4):
+        old = PasswordHasher(rounds=rounds + 1, workers=1)
+        valid, new_hash = hasher.verify_and_update("secret", old.hash("secret"))
+        old.shutdown()
+        assert valid and new_hash.startswith("$2b$04$")
+    assert hasher.verify_and_update("wrong", PasswordHasher(5, 1).hash("secret")) == (False, None)
+
+
+async def test_concurrency_is_bounded(hasher, monkeypatch):
+    running, peak, lock = 0, 0, threading.Lock()
+    hash_ = hasher.context.hash
+
+    def tracked_hash(password):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        try:
+            return hash_(password)
+        finally:
+            with lock:
+                running -= 1
+
+    monkeypatch.setattr(hasher.context, "hash", tracked_hash)
+    await asyncio.gather(*(hasher.hash_async(f"pw{i}") for i in range(8)))
+    assert peak <= 2
+
+
+def test_signin_upgrades_outdated_hash(tmp_path, hasher, monkeypatch):
+    monkeypatch.setattr(auth_controller, "password_hasher", hasher)
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    db = sessionmaker(bind=engine)()
+    old = PasswordHasher(rounds=5, workers=1)
+    db.add(User(id=1, nom="A", prenom="B", email="a@example.com", password=old.hash("secret")))
+    db.commit()
+    old.shutdown()
+
+    result = auth_controller.signin(UserLogin(email="a@example.com", password="secret"), db)
+    assert "access_token" in result
+    db.expire_all()
+    assert db.get(User, 1).password.startswith("$2b$04$")
+    db.close()
+    engine.dispose()
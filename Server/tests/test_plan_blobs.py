@@ -0,0 +1,117 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, text
+
+from app.services.planBlobService import canonicalPlan, decodePlan, encodePlan, planSummary
+
+VERSIONS = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+MIGRATION = VERSIONS / "c47d9a1e5b28_add_plan_blobs.py"
+SUMMARY_MIGRATION = VERSIONS / "9a4f2b7c1e56_refresh_plan_blob_summaries.py"
+
+PLAN = {
+    "idPlan": 3,
+    "budget_tier": "Standard",
+    "total_cost": 2500,
+    "total_days_spent": 5,
+    "breakdown": {"hotels_total": 1500, "activities_total": 2000, "transport_total": 300},
+    "plan": [{"city": "Marrakech", "days_spent": 3, "hotel": {"name": "Riad"},
+              "activities": [{"name": "Souk", "price": 100}] * 20},
+             {"city": "Agadir", "days_spent": 2, "activities": []}],
+}
+
+
+class TestEncoding:
+    def test_canonical_form_ignores_key_order_and_whitespace(self):
+        assert canonicalPlan({"b": 1, "a": [1, 2]}) == canonicalPlan({"a": [1, 2], "b": 1}) == b'{"a":[1,2],"b":1}'
+
+    def test_round_trip_and_compression(self):
+        blob = encodePlan(PLAN)
+        assert decodePlan(blob.data) == PLAN
+        assert blob.size == len(canonicalPlan(PLAN))
+        assert len(blob.data) < blob.size / 4
+        assert encodePlan(dict(reversed(list(PLAN.items())))).hash == blob.hash
+
+    def test_summary(self):
+        # Everything the favorites list renders, without hotels and activities
+        assert planSummary(PLAN) == {
+            "idPlan": 3,
+            "budget_tier": "Standard",
+            "total_cost": 2500,
+            "total_days_spent": 5,
+            "breakdown": {"hotels_total": 1500, "activities_total": 2000, "transport_total": 300},
+            "plan": [{"city": "Marrakech", "days_spent": 3}, {"city": "Agadir", "days_spent": 2}],
+        }
+
+
+def run_migration(engine, direction, path=MIGRATION, batch_size=None):
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    if batch_size:
+        migration.BATCH_SIZE = batch_size
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            getattr(migration, direction)()
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE favorites (id INTEGER PRIMARY KEY, plan_id INTEGER NOT NULL, favorite_data JSON)"))
+        for i in range(1, 7):
+            data = PLAN if i % 2 else {**PLAN, "budget_tier": "Economy"}
+            conn.execute(text("INSERT INTO favorites (id, plan_id, favorite_data) VALUES (:id, 3, :data)"),
+                         {"id": i, "data": canonicalPlan(data).decode()})
+    yield engine
+    engine.dispose()
+
+
+class TestMigration:
+    def test_moves_inline_plans_into_shared_blobs(self, legacy_engine):
+        run_migration(legacy_engine, "upgrade")
+
+        with legacy_engine.connect() as conn:
+            assert conn.scalar(text("SELECT count(*) FROM plan_blobs")) == 2
+            rows = conn.execute(text("SELECT f.favorite_data, b.data FROM favorites f JOIN plan_blobs b ON b.hash = f.blob_hash")).all()
+        assert len(rows) == 6
+        assert all(row.favorite_data is None for row in rows)
+        assert {decodePlan(row.data)["budget_tier"] for row in rows} == {"Standard", "Economy"}
+
+    def test_writes_the_summaries_of_its_revision(self, legacy_engine):
+        # Frozen in the migration: later planSummary changes don't alter it
+        run_migration(legacy_engine, "upgrade")
+
+        with legacy_engine.connect() as conn:
+            summary = json.loads(conn.scalar(text("SELECT summary FROM plan_blobs LIMIT 1")))
+        assert summary["cities"] == ["Marrakech", "Agadir"]
+        assert "breakdown" not in summary and "plan" not in summary
+
+    def test_downgrade_restores_inline_plans(self, legacy_engine):
+        run_migration(legacy_engine, "upgrade")
+        run_migration(legacy_engine, "downgrade", batch_size=4)
+
+        with legacy_engine.connect() as conn:
+            columns = [row[1] for row in conn.execute(text("PRAGMA table_info(favorites)"))]
+            assert "blob_hash" not in columns
+            assert conn.scalar(text("SELECT count(*) FROM favorites WHERE favorite_data IS NULL")) == 0
+            plans = [json.loads(row[0]) for row in conn.execute(text("SELECT favorite_data FROM favorites ORDER BY id"))]
+        # Two batches of 4: every favorite restored, in place
+        assert [plan["budget_tier"] for plan in plans] == ["Standard", "Economy"] * 3
+
+    def test_old_summaries_are_recomputed(self, legacy_engine):
+        run_migration(legacy_engine, "upgrade")
+        with legacy_engine.begin() as conn:
+            conn.execute(text("""UPDATE plan_blobs SET summary = '{"cities": ["Marrakech", "Agadir"]}'"""))
+
+        run_migration(legacy_engine, "upgrade", SUMMARY_MIGRATION)
+
+        with legacy_engine.connect() as conn:
+            summaries = [json.loads(row[0]) for row in conn.execute(text("SELECT summary FROM plan_blobs"))]
+        assert {summary["budget_tier"] for summary in summaries} == {"Standard", "Economy"}
+        assert all(summary["breakdown"] == PLAN["breakdown"] for summary in summaries)
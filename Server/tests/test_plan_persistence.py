@@ -0,0 +1,108 @@
+import pytest
+from datetime import date
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.models import User, Plans, Villes, Hotels, Activities, Itineraires, VilleItineraire, UserPlan
+from app.services.PlanPersistenceService import persistGeneratedPlans
+
+TABLES = [User, Plans, Villes, Hotels, Activities, Itineraires, VilleItineraire, UserPlan]
+
+
+def generated_plans():
+    def stop(city, hotel, price, days, activities):
+        return {
+            "city": city,
+            "hotel": {"name": hotel, "pricePerNight": price, "totalPrice": price * days},
+            "activities": [{"name": name, "price": cost} for name, cost in activities],
+            "days_spent": days,
+            "total_activities_cost": sum(cost for _, cost in activities)
+        }
+
+    return [
+        {"plan": [stop("Marrakech", "Riad Dar", 900.0, 2, [("Souk tour", 100), ("Hammam", 200)]),
+                  stop("Agadir", "Tisslit", 1100.0, 1, [("Surf lesson", 300)])],
+         "budget_tier": "Premium"},
+        {"plan": [stop("Marrakech", "Redouane", 150.0, 2, [("Souk tour", 100)]),
+                  stop("Agadir", "Tisslit", 1100.0, 1, [])],
+         "budget_tier": "Economy"},
+    ]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[model.__table__ for model in TABLES])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    user = User(nom="Test", prenom="User", email="test@example.com", password="x")
+    db.add(user)
+    db.flush()
+    plan = Plans(dateCreation=date.today(), idUser=user.id)
+    db.add(plan)
+    db.commit()
+    yield db
+    db.close()
+
+
+def count(db, model):
+    return db.scalar(select(func.count()).select_from(model))
+
+
+class TestPersistGeneratedPlans:
+    def test_whole_result_in_one_commit(self, engine, db_session):
+        plan_id = db_session.scalar(select(Plans.id))
+        commits = []
+        event.listen(engine, "commit", lambda conn: commits.append(conn))
+
+        result = persistGeneratedPlans(db_session, plan_id, generated_plans())
+
+        assert len(commits) == 1
+        assert result == {"itineraires": 5}
+        assert count(db_session, Villes) == 2
+        # Tisslit and "Souk tour" are shared between tiers
+        assert count(db_session, Hotels) == 3
+        assert count(db_session, Activities) == 3
+        assert count(db_session, VilleItineraire) == 5
+        assert count(db_session, UserPlan) == 5
+
+    def test_links_point_at_the_right_rows(self, db_session):
+        plan_id = db_session.scalar(select(Plans.id))
+        persistGeneratedPlans(db_session, plan_id, generated_plans())
+
+        rows = db_session.execute(
+            select(Villes.nom, Hotels.nom, Activities.nom, Itineraires.time_spent_by_ville)
+            .select_from(UserPlan)
+            .join(VilleItineraire, UserPlan.idVilleItineraire == VilleItineraire.id)
+            .join(Villes, VilleItineraire.idVille == Villes.id)
+            .join(Itineraires, VilleItineraire.idItineraire == Itineraires.id)
+            .join(Hotels, Itineraires.id_hotel == Hotels.id)
+            .outerjoin(Activities, Itineraires.id_activite == Activities.id)
+            .where(UserPlan.idPlan == plan_id)
+        ).all()
+        assert ("Agadir", "Tisslit", "Surf lesson", 1.0) in rows
+        assert ("Agadir", "Tisslit", None, 1.0) in rows
+        assert ("Marrakech", "Redouane", "Souk tour", 2.0) in rows
+
+    def test_existing_hotels_are_reused(self, db_session):
+        plan_id = db_session.scalar(select(Plans.id))
+        persistGeneratedPlans(db_session, plan_id, generated_plans())
+        second_plan = Plans(dateCreation=date.today(), idUser=1)
+        db_session.add(second_plan)
+        db_session.commit()
+
+        persistGeneratedPlans(db_session, second_plan.id, generated_plans())
+
+        assert count(db_session, Hotels) == 3
+        assert count(db_session, Itineraires) == 10
@@ -0,0 +1,69 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.db.models import Villes, LieuxToVisit
+from app.services.preferencesService import addLieuxToVisit, createPreferenceService, resolveCityIds
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    # Preferences has a composite primary key SQLite can't autoincrement,
+    # so only the tables the city resolution touches are created
+    Base.metadata.create_all(bind=engine, tables=[Villes.__table__, LieuxToVisit.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(engine):
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    db.add_all([Villes(nom=nom) for nom in ("Marrakech", "Agadir", "Fes")])
+    db.commit()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+    listener = lambda conn, cursor, statement, *args: executed.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    yield executed
+    event.remove(engine, "before_cursor_execute", listener)
+
+
+class TestCityResolution:
+    def test_resolves_all_cities_in_one_query(self, db_session, statements):
+        ids = resolveCityIds(db_session, ["Agadir", "Marrakech", "Agadir", "Fes"])
+        assert len(statements) == 1
+
+        villes = dict(db_session.execute(select(Villes.nom, Villes.id)).all())
+        assert ids == [villes["Agadir"], villes["Marrakech"], villes["Fes"]]
+
+    def test_unknown_cities_reported_together(self, db_session):
+        with pytest.raises(HTTPException) as error:
+            resolveCityIds(db_session, ["Marrakech", "Atlantis", "Eldorado"])
+        assert error.value.status_code == 400
+        assert "Atlantis, Eldorado" in error.value.detail
+
+    def test_lieux_inserted_in_one_statement(self, db_session, statements):
+        addLieuxToVisit(db_session, 1, resolveCityIds(db_session, ["Marrakech", "Agadir", "Fes"]))
+        db_session.commit()
+
+        assert len(statements) == 2
+        assert db_session.query(LieuxToVisit).filter(LieuxToVisit.idPreference == 1).count() == 3
+
+    def test_create_preference_rejects_unknown_city_before_writing(self, db_session, statements):
+        with pytest.raises(HTTPException) as error:
+            createPreferenceService(db_session, "Rabat", ["Marrakech", "Atlantis"], None, None, 1000.0, 1, 1)
+        assert error.value.status_code == 400
+        assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
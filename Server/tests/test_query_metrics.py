@@ -0,0 +1,95 @@
+import logging
+
+import pytest
+from sqlalchemy import bindparam, create_engine, text
+
+from app.core.config import settings
+from app.db.query_metrics import QueryMetrics, normalize_statement
+
+
+@pytest.fixture
+def metrics():
+    return QueryMetrics()
+
+
+@pytest.fixture
+def engine(metrics):
+    engine = create_engine("sqlite://")
+    metrics.attach(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE villes (id INTEGER PRIMARY KEY, nom VARCHAR)"))
+        conn.execute(text("CREATE INDEX ix_villes_nom ON villes (nom)"))
+        conn.execute(text("INSERT INTO villes (nom) VALUES ('Fes'), ('Rabat'), ('Agadir')"))
+    metrics.reset()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def instrumentation(monkeypatch):
+    def configure(slow_ms=0, explain=False, sample_rate=0.0):
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", slow_ms)
+        monkeypatch.setattr(settings, "SQL_EXPLAIN_SLOW_QUERIES", explain)
+        monkeypatch.setattr(settings, "SQL_TRACE_SAMPLE_RATE", sample_rate)
+    return configure
+
+
+def test_normalize_statement_folds_in_lists():
+    assert normalize_statement("SELECT *\n  FROM villes WHERE id IN (?, ?, ?)") == "SELECT * FROM villes WHERE id IN (...)"
+    assert normalize_statement("SELECT 1 WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == "SELECT 1 WHERE id IN (...)"
+    assert normalize_statement("INSERT INTO t (a, b) VALUES ($1, $2)") == "INSERT INTO t (a, b) VALUES (...)"
+
+
+class TestQueryMetrics:
+    def test_timings_grouped_by_statement_shape(self, engine, metrics, instrumentation):
+        instrumentation()
+        with engine.connect() as conn:
+            for ids in ([1], [1, 2], [1, 2, 3]):
+                statement = text("SELECT nom FROM villes WHERE id IN :ids").bindparams(bindparam("ids", expanding=True))
+                conn.execute(statement, {"ids": ids})
+            conn.execute(text("SELECT count(*) FROM villes"))
+
+        snapshot = metrics.snapshot()
+        assert snapshot["queries"] == 4
+        by_statement = {entry["statement"]: entry for entry in snapshot["top_statements"]}
+        assert by_statement["SELECT nom FROM villes WHERE id IN (...)"]["count"] == 3
+        entry = by_statement["SELECT count(*) FROM villes"]
+        assert sum(entry["histogram"].values()) == entry["count"] == 1
+
+    def test_fast_queries_not_logged(self, engine, instrumentation, caplog):
+        instrumentation(slow_ms=10_000)
+        with caplog.at_level(logging.INFO, logger="app.db.query_metrics"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        assert caplog.records == []
+
+    def test_slow_query_logged_with_plan(self, engine, metrics, instrumentation, caplog):
+        instrumentation(slow_ms=1e-6, explain=True)
+        with caplog.at_level(logging.WARNING, logger="app.db.query_metrics"):
+            with engine.connect() as conn:
+                rows = conn.execute(text("SELECT id FROM villes WHERE nom = :nom"), {"nom": "Fes"}).all()
+
+        # EXPLAIN runs on its own cursor: the caller still gets its rows
+        assert rows == [(1,)]
+        messages = [record.getMessage() for record in caplog.records]
+        assert messages[0].startswith("Slow query")
+        assert "Fes" not in messages[0]
+        assert "USING COVERING INDEX ix_villes_nom" in messages[1] or "USING INDEX ix_villes_nom" in messages[1]
+        assert metrics.snapshot()["slow_queries"] == 1
+
+    def test_sampled_traces(self, engine, instrumentation, caplog):
+        instrumentation(sample_rate=1.0)
+        with caplog.at_level(logging.INFO, logger="app.db.query_metrics"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        assert [record.getMessage().split(": ", 1)[1] for record in caplog.records] == ["SELECT 1", "SELECT 2"]
+
+    def test_failed_statement_does_not_leak_timers(self, engine, metrics, instrumentation):
+        instrumentation()
+        with engine.connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+            assert conn.info["query_start"] == []
+            conn.execute(text("SELECT 1"))
+        assert metrics.snapshot()["queries"] == 1
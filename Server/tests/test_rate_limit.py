@@ -0,0 +1,117 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.exception_handlers import rate_limit_exception_handler
+from app.core.rate_limit import (
+    ConcurrencyLimit, RateLimitExceeded, RateLimiter, SqliteBucketStore, client_key, forwarded_client,
+    take_token, trusted_networks
+)
+
+
+def make_app(*dependencies):
+    app = FastAPI()
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exception_handler)
+
+    @app.post("/llm", dependencies=[Depends(dependency) for dependency in dependencies])
+    async def llm():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    return app
+
+
+def test_token_bucket_refills_at_rate():
+    allowed, _, state = take_token(None, rate=1.0, capacity=2, now=100.0)
+    allowed, _, state = take_token(state, 1.0, 2, 100.0)
+    assert allowed
+    allowed, retry_after, state = take_token(state, 1.0, 2, 100.25)
+    assert not allowed and retry_after == pytest.approx(0.75)
+    allowed, _, state = take_token(state, 1.0, 2, 101.0)
+    assert allowed
+
+
+def test_burst_then_429_with_retry_after():
+    limiter = RateLimiter("test", per_minute=6, burst=2)
+    with TestClient(make_app(limiter)) as client:
+        assert [client.post("/llm").status_code for _ in range(2)] == [200, 200]
+        response = client.post("/llm")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"
+    assert response.json()["detail"]["code"] == "RATE_LIMITED"
+
+
+def request_from(host, claims=None, forwarded_for=None):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    request = Request({"type": "http", "client": (host, 50000), "headers": headers})
+    if claims:
+        request.state.claims = claims
+    return request
+
+
+async def test_clients_have_separate_buckets():
+    limiter = RateLimiter("test", per_minute=1, burst=1)
+    await limiter(request_from("10.0.0.1"))
+    with pytest.raises(RateLimitExceeded):
+        await limiter(request_from("10.0.0.1"))
+    await limiter(request_from("10.0.0.2"))
+
+    # Authenticated users are limited per user, wherever they connect from
+    await limiter(request_from("10.0.0.1", {"id": 7}))
+    with pytest.raises(RateLimitExceeded):
+        await limiter(request_from("10.0.0.3", {"id": 7}))
+    assert client_key(request_from("10.0.0.3", {"id": 7})) == "user:7"
+
+
+async def test_anonymous_clients_behind_the_proxy_have_separate_buckets(monkeypatch):
+    # Render's load balancer connects from a private address, trusted in its deployment
+    monkeypatch.setattr("app.core.rate_limit.TRUSTED_PROXIES", trusted_networks("127.0.0.1,::1,10.0.0.0/8"))
+    limiter = RateLimiter("test", per_minute=1, burst=1)
+    await limiter(request_from("10.20.0.5", forwarded_for="203.0.113.7"))
+    with pytest.raises(RateLimitExceeded):
+        await limiter(request_from("10.20.0.9", forwarded_for="203.0.113.7"))
+    await limiter(request_from("10.20.0.5", forwarded_for="198.51.100.4"))
+    assert client_key(request_from("10.20.0.5", forwarded_for="198.51.100.4")) == "ip:198.51.100.4"
+
+
+def test_forwarded_for_is_ignored_from_private_peers_by_default():
+    assert client_key(request_from("10.20.0.5", forwarded_for="203.0.113.7")) == "ip:10.20.0.5"
+    assert client_key(request_from("127.0.0.1", forwarded_for="203.0.113.7")) == "ip:203.0.113.7"
+
+
+def test_forwarded_for_is_only_believed_from_trusted_proxies():
+    proxies = trusted_networks("127.0.0.1, 10.0.0.0/8")
+    # A client can't pick its bucket by sending the header itself
+    assert forwarded_client("203.0.113.7", ["198.51.100.4"], proxies) == "203.0.113.7"
+    # Spoofed entries are left of the one our proxy appended
+    assert forwarded_client("10.1.2.3", ["198.51.100.4, 203.0.113.7"], proxies) == "203.0.113.7"
+    # Chained proxies, and repeated headers
+    assert forwarded_client("127.0.0.1", ["203.0.113.7", "10.9.9.9"], proxies) == "203.0.113.7"
+    assert forwarded_client("10.1.2.3", [], proxies) == "10.1.2.3"
+    assert forwarded_client("10.1.2.3", ["not-an-ip"], proxies) == "not-an-ip"
+    assert forwarded_client("203.0.113.9", ["203.0.113.7"], trusted_networks("*")) == "203.0.113.7"
+
+
+def test_sqlite_buckets_shared_between_workers(tmp_path):
+    path = str(tmp_path / "limits.db")
+    worker_a, worker_b = SqliteBucketStore(path, ttl=60), SqliteBucketStore(path, ttl=60)
+    assert worker_a.take("chat:ip:1", rate=0.1, capacity=2)[0]
+    assert worker_b.take("chat:ip:1", rate=0.1, capacity=2)[0]
+    allowed, retry_after = worker_a.take("chat:ip:1", rate=0.1, capacity=2)
+    assert not allowed and retry_after > 9
+
+
+async def test_concurrency_cap_returns_503():
+    cap = ConcurrencyLimit("test", limit=2, retry_after=3)
+    transport = httpx.ASGITransport(app=make_app(cap))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(client.post("/llm") for _ in range(5)))
+        assert sorted(response.status_code for response in responses) == [200, 200, 503, 503, 503]
+        busy = next(response for response in responses if response.status_code == 503)
+        assert busy.headers["Retry-After"] == "3"
+        # Slots are released once the requests finish
+        assert (await client.post("/llm")).status_code == 200
+    assert cap.active == 0
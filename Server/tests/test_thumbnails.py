@@ -0,0 +1,94 @@
+import io
+import time
+
+import pytest
+from PIL import Image
+
+from app.services.blob_store import BlobStore
+from app.services.thumbnails import THUMBNAIL_SIZES, ThumbnailService, render_thumbnails, thumbnail_service
+
+
+def encode(image: Image.Image, image_format: str, **params) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **params)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def shutdown_pool():
+    yield
+    thumbnail_service.shutdown()
+
+
+class TestRenderThumbnails:
+    @pytest.mark.parametrize("image_format,mode", [("PNG", "RGBA"), ("JPEG", "RGB")])
+    def test_writes_every_size_and_format(self, tmp_path, image_format, mode):
+        original = tmp_path / "abc"
+        original.write_bytes(encode(Image.new(mode, (1200, 800), "red"), image_format))
+
+        written = render_thumbnails(str(original), THUMBNAIL_SIZES)
+
+        assert len(written) == len(THUMBNAIL_SIZES) * 2
+        for size, pixels in THUMBNAIL_SIZES.items():
+            with Image.open(tmp_path / f"abc_{size}.webp") as webp:
+                assert webp.format == "WEBP"
+                assert max(webp.size) == pixels
+            with Image.open(tmp_path / f"abc_{size}.jpg") as jpeg:
+                assert jpeg.format == "JPEG"
+                assert jpeg.mode == "RGB"
+                assert jpeg.size == (pixels, round(pixels * 2 / 3))
+
+    def test_animated_gif_keeps_first_frame(self, tmp_path):
+        frames = [Image.new("P", (300, 300), color) for color in (1, 2, 3)]
+        original = tmp_path / "gif"
+        original.write_bytes(encode(frames[0], "GIF", save_all=True, append_images=frames[1:]))
+
+        render_thumbnails(str(original), {"small": 64})
+
+        with Image.open(tmp_path / "gif_small.webp") as webp:
+            assert webp.size == (64, 64)
+
+
+class TestThumbnailService:
+    async def test_generate_in_process_pool(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        image_hash = await store.save_bytes(encode(Image.new("RGB", (600, 600), "blue"), "PNG"))
+        service = ThumbnailService(store, {"small": 32}, workers=1)
+        try:
+            written = await service.generate(image_hash)
+        finally:
+            service.shutdown()
+        assert written == [str(service.path_for(image_hash, "small", "webp")),
+                           str(service.path_for(image_hash, "small", "jpg"))]
+
+
+class TestSizedProfileImage:
+    def test_upload_generates_variants_served_by_size(self, engine, store, make_client):
+        data = encode(Image.new("RGB", (1024, 1024), "green"), "PNG")
+        with make_client(engine, 2) as client:
+            assert client.put("/user/profile/image", files={"image": ("me.png", data, "image/png")}).status_code == 200
+            image_hash = client.get("/user/profile/image").headers["etag"].strip('"')
+
+            variant = thumbnail_service.path_for(image_hash, "small", "jpg")
+            deadline = time.monotonic() + 30
+            while not variant.is_file() and time.monotonic() < deadline:
+                time.sleep(0.05)
+
+            response = client.get("/user/profile/image?size=small", headers={"Accept": "image/webp,*/*"})
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "image/webp"
+            assert response.headers["vary"] == "Accept"
+            assert response.headers["etag"] == f'"{image_hash}-small.webp"'
+            assert Image.open(io.BytesIO(response.content)).size == (64, 64)
+
+            response = client.get("/user/profile/image?size=medium")
+            assert response.headers["content-type"] == "image/jpeg"
+            assert len(response.content) < len(data)
+
+            assert client.get("/user/profile/image?size=huge").status_code == 422
+
+    def test_original_served_until_variants_exist(self, engine, store, make_client):
+        with make_client(engine, 1) as client:
+            response = client.get("/user/profile/image?size=large")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
@@ -0,0 +1,187 @@
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import create_access_token
+from app.core.config import settings
+from app.core.token_management import TokenManager, token_claims, token_id
+from app.core.token_revocation import DatabaseRevocationBackend, MemoryRevocationBackend, RevocationBackend
+from app.db.database import Base
+from app.db.models import RevokedToken, User
+from app.services.user_service import bump_token_epoch
+
+
+def test_revoked_token_is_invalid_until_expiry():
+    manager = TokenManager()
+    token = create_access_token({"sub": "a@example.com", "id": 1}, timedelta(minutes=5))
+    assert not manager.is_token_invalid(token)
+
+    manager.invalidate_token(token, user_id=1)
+    assert manager.is_token_invalid(token)
+    assert manager.clear_invalid_tokens() == 0
+    assert len(manager) == 1
+
+
+def test_expired_revocations_are_pruned():
+    manager = TokenManager()
+    now = time.time()
+    manager.invalidate_token("live", user_id=1, expires_at=now + 60)
+    manager.invalidate_token("expired", user_id=1, expires_at=now - 1)
+    assert not manager.is_token_invalid("expired")
+
+    assert manager.clear_invalid_tokens() == 1
+    assert list(manager._revoked) == [token_id("live")]
+
+
+def test_entries_are_keyed_by_compact_id():
+    manager = TokenManager()
+    token = "x" * 2000
+    manager.invalidate_token(token, expires_at=time.time() + 60)
+    assert list(manager._revoked) == [token_id(token)]
+    assert len(token_id(token)) == 16
+
+
+def test_sweeper_prunes_in_background():
+    manager = TokenManager()
+    manager.invalidate_token("soon", expires_at=time.time() + 0.05)
+    manager.start_sweeper(0.02)
+    try:
+        deadline = time.time() + 2
+        while len(manager) and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(manager) == 0
+    finally:
+        manager.stop_sweeper()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tokens.db'}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, RevokedToken.__table__])
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_revocations_are_shared_between_workers(session_factory):
+    worker_a = TokenManager(DatabaseRevocationBackend(session_factory))
+    worker_b = TokenManager(DatabaseRevocationBackend(session_factory))
+    worker_a.invalidate_token("token", user_id=1, expires_at=time.time() + 60)
+    assert not worker_b.is_token_invalid("token")
+
+    assert worker_b.refresh() == 1
+    assert worker_b.is_token_invalid("token")
+    # Nothing new: the overlap window is re-read but adds nothing
+    assert worker_b.refresh() == 0
+
+    # Revoking twice, from another worker, keeps one row
+    worker_b.invalidate_token("token", user_id=1, expires_at=time.time() + 60)
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(RevokedToken)) == 1
+
+
+def test_restarted_worker_reloads_live_revocations(session_factory):
+    TokenManager(DatabaseRevocationBackend(session_factory)).invalidate_token("live", expires_at=time.time() + 60)
+    backend = DatabaseRevocationBackend(session_factory)
+    backend.add(token_id("expired"), None, time.time() - 1)
+
+    restarted = TokenManager(backend)
+    restarted.refresh()
+    assert restarted.is_token_invalid("live")
+    assert len(restarted) == 1
+
+    restarted.clear_invalid_tokens()
+    with session_factory() as db:
+        assert db.scalar(select(func.count()).select_from(RevokedToken)) == 1
+
+
+def test_out_of_order_commit_is_not_missed():
+    backend = MemoryRevocationBackend()
+    worker = TokenManager(backend)
+    exp = time.time() + 60
+    backend._rows = [(1, token_id("first"), None, exp, None), (3, token_id("third"), None, exp, None)]
+    worker.refresh()
+    # seq 2 commits after seq 3 was already seen
+    backend._rows.insert(1, (2, token_id("late"), None, exp, None))
+    assert worker.refresh() == 1
+    assert worker.is_token_invalid("late")
+
+
+def issue(user_id, epoch):
+    return create_access_token({"sub": "a@example.com", "id": user_id, "epoch": epoch}, timedelta(minutes=5))
+
+
+def test_logout_all_revokes_tokens_never_logged_out(session_factory):
+    with session_factory() as db:
+        db.add(User(id=1, email="a@example.com", password="x"))
+        db.commit()
+        epoch = db.get(User, 1).token_epoch
+        old_tokens = [issue(1, epoch) for _ in range(3)]
+        other_user = issue(2, 0)
+
+        worker_a = TokenManager(DatabaseRevocationBackend(session_factory))
+        worker_b = TokenManager(DatabaseRevocationBackend(session_factory))
+        worker_a.invalidate_all_user_tokens(1, bump_token_epoch(db, 1))
+        new_token = issue(1, db.get(User, 1).token_epoch)
+
+    assert all(worker_a.is_token_invalid(token) for token in old_tokens)
+    assert not worker_a.is_token_invalid(new_token)
+    assert not worker_a.is_token_invalid(other_user)
+    # One marker row, no token list
+    assert len(worker_a) == 1
+
+    assert not worker_b.is_token_invalid(old_tokens[0])
+    worker_b.refresh()
+    assert worker_b.is_token_invalid(old_tokens[0])
+    assert not worker_b.is_token_invalid(new_token)
+
+
+def test_epoch_marker_outlives_older_tokens():
+    manager = TokenManager()
+    manager.invalidate_all_user_tokens(1, 1)
+    manager.invalidate_all_user_tokens(1, 2)
+    assert manager.is_epoch_revoked(1, 1)
+    assert not manager.is_epoch_revoked(1, 2)
+    assert not manager.is_epoch_revoked(2, 0)
+
+    # Past ACCESS_TOKEN_MAX_LIFETIME every older token has expired
+    with manager._lock:
+        manager._prune(time.time() + settings.ACCESS_TOKEN_MAX_LIFETIME + 1)
+    assert manager._epochs == {} and len(manager) == 0
+
+
+def test_token_lifetime_is_capped():
+    token = create_access_token({"sub": "a@example.com", "id": 1}, timedelta(days=30))
+    claims = token_claims(token)
+    assert claims["epoch"] == 0
+    assert claims["exp"] <= time.time() + settings.ACCESS_TOKEN_MAX_LIFETIME + 1
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(RevocationBackend):
+        def add(self, tid, user_id, expires_at, epoch=None):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_memory_backend_dedupes_and_prunes_by_expiry():
+    backend = MemoryRevocationBackend()
+    now = time.time()
+    backend.add(b"a", 1, now + 60)
+    backend.add(b"b", 1, now - 1)
+    backend.add(b"a", 1, now + 120)
+    backend.add(b"c", 2, now + 30)
+
+    assert [row[1] for row in backend.changes_since(0, now)] == [b"a", b"c"]
+    assert [row[1] for row in backend.changes_since(2, now)] == [b"c"]
+    assert backend.prune(now) == 1
+    assert backend.prune(now) == 0
+    assert backend.prune(now + 45) == 1
+    assert backend.changes_since(0, now) == [(1, b"a", 1, now + 60, None)]
+    # A pruned token can be revoked again, after the last seq
+    backend.add(b"c", 2, now + 90)
+    assert backend.changes_since(1, now)[0][:2] == (4, b"c")
@@ -0,0 +1,90 @@
+import hashlib
+import re
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.models import User
+from app.services.blob_store import blob_store
+
+SELECTS_IMAGE = re.compile(r"users\.image\b(?!_type)")
+
+
+# Every test here writes to the blob store
+pytestmark = pytest.mark.usefixtures("store")
+
+
+class TestProfileImage:
+    def test_user_query_does_not_load_image(self, engine, statements):
+        db = sessionmaker(bind=engine)()
+        user = db.query(User).filter(User.id == 1).first()
+        assert not SELECTS_IMAGE.search(statements[0])
+        assert "image" not in user.__dict__
+        db.close()
+
+    def test_legacy_image_moved_to_store_on_first_read(self, engine, statements, store, make_client, legacy_image):
+        with make_client(engine, 1) as client:
+            response = client.get("/user/profile/image")
+            assert response.status_code == 200
+            assert response.content == legacy_image
+            assert response.headers["content-type"] == "image/png"
+
+            response = client.get("/user/profile/image")
+            assert response.content == legacy_image
+
+        # The row was read once, then the picture comes from disk
+        assert sum(bool(SELECTS_IMAGE.search(statement)) for statement in statements) == 1
+        db = sessionmaker(bind=engine)()
+        user = db.get(User, 1)
+        assert user.image is None
+        assert store.path_for(user.image_hash).read_bytes() == legacy_image
+        db.close()
+
+    def test_upload_then_download_with_validators(self, engine, store, make_client):
+        data = b"\xff\xd8\xff" + bytes(range(256)) * 300
+        digest = hashlib.sha256(data).hexdigest()
+        with make_client(engine, 2) as client:
+            response = client.put("/user/profile/image", files={"image": ("me.jpg", data, "image/jpeg")})
+            assert response.status_code == 200
+            assert store.exists(digest)
+
+            response = client.get("/user/profile/image")
+            assert response.status_code == 200
+            assert response.content == data
+            assert response.headers["etag"] == f'"{digest}"'
+            assert response.headers["cache-control"] == "private, no-cache"
+
+            response = client.get("/user/profile/image", headers={"If-None-Match": f'"{digest}"'})
+            assert response.status_code == 304
+
+            response = client.get("/user/profile/image", headers={"Range": "bytes=0-2"})
+            assert response.status_code == 206
+            assert response.content == data[:3]
+
+    def test_oversized_upload_rejected_without_leftovers(self, engine, store, monkeypatch, make_client):
+        monkeypatch.setattr(settings, "PROFILE_IMAGE_MAX_BYTES", 1024)
+        with make_client(engine, 2) as client:
+            response = client.put("/user/profile/image", files={"image": ("big.png", b"x" * 4096, "image/png")})
+        assert response.status_code == 400
+        assert response.json()["detail"]["code"] == "FILE_TOO_LARGE"
+        assert list((store.root / "tmp").iterdir()) == []
+
+    def test_oversized_upload_refused_before_it_is_read(self, engine, store, monkeypatch, make_client):
+        spooled = []
+        monkeypatch.setattr(blob_store, "save_stream", lambda *args: spooled.append(args))
+        with make_client(engine, 2, body_limits={"/user/profile/image": 1024}) as client:
+            response = client.put("/user/profile/image", files={"image": ("big.png", b"x" * 4096, "image/png")})
+            assert response.status_code == 413
+            assert response.json()["detail"]["code"] == "FILE_TOO_LARGE"
+
+            # Without a Content-Length the body is cut off once it passes the limit
+            response = client.put("/user/profile/image", content=iter([b"x" * 512] * 8),
+                                  headers={"Content-Type": "multipart/form-data; boundary=b"})
+            assert response.status_code == 413
+        assert spooled == []
+
+    def test_missing_image_is_404(self, engine, make_client):
+        with make_client(engine, 2) as client:
+            response = client.get("/user/profile/image")
+        assert response.status_code == 404
@@ -0,0 +1,124 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.controllers.VilleController import router as villes_router
+from app.db.database import Base, get_db
+from app.db.models import Villes
+from app.services.villeCatalogService import ville_catalog
+from app.services.VilleService import getOrCreateVilleIds, getVilleIdByName
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[Villes.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    TestingSessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    db = TestingSessionLocal()
+    db.add_all([Villes(nom="Marrakech", budget=1000), Villes(nom="Fès", budget=1500)])
+    db.commit()
+    db.close()
+    ville_catalog.invalidate()
+    yield TestingSessionLocal
+    ville_catalog.invalidate()
+
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(villes_router)
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def queries(engine):
+    executed = []
+    listener = lambda *args: executed.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    yield executed
+    event.remove(engine, "before_cursor_execute", listener)
+
+
+class TestVillesEndpoints:
+    def test_list_is_served_from_memory_with_validators(self, client, queries):
+        response = client.get("/villes/")
+        assert response.status_code == 200
+        assert response.json() == {"villes": [
+            {"idVille": 1, "name": "Marrakech", "budget": 1000.0},
+            {"idVille": 2, "name": "Fès", "budget": 1500.0},
+        ]}
+        assert response.headers["etag"].startswith('"')
+        assert "max-age" in response.headers["cache-control"]
+
+        client.get("/villes/")
+        client.get("/villes/Marrakech/id")
+        assert len(queries) == 1
+
+    def test_if_none_match_returns_304(self, client):
+        etag = client.get("/villes/").headers["etag"]
+
+        response = client.get("/villes/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+        response = client.get("/villes/", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+
+    def test_ville_id(self, client):
+        response = client.get("/villes/Fès/id")
+        assert response.status_code == 200
+        assert response.json() == {"idVille": 2}
+
+        response = client.get("/villes/Atlantis/id")
+        assert response.status_code == 404
+        assert response.json() == {"error": "Ville not found"}
+
+
+class TestCatalogInvalidation:
+    def test_committed_write_invalidates(self, client, session_factory):
+        etag = client.get("/villes/").headers["etag"]
+
+        db = session_factory()
+        getOrCreateVilleIds(db, ["Agadir"])
+        db.commit()
+        db.close()
+
+        response = client.get("/villes/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert [ville["name"] for ville in response.json()["villes"]][-1] == "Agadir"
+
+    def test_rolled_back_write_keeps_catalog(self, session_factory, queries):
+        db = session_factory()
+        assert getVilleIdByName(db, "Marrakech") == 1
+        version = ville_catalog.version
+
+        db.add(Villes(nom="Agadir"))
+        db.flush()
+        db.rollback()
+
+        assert getVilleIdByName(db, "Agadir") is None
+        assert ville_catalog.version == version
+        db.close()